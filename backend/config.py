@@ -10,16 +10,91 @@ class Settings(BaseSettings):
     # JWT / Authentication
     JWT_SECRET: str = "change-me"
     JWT_ALGORITHM: str = "HS256"
-    JWT_EXPIRE_MINUTES: int = 1440
+    # Access tokens are short-lived and checked without a database read;
+    # refresh tokens (rotated on use) re-check the user
+    JWT_EXPIRE_MINUTES: int = 15
+    JWT_REFRESH_EXPIRE_DAYS: int = 14
+    # Revoked tokens: bloom filter size (bits) and how often workers pick up each other's revocations
+    REVOCATION_BLOOM_BITS: int = 1048576
+    REVOCATION_SYNC_INTERVAL: float = 2.0
     
     # Database
     DATABASE_URL: str = "sqlite:///./db.sqlite"
     ENABLE_CLOUDFLARE: bool = False
+    SQLITE_POOL_READERS: int = 4
+    SQLITE_POOL_ACQUIRE_TIMEOUT: float = 10.0
+    SQLITE_WRITE_BATCH_SIZE: int = 64
+    
+    # SQLite tuning profile (applied on every pooled connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     
     # Cloudflare D1
     CLOUDFLARE_ACCOUNT_ID: Optional[str] = None
     CLOUDFLARE_DATABASE_ID: Optional[str] = None
     CLOUDFLARE_API_TOKEN: Optional[str] = None
+    CLOUDFLARE_API_BASE_URL: str = "https://api.cloudflare.com/client/v4"
+    D1_HTTP2: bool = True
+    D1_TIMEOUT: float = 10.0
+    D1_CONNECT_TIMEOUT: float = 3.0
+    D1_MAX_CONNECTIONS: int = 20
+    D1_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    D1_KEEPALIVE_EXPIRY: float = 30.0
+    # Circuit breaker + fallback: "read_only" (reads go to SQLite, writes fail fast),
+    # "read_write" (legacy: everything goes to SQLite) or "none"
+    D1_BREAKER_FAILURE_THRESHOLD: int = 5
+    D1_BREAKER_RESET_SECONDS: float = 15.0
+    D1_BREAKER_HALF_OPEN_PROBES: int = 1
+    D1_FALLBACK_POLICY: str = "read_only"
+    
+    # Exam snapshots served to students (set a directory to share them between workers)
+    EXAM_SNAPSHOT_CACHE_SIZE: int = 256
+    EXAM_SNAPSHOT_DIR: Optional[str] = None
+    
+    # Exam submissions: "sync" grades in the request, "queue" enqueues (202) for the worker pool
+    EXAM_SUBMIT_MODE: str = "sync"
+    SUBMISSION_WORKERS: int = 2
+    SUBMISSION_BATCH_SIZE: int = 50
+    SUBMISSION_POLL_INTERVAL: float = 1.0
+    SUBMISSION_CLAIM_TIMEOUT: float = 300.0
+    SUBMISSION_MAX_ATTEMPTS: int = 5
+    # Failed rows wait SUBMISSION_RETRY_BASE * 2^n seconds (capped) before the next
+    # attempt; D1 unavailability is retried the same way without using up attempts
+    SUBMISSION_RETRY_BASE: float = 2.0
+    SUBMISSION_RETRY_MAX: float = 300.0
+    
+    # Listings: seconds a COUNT(*) total is reused for the same filters (0 = always count)
+    LIST_COUNT_CACHE_TTL: float = 30.0
+    
+    # Public GET response cache (ETag/304). Invalidation stamps are files in
+    # RESPONSE_CACHE_STAMP_DIR (default: a directory under the system temp dir)
+    # so workers and import scripts on the same host invalidate each other
+    RESPONSE_CACHE_TTL: float = 60.0
+    RESPONSE_CACHE_SIZE: int = 512
+    RESPONSE_CACHE_STAMP_DIR: Optional[str] = None
+    
+    # bcrypt cost for new hashes (stored hashes with another cost are rehashed at login;
+    # pick it with backend/scripts/calibrate_bcrypt.py) and the thread pool that runs
+    # it (None = min(4, CPU count)); hashes queued beyond the pool get 503 + Retry-After
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: Optional[int] = None
+    BCRYPT_MAX_QUEUE: int = 64
+    
+    # Authenticated users cached by token subject (deactivation reaches other workers within the TTL)
+    PRINCIPAL_CACHE_TTL: float = 30.0
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    
+    # Post view/download counters: written behind in one batched UPDATE
+    COUNTER_SHARDS: int = 16
+    COUNTER_FLUSH_INTERVAL: float = 5.0
+    COUNTER_FLUSH_EVENTS: int = 1000
+    
+    # Batch item analysis: worker processes (None = CPU count) and exams per shard
+    ANALYSIS_WORKERS: Optional[int] = None
+    ANALYSIS_SHARD_SIZE: int = 25
     
     # Cloudflare R2
     CLOUDFLARE_R2_ACCESS_KEY_ID: Optional[str] = None
@@ -33,6 +108,21 @@ class Settings(BaseSettings):
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
     SMTP_FROM: str = "noreply@yourdomain.com"
+    # Without STARTTLS and SMTP_USER the outbox talks to a plain relay
+    # (e.g. backend/scripts/smtp_standin.py on localhost:1025)
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT: float = 10.0
+    
+    # Email outbox: messages are queued in the local SQLite file and sent by a
+    # background worker over one reused SMTP connection, retrying with backoff
+    # (EMAIL_RETRY_BASE * 2^n seconds, capped at EMAIL_RETRY_MAX)
+    EMAIL_BATCH_SIZE: int = 20
+    EMAIL_POLL_INTERVAL: float = 5.0
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE: float = 30.0
+    EMAIL_RETRY_MAX: float = 3600.0
+    EMAIL_SMTP_IDLE_TIMEOUT: float = 30.0
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7
     
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
@@ -65,6 +155,16 @@ class Settings(BaseSettings):
             self.CLOUDFLARE_API_TOKEN
         ])
 
+    @property
+    def sqlite_pragmas(self) -> dict:
+        return {
+            "journal_mode": self.SQLITE_JOURNAL_MODE,
+            "synchronous": self.SQLITE_SYNCHRONOUS,
+            "mmap_size": self.SQLITE_MMAP_SIZE,
+            "cache_size": self.SQLITE_CACHE_SIZE,
+            "busy_timeout": self.SQLITE_BUSY_TIMEOUT_MS,
+        }
+
     @property
     def use_cloudflare_r2(self) -> bool:
         return self.ENABLE_CLOUDFLARE and all([
@@ -1,3 +1,3 @@
-from .d1 import db
+from .d1 import db, DatabaseUnavailableError, D1QueryError
 
-__all__ = ["db"]
\ No newline at end of file
+__all__ = ["db", "DatabaseUnavailableError", "D1QueryError"]
\ No newline at end of file
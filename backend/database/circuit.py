@@ -0,0 +1,108 @@
+import logging
+import time
+from typing import Dict, Any
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)
+
+    While open every call is rejected immediately; after ``reset_timeout``
+    seconds up to ``half_open_probes`` calls are let through to probe the
+    backend. A successful probe closes the circuit, a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 15.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, half_open_probes)
+        self.logger = logging.getLogger("db.circuit")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        # Metrics
+        self._rejected = 0
+        self._opened_count = 0
+        self._last_error = None
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the next half-open probe is allowed"""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        self.logger.warning(f"circuit={self.name} state={self._state}->{state} failures={self._failures}")
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self._opened_count += 1
+            self._probes_in_flight = 0
+        elif state == self.HALF_OPEN:
+            self._probes_in_flight = 0
+        elif state == self.CLOSED:
+            self._failures = 0
+            self._probes_in_flight = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may be attempted right now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+        self._rejected += 1
+        return False
+
+    def release(self):
+        """Give back a probe slot for a call that ended without an outcome (e.g. cancelled)"""
+        if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def record_success(self):
+        if self._state == self.HALF_OPEN:
+            self._transition(self.CLOSED)
+        else:
+            self._failures = 0
+
+    def record_failure(self, error: Exception = None):
+        self._last_error = repr(error) if error is not None else None
+        if self._state == self.HALF_OPEN:
+            self._transition(self.OPEN)
+            return
+        self._failures += 1
+        if self._state == self.CLOSED and self._failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_s": self.reset_timeout,
+            "retry_after_s": round(self.retry_after(), 3),
+            "times_opened": self._opened_count,
+            "rejected": self._rejected,
+            "last_error": self._last_error,
+        }
@@ -67,6 +67,7 @@ CREATE TABLE IF NOT EXISTS exams (
     subject_id INTEGER, -- Categorization
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 0, -- Bumped by every content edit (cache key)
     FOREIGN KEY (created_by) REFERENCES users(id),
     FOREIGN KEY (teacher_id) REFERENCES users(id),
     FOREIGN KEY (subject_id) REFERENCES subjects(id)
@@ -3,14 +3,50 @@ import logging
 import time
 import sqlite3
 import aiosqlite
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from backend.config import settings
-from contextlib import asynccontextmanager
+from backend.database.pool import SQLitePool
+from backend.database.circuit import CircuitBreaker
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+class DatabaseUnavailableError(Exception):
+    """The primary database cannot be used and the fallback policy forbids SQLite"""
+    
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class D1QueryError(Exception):
+    """D1 rejected the statement (syntax, constraint, ...)"""
+
+
+# (table, column, definition) added to existing local files by _init_local_schema
+LOCAL_SCHEMA_COLUMNS = [
+    ("submission_queue", "next_attempt_at", "REAL NOT NULL DEFAULT 0"),
+]
+
+# Set by Database.without_fallback() for the current task (and tasks it spawns)
+_fallback_disabled: ContextVar[bool] = ContextVar("d1_fallback_disabled", default=False)
+
+
+class ManyParams(list):
+    """Parameter rows for a statement that runs once per row (executemany)"""
+
 
 class Database:
     def __init__(self):
         self.use_d1 = settings.use_cloudflare_d1
         self.logger = logging.getLogger("db")
+        self._pool: Optional[SQLitePool] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._breaker = CircuitBreaker(
+            "d1",
+            failure_threshold=settings.D1_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.D1_BREAKER_RESET_SECONDS,
+            half_open_probes=settings.D1_BREAKER_HALF_OPEN_PROBES,
+        )
         db_url = settings.DATABASE_URL.replace("sqlite:///", "")
         # Handle relative paths - resolve to absolute path
         import os
@@ -52,7 +88,8 @@ class Database:
             self.account_id = settings.CLOUDFLARE_ACCOUNT_ID
             self.database_id = settings.CLOUDFLARE_DATABASE_ID
             self.api_token = settings.CLOUDFLARE_API_TOKEN
-            self.base_url = f"https://api.cloudflare.com/client/v4/accounts/{self.account_id}/d1/database/{self.database_id}"
+            api_base = settings.CLOUDFLARE_API_BASE_URL.rstrip("/")
+            self.base_url = f"{api_base}/accounts/{self.account_id}/d1/database/{self.database_id}"
             self.logger.info("db_backend=d1")
         else:
             self._init_sqlite()
@@ -64,6 +101,8 @@ class Database:
                 self._init_sqlite()
         except Exception:
             pass
+        self._init_local_schema()
+        self._local: Optional["LocalDatabase"] = None
     
     def _init_sqlite(self):
         """Initialize SQLite database with schema"""
@@ -83,6 +122,11 @@ class Database:
         except Exception as e:
             self.logger.error(f"Could not connect to database at {self.db_path}: {e}")
             raise
+        try:
+            # WAL is persistent on the file; set it once here so every connection benefits
+            conn.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        except Exception as e:
+            self.logger.warning(f"Could not set journal_mode on {self.db_path}: {e}")
         if not db_exists:
             base_dir = os.path.dirname(__file__)
             schema_path = os.path.join(base_dir, "cyber_schema.sql")
@@ -100,6 +144,37 @@ class Database:
             pass
         conn.close()
     
+    def _init_local_schema(self):
+        """Create the tables that always live in the local SQLite file (idempotent)"""
+        import os
+        schema_path = os.path.join(os.path.dirname(__file__), "local_schema.sql")
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with open(schema_path, "r", encoding="utf-8") as f:
+                    conn.executescript(f.read())
+                # Columns added after a table first shipped (CREATE TABLE IF NOT EXISTS skips them)
+                for table, column, definition in LOCAL_SCHEMA_COLUMNS:
+                    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            self.logger.error(f"Could not apply local schema to {self.db_path}: {e}")
+    
+    @property
+    def local(self) -> "Database":
+        """This database, but always backed by the local SQLite file
+        
+        For node-local state (queues, outboxes, counters) that must not go to
+        D1 even when D1 is the primary database. Shares the SQLite pool.
+        """
+        if self._local is None:
+            self._local = LocalDatabase(self)
+        return self._local
+    
     def _get_headers(self) -> Dict[str, str]:
         """Get headers for Cloudflare API"""
         return {
@@ -109,74 +184,280 @@ class Database:
     
     # ==================== CLOUDFLARE D1 METHODS ====================
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Long-lived HTTP client for D1 (keep-alive + HTTP/2 when h2 is installed)"""
+        if self._client is None or self._client.is_closed:
+            try:
+                import h2  # noqa: F401
+                http2 = settings.D1_HTTP2
+            except ImportError:
+                http2 = False
+            self._client = httpx.AsyncClient(
+                headers=self._get_headers(),
+                http2=http2,
+                timeout=httpx.Timeout(settings.D1_TIMEOUT, connect=settings.D1_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.D1_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.D1_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.D1_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self.logger.info(f"d1_client_open http2={http2} max_connections={settings.D1_MAX_CONNECTIONS}")
+        return self._client
+    
+    @staticmethod
+    def _is_read(sql: str) -> bool:
+        return sql.strip().upper().startswith("SELECT")
+    
+    async def _post_d1(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST to D1 /query through the circuit breaker.
+        
+        Raises D1QueryError when D1 rejected the statement itself (HTTP 400) and
+        DatabaseUnavailableError when D1 is unreachable or the circuit is open.
+        """
+        if not self._breaker.allow_request():
+            raise DatabaseUnavailableError("d1 circuit open", retry_after=self._breaker.retry_after())
+        try:
+            response = await self._get_client().post(f"{self.base_url}/query", json=payload)
+        except Exception as e:
+            self._breaker.record_failure(e)
+            raise DatabaseUnavailableError(f"d1 request failed: {e!r}", retry_after=self._breaker.retry_after()) from e
+        except BaseException:
+            # Cancelled mid-request: says nothing about D1, but a half-open probe slot must not leak
+            self._breaker.release()
+            raise
+        if response.status_code == 400:
+            # D1 answered; the statement is at fault, not the service
+            self._breaker.record_success()
+            try:
+                errors = response.json().get("errors") or []
+            except Exception:
+                errors = []
+            message = "; ".join(str(err.get("message", err)) for err in errors) or response.text
+            raise D1QueryError(message)
+        if response.status_code >= 400:
+            error = httpx.HTTPStatusError(f"d1 status {response.status_code}", request=response.request, response=response)
+            self._breaker.record_failure(error)
+            raise DatabaseUnavailableError(f"d1 status {response.status_code}", retry_after=self._breaker.retry_after())
+        self._breaker.record_success()
+        return response.json()
+    
+    @contextmanager
+    def without_fallback(self):
+        """Raise DatabaseUnavailableError instead of falling back to SQLite inside the block
+        
+        For background work that can be retried later and must not act on
+        (or write to) the local copy while D1 is down.
+        """
+        token = _fallback_disabled.set(True)
+        try:
+            yield
+        finally:
+            _fallback_disabled.reset(token)
+    
+    def _fallback_allowed(self, is_read: bool) -> bool:
+        if _fallback_disabled.get():
+            return False
+        policy = settings.D1_FALLBACK_POLICY
+        if policy == "read_write":
+            return True
+        if policy == "read_only":
+            return is_read
+        return False
+    
     async def _execute_d1(self, sql: str, params: Optional[List] = None) -> Dict[str, Any]:
         """Execute SQL query on Cloudflare D1"""
         t0 = time.perf_counter()
         verb = sql.strip().split()[0].upper()
+        payload = {"sql": sql}
+        if params:
+            payload["params"] = params
         try:
-            async with httpx.AsyncClient() as client:
-                payload = {"sql": sql}
-                if params:
-                    payload["params"] = params
-                response = await client.post(
-                    f"{self.base_url}/query",
-                    headers=self._get_headers(),
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                latency_ms = int((time.perf_counter() - t0) * 1000)
-                self.logger.info(f"d1 {verb} status={response.status_code} latency_ms={latency_ms}")
-                return data
-        except Exception:
-            # Fallback to SQLite on any D1 error
-            self.logger.error("d1_error_fallback_sqlite")
+            data = await self._post_d1(payload)
+        except DatabaseUnavailableError as e:
+            if not self._fallback_allowed(self._is_read(sql)):
+                self.logger.error(f"d1_unavailable verb={verb} policy={settings.D1_FALLBACK_POLICY} error={e}")
+                raise
+            self.logger.warning(f"d1_unavailable_fallback_sqlite verb={verb} error={e}")
             return await self._execute_sqlite(sql, params)
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        self.logger.info(f"d1 {verb} latency_ms={latency_ms}")
+        return data
+    
+    async def _batch_d1(self, statements: List[Tuple[str, Optional[List]]]) -> List[Dict[str, Any]]:
+        """Send several statements to D1 in one request (executed as one transaction)"""
+        t0 = time.perf_counter()
+        batch = []
+        # executemany statements are expanded to one batch item per row
+        spans = []
+        for sql, params in statements:
+            rows = params if isinstance(params, ManyParams) else [params]
+            spans.append((len(batch), len(rows), isinstance(params, ManyParams)))
+            for row in rows:
+                item = {"sql": sql}
+                if row:
+                    item["params"] = row
+                batch.append(item)
+        try:
+            data = await self._post_d1({"batch": batch})
+        except DatabaseUnavailableError as e:
+            if not self._fallback_allowed(all(self._is_read(sql) for sql, _ in statements)):
+                self.logger.error(f"d1_unavailable verb=BATCH policy={settings.D1_FALLBACK_POLICY} error={e}")
+                raise
+            self.logger.warning(f"d1_unavailable_fallback_sqlite verb=BATCH error={e}")
+            return await self._batch_sqlite(statements)
+        results = data.get("result") or []
+        if not data.get("success", True) or len(results) != len(batch):
+            raise D1QueryError(f"d1 batch returned {len(results)} results for {len(batch)} statements")
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        self.logger.info(f"d1 BATCH statements={len(batch)} latency_ms={latency_ms}")
+        merged = []
+        for start, count, many in spans:
+            if not many:
+                merged.append(results[start])
+                continue
+            part = results[start:start + count]
+            merged.append({
+                "results": [],
+                "meta": {
+                    "changes": sum((r.get("meta") or {}).get("changes", 0) for r in part),
+                    "last_row_id": (part[-1].get("meta") or {}).get("last_row_id") if part else None,
+                },
+            })
+        return merged
+    
+    def circuit_stats(self) -> Dict[str, Any]:
+        """D1 circuit breaker state for /health"""
+        stats = self._breaker.stats()
+        stats["fallback_policy"] = settings.D1_FALLBACK_POLICY
+        return stats
     
     # ==================== SQLITE METHODS ====================
     
-    async def _execute_sqlite(self, sql: str, params: Optional[List] = None) -> Dict[str, Any]:
-        """Execute SQL query on SQLite"""
+    async def connect(self):
+        """Open the long-lived D1 client and SQLite connection pool (called from app lifespan)"""
+        if self.use_d1:
+            self._get_client()
+        if self._pool is None:
+            self._pool = SQLitePool(
+                self.db_path,
+                readers=settings.SQLITE_POOL_READERS,
+                acquire_timeout=settings.SQLITE_POOL_ACQUIRE_TIMEOUT,
+                pragmas=settings.sqlite_pragmas,
+                write_batch_size=settings.SQLITE_WRITE_BATCH_SIZE,
+            )
+        await self._pool.open()
+    
+    async def close(self):
+        """Close the D1 client and pooled connections (called from app lifespan)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._pool is not None:
+            await self._pool.close()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool size and wait-time metrics"""
+        if self._pool is None:
+            return {"open": False}
+        return self._pool.stats()
+    
+    async def _run_sqlite(
+        self, db: aiosqlite.Connection, sql: str, params: Optional[List] = None, commit: bool = True
+    ) -> Dict[str, Any]:
+        """Run one statement on an open connection and shape the result like D1"""
         t0 = time.perf_counter()
         verb = sql.strip().split()[0].upper()
+        if isinstance(params, ManyParams):
+            cursor = await db.executemany(sql, params)
+            async with db.execute("SELECT last_insert_rowid()") as rowid_cursor:
+                last_row_id = (await rowid_cursor.fetchone())[0]
+            if commit:
+                await db.commit()
+            latency_ms = int((time.perf_counter() - t0) * 1000)
+            self.logger.info(f"sqlite {verb} rows={len(params)} changes={cursor.rowcount} latency_ms={latency_ms}")
+            return {
+                "success": True,
+                "result": [{
+                    "results": [],
+                    "meta": {"changes": cursor.rowcount, "last_row_id": last_row_id}
+                }]
+            }
+        if params is None:
+            params = []
+        
+        cursor = await db.execute(sql, params)
+        
+        # Check if it's a SELECT query
+        if sql.strip().upper().startswith("SELECT"):
+            rows = await cursor.fetchall()
+            results = [dict(row) for row in rows]
+            data = {
+                "success": True,
+                "result": [{
+                    "results": results,
+                    "meta": {"rows_read": len(results)}
+                }]
+            }
+            latency_ms = int((time.perf_counter() - t0) * 1000)
+            self.logger.info(f"sqlite {verb} rows_read={len(results)} latency_ms={latency_ms}")
+            return data
+        else:
+            # Writes with a RETURNING clause hand back their rows too
+            returned = [dict(row) for row in await cursor.fetchall()] if cursor.description else []
+            if commit:
+                await db.commit()
+            data = {
+                "success": True,
+                "result": [{
+                    "results": returned,
+                    "meta": {
+                        "changes": cursor.rowcount,
+                        "last_row_id": cursor.lastrowid
+                    }
+                }]
+            }
+            latency_ms = int((time.perf_counter() - t0) * 1000)
+            self.logger.info(f"sqlite {verb} changes={cursor.rowcount} latency_ms={latency_ms}")
+            return data
+    
+    async def _execute_sqlite(self, sql: str, params: Optional[List] = None) -> Dict[str, Any]:
+        """Execute SQL query on SQLite"""
+        if self._pool is not None and self._pool.is_open:
+            if sql.strip().upper().startswith("SELECT"):
+                async with self._pool.reader() as conn:
+                    return await self._run_sqlite(conn, sql, params)
+            # Writes go through the single-writer queue (grouped into transactions)
+            return await self._pool.submit(
+                lambda conn: self._run_sqlite(conn, sql, params, commit=False)
+            )
+        # No pool (scripts, tests): fall back to a one-off connection
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
-            
-            if params is None:
-                params = []
-            
-            cursor = await db.execute(sql, params)
-            
-            # Check if it's a SELECT query
-            if sql.strip().upper().startswith("SELECT"):
-                rows = await cursor.fetchall()
-                results = [dict(row) for row in rows]
-                data = {
-                    "success": True,
-                    "result": [{
-                        "results": results,
-                        "meta": {"rows_read": len(results)}
-                    }]
-                }
-                latency_ms = int((time.perf_counter() - t0) * 1000)
-                self.logger.info(f"sqlite {verb} rows_read={len(results)} latency_ms={latency_ms}")
-                return data
-            else:
-                await db.commit()
-                data = {
-                    "success": True,
-                    "result": [{
-                        "results": [],
-                        "meta": {
-                            "changes": cursor.rowcount,
-                            "last_row_id": cursor.lastrowid
-                        }
-                    }]
-                }
-                latency_ms = int((time.perf_counter() - t0) * 1000)
-                self.logger.info(f"sqlite {verb} changes={cursor.rowcount} latency_ms={latency_ms}")
-                return data
+            return await self._run_sqlite(db, sql, params)
+    
+    async def _batch_sqlite(self, statements: List[Tuple[str, Optional[List]]]) -> List[Dict[str, Any]]:
+        """Run several statements in a single BEGIN...COMMIT on one connection"""
+        async def job(conn: aiosqlite.Connection) -> List[Dict[str, Any]]:
+            results = []
+            for sql, params in statements:
+                data = await self._run_sqlite(conn, sql, params, commit=False)
+                results.append(data["result"][0])
+            return results
+        
+        if self._pool is not None and self._pool.is_open:
+            # The writer task wraps the job in its own SAVEPOINT: all or nothing
+            return await self._pool.submit(job)
+        async with aiosqlite.connect(self.db_path, isolation_level=None) as conn:
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                results = await job(conn)
+            except Exception:
+                await conn.execute("ROLLBACK")
+                raise
+            await conn.execute("COMMIT")
+            return results
     
     # ==================== UNIFIED INTERFACE ====================
     
@@ -221,6 +502,92 @@ class Database:
     async def delete(self, sql: str, params: Optional[List] = None) -> int:
         """Delete and return affected rows"""
         return await self.update(sql, params)
+    
+    async def batch(self, statements: List[Tuple[str, Optional[List]]]) -> List[Dict[str, Any]]:
+        """Execute statements atomically in one round trip.
+        
+        Returns one ``{"results": [...], "meta": {...}}`` entry per statement, in
+        order, so callers can read ``meta["last_row_id"]`` / ``meta["changes"]``.
+        """
+        if not statements:
+            return []
+        if self.use_d1:
+            return await self._batch_d1(statements)
+        return await self._batch_sqlite(statements)
+    
+    async def executemany(self, sql: str, rows: List[List]) -> int:
+        """Run one statement for every parameter row in a single transaction
+        
+        SQLite uses ``executemany`` on the writer connection; D1 sends all rows
+        as one batch request. Returns the total number of affected rows.
+        """
+        if not rows:
+            return 0
+        results = await self.batch([(sql, ManyParams(rows))])
+        return results[0].get("meta", {}).get("changes", 0)
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Collect statements and run them as one batch when the block exits
+        
+        Usage::
+        
+            async with db.transaction() as tx:
+                tx.execute("UPDATE ...", [...])
+                tx.execute("INSERT ...", [...])
+            tx.results[1]["meta"]["last_row_id"]
+        """
+        tx = Transaction()
+        yield tx
+        tx.results = await self.batch(tx.statements)
+
+
+class LocalDatabase(Database):
+    """Database interface that always runs on the parent's local SQLite pool"""
+    
+    def __init__(self, parent: Database):
+        self._parent = parent
+        self.use_d1 = False
+        self.logger = parent.logger
+        self.db_path = parent.db_path
+        self._local = self
+    
+    @property
+    def _pool(self) -> Optional[SQLitePool]:
+        return self._parent._pool
+    
+    async def connect(self):
+        await self._parent.connect()
+    
+    async def close(self):
+        await self._parent.close()
+
+
+class Transaction:
+    """Statements queued inside ``async with db.transaction()``"""
+    
+    def __init__(self):
+        self.statements: List[Tuple[str, Optional[List]]] = []
+        self.results: List[Dict[str, Any]] = []
+    
+    def execute(self, sql: str, params: Optional[List] = None) -> int:
+        """Queue a statement; returns its index into ``results``"""
+        self.statements.append((sql, params))
+        return len(self.statements) - 1
+    
+    def executemany(self, sql: str, rows: List[List]) -> int:
+        """Queue a statement run once per parameter row; returns its index"""
+        self.statements.append((sql, ManyParams(rows)))
+        return len(self.statements) - 1
+    
+    def last_row_id(self, index: int) -> Optional[int]:
+        return self.results[index].get("meta", {}).get("last_row_id")
+    
+    def changes(self, index: int) -> int:
+        return self.results[index].get("meta", {}).get("changes", 0)
+    
+    def rows(self, index: int) -> List[Dict]:
+        return self.results[index].get("results", [])
 
 # Singleton instance
 db = Database()
@@ -0,0 +1,53 @@
+-- Node-local tables. They always live in the local SQLite file (even when
+-- Cloudflare D1 is the primary database) and are created on every start,
+-- so every statement here must be idempotent.
+
+-- Durable queue of exam submissions waiting to be graded and persisted
+CREATE TABLE IF NOT EXISTS submission_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL,
+    exam_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'processing', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    exam_result_id INTEGER,
+    error TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    claimed_at DATETIME,
+    completed_at DATETIME,
+    UNIQUE (student_id, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_submission_queue_status ON submission_queue(status, id);
+
+-- Revoked JWTs: one row per token id (logout, refresh rotation) or per user
+-- (every token of user_id issued before not_before), kept until expires_at
+CREATE TABLE IF NOT EXISTS token_revocations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    jti TEXT UNIQUE,
+    user_id INTEGER,
+    not_before REAL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_token_revocations_expires ON token_revocations(expires_at);
+
+-- Outgoing email waiting for (or done with) SMTP delivery; times are epoch seconds
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    to_email TEXT NOT NULL,
+    from_email TEXT,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'sending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    error TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at);
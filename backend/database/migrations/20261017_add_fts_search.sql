@@ -0,0 +1,115 @@
+-- Full-text search (FTS5) for posts, exams and cyber resources, kept in sync by triggers.
+-- Text is indexed with 'đ' folded to 'd'; unicode61 with remove_diacritics 2 strips the
+-- other Vietnamese diacritics, so searches are accent-insensitive (see services/search.py).
+
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    title, description, author,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, title, description, author) VALUES (
+        new.id,
+        replace(replace(new.title, 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(coalesce(new.description, ''), 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(new.author, 'đ', 'd'), 'Đ', 'D')
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+    DELETE FROM posts_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, description, author ON posts BEGIN
+    UPDATE posts_fts SET
+        title = replace(replace(new.title, 'đ', 'd'), 'Đ', 'D'),
+        description = replace(replace(coalesce(new.description, ''), 'đ', 'd'), 'Đ', 'D'),
+        author = replace(replace(new.author, 'đ', 'd'), 'Đ', 'D')
+    WHERE rowid = new.id;
+END;
+
+INSERT INTO posts_fts (rowid, title, description, author)
+SELECT id,
+       replace(replace(title, 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(coalesce(description, ''), 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(author, 'đ', 'd'), 'Đ', 'D')
+FROM posts WHERE id NOT IN (SELECT rowid FROM posts_fts);
+
+-- Exams also index the creator's full name (searched by get_exams)
+CREATE VIRTUAL TABLE IF NOT EXISTS exams_fts USING fts5(
+    title, author, description, creator,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS exams_fts_insert AFTER INSERT ON exams BEGIN
+    INSERT INTO exams_fts (rowid, title, author, description, creator) VALUES (
+        new.id,
+        replace(replace(new.title, 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(new.author, 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(coalesce(new.description, ''), 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(coalesce((SELECT fullname FROM users WHERE id = new.created_by), ''), 'đ', 'd'), 'Đ', 'D')
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS exams_fts_delete AFTER DELETE ON exams BEGIN
+    DELETE FROM exams_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS exams_fts_update AFTER UPDATE OF title, author, description, created_by ON exams BEGIN
+    UPDATE exams_fts SET
+        title = replace(replace(new.title, 'đ', 'd'), 'Đ', 'D'),
+        author = replace(replace(new.author, 'đ', 'd'), 'Đ', 'D'),
+        description = replace(replace(coalesce(new.description, ''), 'đ', 'd'), 'Đ', 'D'),
+        creator = replace(replace(coalesce((SELECT fullname FROM users WHERE id = new.created_by), ''), 'đ', 'd'), 'Đ', 'D')
+    WHERE rowid = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS exams_fts_creator_update AFTER UPDATE OF fullname ON users BEGIN
+    UPDATE exams_fts SET creator = replace(replace(coalesce(new.fullname, ''), 'đ', 'd'), 'Đ', 'D')
+    WHERE rowid IN (SELECT id FROM exams WHERE created_by = new.id);
+END;
+
+INSERT INTO exams_fts (rowid, title, author, description, creator)
+SELECT e.id,
+       replace(replace(e.title, 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(e.author, 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(coalesce(e.description, ''), 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(coalesce(u.fullname, ''), 'đ', 'd'), 'Đ', 'D')
+FROM exams e LEFT JOIN users u ON u.id = e.created_by
+WHERE e.id NOT IN (SELECT rowid FROM exams_fts);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS cyber_resources_fts USING fts5(
+    title, summary, tags, source,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS cyber_resources_fts_insert AFTER INSERT ON cyber_resources BEGIN
+    INSERT INTO cyber_resources_fts (rowid, title, summary, tags, source) VALUES (
+        new.id,
+        replace(replace(new.title, 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(coalesce(new.summary, ''), 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(coalesce(new.tags, ''), 'đ', 'd'), 'Đ', 'D'),
+        replace(replace(coalesce(new.source, ''), 'đ', 'd'), 'Đ', 'D')
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS cyber_resources_fts_delete AFTER DELETE ON cyber_resources BEGIN
+    DELETE FROM cyber_resources_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS cyber_resources_fts_update AFTER UPDATE OF title, summary, tags, source ON cyber_resources BEGIN
+    UPDATE cyber_resources_fts SET
+        title = replace(replace(new.title, 'đ', 'd'), 'Đ', 'D'),
+        summary = replace(replace(coalesce(new.summary, ''), 'đ', 'd'), 'Đ', 'D'),
+        tags = replace(replace(coalesce(new.tags, ''), 'đ', 'd'), 'Đ', 'D'),
+        source = replace(replace(coalesce(new.source, ''), 'đ', 'd'), 'Đ', 'D')
+    WHERE rowid = new.id;
+END;
+
+INSERT INTO cyber_resources_fts (rowid, title, summary, tags, source)
+SELECT id,
+       replace(replace(title, 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(coalesce(summary, ''), 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(coalesce(tags, ''), 'đ', 'd'), 'Đ', 'D'),
+       replace(replace(coalesce(source, ''), 'đ', 'd'), 'Đ', 'D')
+FROM cyber_resources WHERE id NOT IN (SELECT rowid FROM cyber_resources_fts);
@@ -0,0 +1,27 @@
+-- Item response theory calibration (Rasch / 2PL), written by backend.services.irt
+CREATE TABLE IF NOT EXISTS irt_item_params (
+    exam_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    model TEXT NOT NULL CHECK(model IN ('rasch', '2pl')),
+    difficulty REAL NOT NULL,
+    discrimination REAL NOT NULL DEFAULT 1,
+    difficulty_se REAL,
+    responses INTEGER NOT NULL DEFAULT 0,
+    calibrated_at DATETIME,
+    PRIMARY KEY (exam_id, question_id, model),
+    FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE,
+    FOREIGN KEY (question_id) REFERENCES questions(question_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS irt_abilities (
+    exam_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    model TEXT NOT NULL CHECK(model IN ('rasch', '2pl')),
+    ability REAL NOT NULL,
+    ability_se REAL,
+    responses INTEGER NOT NULL DEFAULT 0,
+    calibrated_at DATETIME,
+    PRIMARY KEY (exam_id, student_id, model),
+    FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
+);
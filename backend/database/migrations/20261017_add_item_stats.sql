@@ -0,0 +1,27 @@
+-- Running item statistics, maintained by every exam submission and rebuilt
+-- exactly by backend/scripts/reconcile_item_stats.py
+CREATE TABLE IF NOT EXISTS question_item_stats (
+    exam_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (exam_id, question_id)
+);
+
+-- Same counts split by the submission's score bucket (percentage / 10)
+CREATE TABLE IF NOT EXISTS question_item_buckets (
+    exam_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (exam_id, question_id, bucket)
+);
+
+-- Number of exam results per score bucket
+CREATE TABLE IF NOT EXISTS exam_score_histogram (
+    exam_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    results INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (exam_id, bucket)
+);
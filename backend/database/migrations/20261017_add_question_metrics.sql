@@ -0,0 +1,22 @@
+-- Item analysis results per question and exam (written by QuestionAnalysisService)
+CREATE TABLE IF NOT EXISTS question_metrics (
+    question_id INTEGER NOT NULL,
+    exam_id INTEGER NOT NULL,
+    question_type TEXT,
+    total_attempts INTEGER DEFAULT 0,
+    correct_attempts INTEGER DEFAULT 0,
+    p_value REAL DEFAULT 0,
+    difficulty_score REAL DEFAULT 0,
+    difficulty_level TEXT,
+    discrimination_index REAL DEFAULT 0,
+    discrimination_level TEXT,
+    quality_score REAL DEFAULT 0,
+    is_qualified BOOLEAN DEFAULT 0,
+    recommendations TEXT,
+    last_analyzed DATETIME,
+    PRIMARY KEY (question_id, exam_id),
+    FOREIGN KEY (question_id) REFERENCES questions(question_id) ON DELETE CASCADE,
+    FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_question_metrics_exam_id ON question_metrics(exam_id);
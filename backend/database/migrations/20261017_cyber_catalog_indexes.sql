@@ -0,0 +1,5 @@
+-- /api/cyber/topics filters: topic_type and is_offensive/is_defensive already have
+-- indexes; domain, level and per-topic difficulty get theirs here
+CREATE INDEX IF NOT EXISTS idx_cyber_topics_domain ON cyber_topics(domain);
+CREATE INDEX IF NOT EXISTS idx_cyber_topics_level ON cyber_topics(level);
+CREATE INDEX IF NOT EXISTS idx_cyber_resources_topic_difficulty ON cyber_resources(topic_id, difficulty);
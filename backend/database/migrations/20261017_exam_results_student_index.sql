@@ -0,0 +1,3 @@
+-- Answers of a submission look up their result row by (exam, student)
+-- inside the submit transaction; keep that lookup an index seek.
+CREATE INDEX IF NOT EXISTS idx_exam_results_exam_student ON exam_results(exam_id, student_id);
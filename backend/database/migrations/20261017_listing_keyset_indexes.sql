@@ -0,0 +1,7 @@
+-- Newest-first listings paginate on (created_at, id); filtered listings use the
+-- filter column as the index prefix so a page is a short index range scan
+CREATE INDEX IF NOT EXISTS idx_posts_created ON posts(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_subject_created ON posts(subject, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_teacher_created ON posts(teacher_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_exams_created ON exams(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_exams_subject_created ON exams(subject, created_at DESC, id DESC);
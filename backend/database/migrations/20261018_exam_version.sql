@@ -0,0 +1,5 @@
+-- Content version of an exam, bumped with updated_at by every edit of the
+-- exam or its questions. Snapshots and compiled answer keys are cached per
+-- version; updated_at has whole-second resolution and cannot tell apart two
+-- edits in the same second.
+ALTER TABLE exams ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
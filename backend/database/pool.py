@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+import aiosqlite
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from contextlib import asynccontextmanager
+
+WriteJob = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class SQLitePool:
+    """Bounded pool of long-lived aiosqlite connections (N readers + 1 writer task)
+
+    Reads borrow one of the reader connections. Writes are queued to a
+    single writer task which groups whatever is waiting into one
+    transaction; each job runs inside its own SAVEPOINT so a failing job
+    does not roll back its neighbours.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 4,
+        acquire_timeout: float = 10.0,
+        pragmas: Optional[Dict[str, Any]] = None,
+        write_batch_size: int = 64,
+    ):
+        self.db_path = db_path
+        self.size = max(1, readers)
+        self.acquire_timeout = acquire_timeout
+        self.pragmas = pragmas or {}
+        self.write_batch_size = max(1, write_batch_size)
+        self.logger = logging.getLogger("db.pool")
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closed = True
+        # Metrics
+        self._acquired = 0
+        self._waited = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+        self._write_jobs = 0
+        self._write_failed = 0
+        self._write_batches = 0
+        self._write_batch_max = 0
+        self._write_dequeued = 0
+        self._write_wait_ms_total = 0.0
+        self._write_wait_ms_max = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return not self._closed
+
+    async def _connect(self, readonly: bool = False) -> aiosqlite.Connection:
+        # Writer transactions are managed explicitly by the writer task (autocommit mode)
+        conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+        conn.row_factory = aiosqlite.Row
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        if readonly:
+            await conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    async def open(self):
+        """Open all connections and start the writer task"""
+        if not self._closed:
+            return
+        self._writer = await self._connect()
+        self._readers = asyncio.Queue(maxsize=self.size)
+        for _ in range(self.size):
+            conn = await self._connect(readonly=True)
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(conn)
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        self._closed = False
+        self.logger.info(f"sqlite_pool_open readers={self.size} pragmas={self.pragmas} path={self.db_path}")
+
+    async def close(self):
+        """Drain pending writes, stop the writer task and close every connection"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._write_queue is not None and self._writer_task is not None:
+            await self._write_queue.put(None)
+            try:
+                await self._writer_task
+            except Exception as e:
+                self.logger.warning(f"sqlite_pool_writer_stop_error error={e}")
+        self._writer_task = None
+        self._write_queue = None
+        for conn in self._reader_conns:
+            try:
+                await conn.close()
+            except Exception as e:
+                self.logger.warning(f"sqlite_pool_close_reader_error error={e}")
+        self._reader_conns = []
+        self._readers = None
+        if self._writer is not None:
+            try:
+                await self._writer.close()
+            except Exception as e:
+                self.logger.warning(f"sqlite_pool_close_writer_error error={e}")
+            self._writer = None
+        self.logger.info("sqlite_pool_closed")
+
+    def _record_wait(self, wait_ms: float):
+        self._acquired += 1
+        self._wait_ms_total += wait_ms
+        if wait_ms > self._wait_ms_max:
+            self._wait_ms_max = wait_ms
+
+    @asynccontextmanager
+    async def reader(self):
+        """Borrow a read-only connection"""
+        if self._closed or self._readers is None:
+            raise RuntimeError("SQLite pool is closed")
+        t0 = time.perf_counter()
+        try:
+            conn = self._readers.get_nowait()
+        except asyncio.QueueEmpty:
+            self._waited += 1
+            conn = await asyncio.wait_for(self._readers.get(), timeout=self.acquire_timeout)
+        self._record_wait((time.perf_counter() - t0) * 1000)
+        try:
+            yield conn
+        finally:
+            if not self._closed and self._readers is not None:
+                self._readers.put_nowait(conn)
+
+    async def submit(self, job: WriteJob) -> Any:
+        """Queue a write job for the writer task and wait for its committed result"""
+        if self._closed or self._write_queue is None:
+            raise RuntimeError("SQLite pool is closed")
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((job, future, time.perf_counter()))
+        return await future
+
+    async def _writer_loop(self):
+        queue = self._write_queue
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.write_batch_size:
+                try:
+                    nxt = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch: List[tuple]):
+        conn = self._writer
+        t_start = time.perf_counter()
+        done: List[tuple] = []
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self._write_failed += len(batch)
+            return
+        for job, future, t_enqueued in batch:
+            wait_ms = (t_start - t_enqueued) * 1000
+            self._write_dequeued += 1
+            self._write_wait_ms_total += wait_ms
+            if wait_ms > self._write_wait_ms_max:
+                self._write_wait_ms_max = wait_ms
+            try:
+                await conn.execute("SAVEPOINT write_job")
+                result = await job(conn)
+                await conn.execute("RELEASE write_job")
+                done.append((future, result))
+            except Exception as e:
+                try:
+                    await conn.execute("ROLLBACK TO write_job")
+                    await conn.execute("RELEASE write_job")
+                except Exception:
+                    pass
+                self._write_failed += 1
+                if not future.done():
+                    future.set_exception(e)
+        try:
+            await conn.execute("COMMIT")
+        except Exception as e:
+            self.logger.error(f"sqlite_writer_commit_error jobs={len(done)} error={e}")
+            try:
+                await conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            for future, _ in done:
+                if not future.done():
+                    future.set_exception(e)
+            self._write_failed += len(done)
+            return
+        self._write_jobs += len(batch)
+        self._write_batches += 1
+        if len(batch) > self._write_batch_max:
+            self._write_batch_max = len(batch)
+        for future, result in done:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, wait-time and write-queue metrics"""
+        idle = self._readers.qsize() if self._readers is not None else 0
+        return {
+            "open": not self._closed,
+            "readers": {
+                "size": self.size,
+                "idle": idle,
+                "in_use": (self.size - idle) if not self._closed else 0,
+                "acquired": self._acquired,
+                "waited": self._waited,
+                "wait_ms_avg": round(self._wait_ms_total / self._acquired, 3) if self._acquired else 0.0,
+                "wait_ms_max": round(self._wait_ms_max, 3),
+            },
+            "writer": {
+                "queue_depth": self._write_queue.qsize() if self._write_queue is not None else 0,
+                "jobs": self._write_jobs,
+                "failed": self._write_failed,
+                "transactions": self._write_batches,
+                "jobs_per_transaction_avg": round(self._write_jobs / self._write_batches, 2) if self._write_batches else 0.0,
+                "jobs_per_transaction_max": self._write_batch_max,
+                "wait_ms_avg": round(self._write_wait_ms_total / self._write_dequeued, 3) if self._write_dequeued else 0.0,
+                "wait_ms_max": round(self._write_wait_ms_max, 3),
+            },
+        }
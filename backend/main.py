@@ -21,7 +21,16 @@ except Exception as e:
 
 from backend.config import settings
 settings.ENABLE_CLOUDFLARE = bool(os.getenv("ENABLE_CLOUDFLARE")) or ("--cloudflare" in sys.argv)
+from backend.database import db, DatabaseUnavailableError
 from backend.utils import r2
+from backend.services.submissions import submission_queue
+from backend.services.batch_analysis import batch_analyzer
+from backend.services.counters import post_counters
+from backend.services.email_outbox import email_outbox
+from backend.services.response_cache import response_cache
+from backend.services.principals import principals
+from backend.services.revocation import revocations
+from backend.services.password_hasher import password_hasher, HasherOverloaded
 from backend.routers import auth, posts, exams, users, rag, files, cyber
 from backend.routers import admin_teachers, teacher_classrooms, teacher_notifications, teacher_posts, teacher_exams, subjects
 import logging
@@ -44,9 +53,21 @@ async def lifespan(app: FastAPI):
         f"Cloudflare R2 ({settings.CLOUDFLARE_R2_BUCKET_NAME})" if getattr(r2, "available", False) else "R2 disabled"
     )
     logger.info(f"💾 Storage: {storage_msg}")
+    await db.connect()
+    await submission_queue.start()
+    await post_counters.start()
+    await email_outbox.start()
+    await revocations.start()
     yield
     # Shutdown
     logger.info(f"👋 Shutting down {settings.APP_NAME}")
+    await batch_analyzer.stop()
+    await submission_queue.stop()
+    await post_counters.stop()
+    await email_outbox.stop()
+    await revocations.stop()
+    password_hasher.shutdown()
+    await db.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -114,6 +135,31 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         },
     )
 
+@app.exception_handler(DatabaseUnavailableError)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailableError):
+    logger.error(f"Database unavailable: {exc}")
+    retry_after = max(1, int(exc.retry_after + 0.999))
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "detail": "Cơ sở dữ liệu tạm thời không khả dụng. Vui lòng thử lại sau.",
+            "timestamp": datetime.utcnow().isoformat()
+        },
+    )
+
+@app.exception_handler(HasherOverloaded)
+async def hasher_overloaded_handler(request: Request, exc: HasherOverloaded):
+    retry_after = max(1, int(exc.retry_after + 0.999))
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "detail": "Hệ thống đang xử lý nhiều yêu cầu đăng nhập. Vui lòng thử lại sau.",
+            "timestamp": datetime.utcnow().isoformat()
+        },
+    )
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global error: {exc}", exc_info=True)
@@ -264,13 +310,24 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Detailed health check"""
+    circuit = db.circuit_stats() if settings.use_cloudflare_d1 else None
+    degraded = circuit is not None and circuit["state"] != "closed"
     return {
-        "status": "ok",
+        "status": "degraded" if degraded else "ok",
         "timestamp": datetime.utcnow().isoformat(),
         "database": {
             "type": "D1" if settings.use_cloudflare_d1 else "SQLite",
-            "connected": True
+            "connected": not degraded,
+            "circuit": circuit,
+            "pool": db.pool_stats()
         },
+        "submissions": submission_queue.stats(),
+        "post_counters": post_counters.stats(),
+        "email_outbox": email_outbox.stats(),
+        "response_cache": response_cache.stats(),
+        "principals": principals.stats(),
+        "password_hasher": password_hasher.stats(),
+        "revocations": revocations.stats(),
         "storage": {
             "type": "R2",
             "bucket": settings.CLOUDFLARE_R2_BUCKET_NAME
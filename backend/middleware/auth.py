@@ -1,12 +1,20 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
-from backend.database import db
+import logging
 from backend.utils import decode_token
 from backend.config import settings
+from backend.services.principals import principals
+from backend.services.revocation import revocations
+
+logger = logging.getLogger("auth")
 
 security = HTTPBearer()
 
+# Environment-based admins, parsed once at startup
+ADMIN_EMAILS = frozenset(e.strip().lower() for e in (settings.ADMIN_EMAILS or "").split(",") if e.strip())
+ADMIN_USER_IDS = frozenset(int(x) for x in (settings.ADMIN_USER_IDS or "").split(",") if x.strip().isdigit())
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
@@ -22,17 +30,31 @@ async def get_current_user(
         )
     
     email: str = payload.get("sub")
-    if email is None:
+    if email is None or payload.get("type", "access") != "access":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await db.fetch_one(
-        "SELECT * FROM users WHERE email = ? AND is_active = 1",
-        [email]
-    )
+    # Logged out, rotated away, or issued before the user was deactivated
+    if revocations.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Short-lived access tokens carry id and role; older tokens fall back to the principal cache.
+    # Mutable profile fields (fullname, ...) are not taken from the token: read them via principals.get
+    if payload.get("uid") is not None and payload.get("role"):
+        return {
+            "id": payload["uid"],
+            "email": email,
+            "role": payload["role"],
+            "is_active": 1,
+        }
+    user = await principals.get(email, payload.get("uid"))
     
     if user is None:
         raise HTTPException(
@@ -43,6 +65,13 @@ async def get_current_user(
     
     return user
 
+async def current_fullname(current_user: dict) -> Optional[str]:
+    """Display name of the authenticated user, read fresh (token claims do not carry it)"""
+    if current_user.get("fullname") is not None:
+        return current_user["fullname"]
+    user = await principals.get(current_user["email"], current_user["id"])
+    return user["fullname"] if user else None
+
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
 ) -> Optional[dict]:
@@ -57,14 +86,12 @@ async def get_current_user_optional(
 
 async def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
     # First check if user has admin role
-    print(f"DEBUG: require_admin user={current_user.get('email')} role={current_user.get('role')}")
+    logger.debug(f"require_admin user={current_user.get('email')} role={current_user.get('role')}")
     if current_user.get("role") == "admin":
         return current_user
     
     # Then check environment-based admin configuration
-    emails = [e.strip().lower() for e in (settings.ADMIN_EMAILS or "").split(",") if e.strip()]
-    ids = [int(x) for x in (settings.ADMIN_USER_IDS or "").split(",") if x.strip().isdigit()]
-    if (current_user.get("email", "").lower() in emails) or (current_user.get("id") in ids):
+    if (current_user.get("email", "").lower() in ADMIN_EMAILS) or (current_user.get("id") in ADMIN_USER_IDS):
         return current_user
     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin required")
 
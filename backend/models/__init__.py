@@ -1,11 +1,11 @@
 from .user import (
-    UserCreate, UserLogin, UserResponse, Token, 
+    UserCreate, UserLogin, UserResponse, Token, RefreshRequest,
     PasswordRecover, PasswordReset, UserUpdate
 )
 from .post import PostCreate, PostUpdate, PostResponse, PostList
 from .exam import (
     ExamCreate, ExamUpdate, ExamResponse, ExamList,
-    ExamSubmission, ExamResultResponse, AnswerSubmission
+    ExamSubmission, ExamResultResponse, AnswerSubmission, BatchAnalysisRequest
 )
 from .question import (
     QuestionCreate, QuestionResponse, QuestionOption,
@@ -13,11 +13,11 @@ from .question import (
 )
 
 __all__ = [
-    "UserCreate", "UserLogin", "UserResponse", "Token",
+    "UserCreate", "UserLogin", "UserResponse", "Token", "RefreshRequest",
     "PasswordRecover", "PasswordReset", "UserUpdate",
     "PostCreate", "PostUpdate", "PostResponse", "PostList",
     "ExamCreate", "ExamUpdate", "ExamResponse", "ExamList",
-    "ExamSubmission", "ExamResultResponse", "AnswerSubmission",
+    "ExamSubmission", "ExamResultResponse", "AnswerSubmission", "BatchAnalysisRequest",
     "QuestionCreate", "QuestionResponse", "QuestionOption",
     "AnswerKeyResponse", "AnswerKeyItem",
 ]
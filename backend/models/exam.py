@@ -30,15 +30,17 @@ class ExamResponse(ExamBase):
     created_at: datetime
     updated_at: datetime
     questions: Optional[list] = None
+    snippet: Optional[str] = None  # highlighted excerpt (escaped HTML with <mark>), only for search results
 
     class Config:
         from_attributes = True
 
 class ExamList(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when the caller skipped counting (include_total=false)
     page: int
     page_size: int
     data: list[ExamResponse]
+    next_cursor: Optional[str] = None
 
 # Exam Submission Models
 class AnswerSubmission(BaseModel):
@@ -61,3 +63,7 @@ class ExamResultResponse(BaseModel):
     time_spent_seconds: int
     submitted_at: datetime
     answers: list[dict]  # List of answer details with correctness
+
+class BatchAnalysisRequest(BaseModel):
+    exam_ids: Optional[list[int]] = None  # None = every exam with results
+    update_db: bool = True
@@ -34,13 +34,15 @@ class PostResponse(PostBase):
     user_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
+    snippet: Optional[str] = None  # highlighted excerpt (escaped HTML with <mark>), only for search results
     
     class Config:
         from_attributes = True
         populate_by_name = True
 
 class PostList(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when the caller skipped counting (include_total=false)
     page: int
     page_size: int
-    data: list[PostResponse]
\ No newline at end of file
+    data: list[PostResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
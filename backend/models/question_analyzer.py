@@ -1,24 +1,23 @@
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, AsyncIterator
 from dataclasses import dataclass, asdict
 from enum import Enum
 from datetime import datetime
-import mysql.connector
-from mysql.connector import Error
+import asyncio
 import json
 import logging
 
-# Cấu hình logging để ghi vào file thay vì console
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('question_analyzer.log'),
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
+# Ghi log của module này vào file thay vì console, không đụng tới cấu hình
+# logging của ứng dụng (module được import từ luồng nộp bài)
+if not logger.handlers:
+    _file_handler = logging.FileHandler('question_analyzer.log', delay=True)
+    _file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(_file_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
 class QuestionType(str, Enum):
     MULTIPLE_CHOICE = "multiple_choice"
     TRUE_FALSE = "true_false"
@@ -328,191 +327,335 @@ class QuestionAnalyzer:
         )
 
 
+    def analyze_exam_arrays(
+        self,
+        questions: List[Dict],
+        results: Dict[str, np.ndarray],
+        answers: Dict[str, np.ndarray]
+    ) -> List[QuestionMetrics]:
+        """Phân tích toàn bộ câu hỏi của đề thi bằng các phép toán numpy
+        
+        Kết quả giống hệt analyze_question cho từng câu hỏi (kể cả cách làm
+        tròn), nhưng chỉ sắp xếp kết quả thi một lần và đếm đúng/sai cho mọi
+        câu hỏi cùng lúc thay vì quét lại danh sách câu trả lời.
+        
+        Args:
+            questions: Câu hỏi theo thứ tự đề ({'id', 'question_type'})
+            results: Cột exam_results: student_id, total_score (theo thứ tự id)
+            answers: Cột câu trả lời: student_id, question_id, is_correct
+        """
+        if not questions:
+            return []
+        question_ids = np.array([q['id'] for q in questions], dtype=np.int64)
+        n_questions = len(question_ids)
+        
+        # Cột của từng câu trả lời trong ma trận câu trả lời × câu hỏi
+        order = np.argsort(question_ids, kind='stable')
+        sorted_ids = question_ids[order]
+        ans_qid = answers['question_id']
+        pos = np.minimum(np.searchsorted(sorted_ids, ans_qid), n_questions - 1)
+        known = sorted_ids[pos] == ans_qid
+        col = order[pos[known]]
+        correct = answers['is_correct'][known].astype(bool)
+        ans_student = answers['student_id'][known]
+        
+        total = np.bincount(col, minlength=n_questions)
+        correct_count = np.bincount(col[correct], minlength=n_questions)
+        
+        # Nhóm cao / thấp: sắp xếp ổn định giảm dần như sorted(..., reverse=True)
+        n_students = len(results['student_id'])
+        if n_students < 10:
+            D = np.zeros(n_questions)
+        else:
+            top_n = max(1, int(n_students * self.TOP_PERCENT))
+            bottom_n = max(1, int(n_students * self.BOTTOM_PERCENT))
+            ranking = _stable_descending(results['total_score'])
+            top_students = np.unique(results['student_id'][ranking[:top_n]])
+            bottom_students = np.unique(results['student_id'][ranking[-bottom_n:]])
+            in_top = correct & np.isin(ans_student, top_students)
+            in_bottom = correct & np.isin(ans_student, bottom_students)
+            top_correct = np.bincount(col[in_top], minlength=n_questions)
+            bottom_correct = np.bincount(col[in_bottom], minlength=n_questions)
+            D = np.array([round(d, 4) for d in (top_correct / top_n - bottom_correct / bottom_n).tolist()])
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = np.where(total > 0, correct_count / np.maximum(total, 1), 0.0)
+        
+        is_tf = np.array([q['question_type'] == QuestionType.TRUE_FALSE.value for q in questions])
+        difficulty = np.where(is_tf, 1 - p, p)
+        difficulty_level = np.select(
+            [p >= 0.85, p >= 0.51],
+            [DifficultyLevel.EASY.value, DifficultyLevel.MODERATE.value],
+            DifficultyLevel.HARD.value
+        )
+        discrimination_level = np.select(
+            [D >= 0.30, D >= 0.10],
+            [DiscriminationLevel.GOOD.value, DiscriminationLevel.FAIR.value],
+            DiscriminationLevel.POOR.value
+        )
+        quality = (
+            np.select(
+                [(p >= 0.30) & (p <= 0.85) & (p >= 0.45) & (p <= 0.70),
+                 (p >= 0.30) & (p <= 0.85),
+                 ((p >= 0.20) & (p < 0.30)) | ((p > 0.85) & (p <= 0.90))],
+                [40, 30, 20], 10
+            )
+            + np.select([D >= 0.40, D >= 0.30, D >= 0.20, D >= 0.10], [40, 35, 25, 15], 5)
+            + np.select([total >= 100, total >= 50, total >= 30, total >= 10], [20, 15, 10, 5], 0)
+        ).astype(np.float64)
+        qualified = (total >= self.MIN_ATTEMPTS) & (D >= self.MIN_DISCRIMINATION)
+        
+        now = datetime.now()
+        metrics_list = []
+        for i, question in enumerate(questions):
+            if total[i] == 0:
+                continue
+            p_i = float(p[i])
+            D_i = float(D[i])
+            total_i = int(total[i])
+            metrics_list.append(QuestionMetrics(
+                question_id=question['id'],
+                question_type=question['question_type'],
+                total_attempts=total_i,
+                correct_attempts=int(correct_count[i]),
+                p_value=round(p_i, 4),
+                difficulty_score=round(float(difficulty[i]), 4),
+                discrimination_index=D_i,
+                difficulty_level=str(difficulty_level[i]),
+                discrimination_level=str(discrimination_level[i]),
+                quality_score=round(float(quality[i]), 2),
+                is_qualified=bool(qualified[i]),
+                last_analyzed=now,
+                recommendations=self.generate_recommendations(p_i, D_i, total_i)
+            ))
+        
+        logger.info(f"Analyzed {len(metrics_list)} questions over {n_students} results (vectorized)")
+        return metrics_list
+
+
+def _stable_descending(values: np.ndarray) -> np.ndarray:
+    """Chỉ số sắp xếp giảm dần, giữ thứ tự ban đầu khi bằng nhau (như sorted(reverse=True))"""
+    # Sort ascending on the reversed array, then map back and reverse:
+    # equal keys end up in their original order, exactly like Python's sort
+    n = len(values)
+    ascending = np.argsort(values[::-1], kind='stable')
+    return (n - 1 - ascending)[::-1]
+
+
 # ==================== DATABASE MANAGER ====================
 
+RESULT_COLUMNS = {"result_id": np.int64, "student_id": np.int64, "total_score": np.float64}
+ANSWER_COLUMNS = {"result_id": np.int64, "student_id": np.int64, "question_id": np.int64, "is_correct": np.bool_}
+
+
+def _concat_columns(batches: List[Dict[str, np.ndarray]], columns: Dict[str, type]) -> Dict[str, np.ndarray]:
+    if not batches:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+    return {name: np.concatenate([b[name] for b in batches]) for name in columns}
+
+
 class QuestionDatabase:
-    """Quản lý database cho câu hỏi"""
-    
-    def __init__(self, host: str, user: str, password: str, database: str):
-        self.config = {
-            'host': host,
-            'user': user,
-            'password': password,
-            'database': database,
-            'autocommit': False
-        }
-        self.connection = None
+    """Truy cập dữ liệu phân tích qua backend.database.db (SQLite hoặc D1)
+
+    Kết quả thi và câu trả lời được đọc theo lô dạng cột (mảng numpy), nối
+    student_answers với exam_results qua exam_result_id.
+    """
     
+    def __init__(self, database=None, results_per_batch: int = 500):
+        if database is None:
+            # Import muộn: tiến trình phân tích theo lô chỉ dùng kết nối chỉ-đọc riêng
+            from backend.database import db as database
+        self.db = database
+        self.results_per_batch = max(1, results_per_batch)
     
-    def connect(self):
-        """Kết nối database"""
-        try:
-            self.connection = mysql.connector.connect(**self.config)
-            logger.info("Database connected successfully")
-            return True
-        except Error as e:
-            logger.error(f"Database connection failed: {e}")
-            raise
     
+    async def get_question(self, question_id: int) -> Optional[Dict]:
+        """Lấy thông tin câu hỏi"""
+        return await self.db.fetch_one(
+            """
+            SELECT question_id AS id, question_id, exam_id, question_text AS content,
+                   question_text, question_type, points
+            FROM questions WHERE question_id = ?
+            """,
+            [question_id]
+        )
     
-    def close(self):
-        """Đóng kết nối"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            logger.info("Database connection closed")
     
+    async def get_exam_questions(self, exam_id: int) -> List[Dict]:
+        """Lấy danh sách câu hỏi trong đề thi"""
+        return await self.db.fetch_all(
+            """
+            SELECT q.question_id AS id, q.question_id, q.question_text AS content,
+                   q.question_type, q.points, eq.order_index
+            FROM exam_questions eq
+            JOIN questions q ON q.question_id = eq.question_id
+            WHERE eq.exam_id = ?
+            ORDER BY eq.order_index
+            """,
+            [exam_id]
+        )
     
-    def get_question(self, question_id: str) -> Optional[Dict]:
-        """Lấy thông tin câu hỏi"""
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM questions WHERE id = %s",
-                (question_id,)
+    
+    async def iter_exam_results(self, exam_id: int) -> AsyncIterator[Dict[str, np.ndarray]]:
+        """Kết quả thi theo lô dạng cột: result_id, student_id, total_score"""
+        last_id = 0
+        while True:
+            rows = await self.db.fetch_all(
+                """
+                SELECT id, student_id, score FROM exam_results
+                WHERE exam_id = ? AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                [exam_id, last_id, self.results_per_batch]
             )
-            result = cursor.fetchone()
-            cursor.close()
-            return result
-        except Error as e:
-            logger.error(f"Error getting question {question_id}: {e}")
-            return None
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            n = len(rows)
+            yield {
+                "result_id": np.fromiter((r["id"] for r in rows), dtype=np.int64, count=n),
+                "student_id": np.fromiter((r["student_id"] for r in rows), dtype=np.int64, count=n),
+                "total_score": np.fromiter((r["score"] or 0.0 for r in rows), dtype=np.float64, count=n),
+            }
+            if n < self.results_per_batch:
+                return
     
     
-    def get_answers_by_question(self, question_id: str, exam_id: str = None) -> List[Dict]:
-        """Lấy tất cả câu trả lời cho một câu hỏi"""
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            
-            if exam_id:
-                query = """
-                    SELECT * FROM student_answers
-                    WHERE question_id = %s AND exam_id = %s
-                """
-                cursor.execute(query, (question_id, exam_id))
-            else:
-                query = "SELECT * FROM student_answers WHERE question_id = %s"
-                cursor.execute(query, (question_id,))
-            
-            results = cursor.fetchall()
-            cursor.close()
-            return results
-        except Error as e:
-            logger.error(f"Error getting answers for question {question_id}: {e}")
-            return []
+    async def iter_answer_batches(
+        self, exam_id: int, question_id: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, np.ndarray]]:
+        """Câu trả lời theo lô dạng cột, mỗi lô ứng với một lô exam_results
+        
+        Cột: result_id, student_id, question_id, is_correct.
+        """
+        async for results in self.iter_exam_results(exam_id):
+            result_ids = results["result_id"].tolist()
+            placeholders = ", ".join("?" for _ in result_ids)
+            sql = f"""
+                SELECT sa.exam_result_id, er.student_id, sa.question_id, sa.is_correct
+                FROM student_answers sa
+                JOIN exam_results er ON er.id = sa.exam_result_id
+                WHERE sa.exam_result_id IN ({placeholders})
+            """
+            params = list(result_ids)
+            if question_id is not None:
+                sql += " AND sa.question_id = ?"
+                params.append(question_id)
+            rows = await self.db.fetch_all(sql + " ORDER BY sa.id", params)
+            n = len(rows)
+            if n == 0:
+                continue
+            yield {
+                "result_id": np.fromiter((r["exam_result_id"] for r in rows), dtype=np.int64, count=n),
+                "student_id": np.fromiter((r["student_id"] for r in rows), dtype=np.int64, count=n),
+                "question_id": np.fromiter((r["question_id"] for r in rows), dtype=np.int64, count=n),
+                "is_correct": np.fromiter((bool(r["is_correct"]) for r in rows), dtype=np.bool_, count=n),
+            }
+    
     
+    async def load_exam_arrays(self, exam_id: int) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Toàn bộ kết quả thi và câu trả lời của đề thi, ghép các lô thành cột"""
+        result_batches = [b async for b in self.iter_exam_results(exam_id)]
+        answer_batches = [b async for b in self.iter_answer_batches(exam_id)]
+        return _concat_columns(result_batches, RESULT_COLUMNS), _concat_columns(answer_batches, ANSWER_COLUMNS)
     
-    def get_exam_results(self, exam_id: str) -> List[Dict]:
+    
+    async def get_exam_results(self, exam_id: int) -> List[Dict]:
         """Lấy kết quả thi của tất cả học sinh"""
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM exam_results WHERE exam_id = %s",
-                (exam_id,)
+        results = []
+        async for batch in self.iter_exam_results(exam_id):
+            results.extend(
+                {"id": r, "student_id": s, "total_score": t}
+                for r, s, t in zip(batch["result_id"].tolist(), batch["student_id"].tolist(), batch["total_score"].tolist())
             )
-            results = cursor.fetchall()
-            cursor.close()
-            return results
-        except Error as e:
-            logger.error(f"Error getting exam results for {exam_id}: {e}")
-            return []
+        return results
     
     
-    def update_question_metrics(self, metrics: QuestionMetrics) -> bool:
-        """Cập nhật metrics cho câu hỏi"""
-        try:
-            cursor = self.connection.cursor()
-            
-            query = """
-                UPDATE questions SET
-                    total_attempts = %s,
-                    correct_attempts = %s,
-                    p_value = %s,
-                    difficulty_score = %s,
-                    difficulty_level = %s,
-                    discrimination_index = %s,
-                    discrimination_level = %s,
-                    quality_score = %s,
-                    is_qualified = %s,
-                    recommendations = %s,
-                    last_analyzed = %s
-                WHERE id = %s
-            """
-            
-            cursor.execute(query, (
-                metrics.total_attempts,
-                metrics.correct_attempts,
-                metrics.p_value,
-                metrics.difficulty_score,
-                metrics.difficulty_level,
-                metrics.discrimination_index,
-                metrics.discrimination_level,
-                metrics.quality_score,
-                metrics.is_qualified,
-                json.dumps(metrics.recommendations, ensure_ascii=False),
-                metrics.last_analyzed,
-                metrics.question_id
-            ))
-            
-            self.connection.commit()
-            cursor.close()
-            
-            logger.info(f"Updated metrics for question {metrics.question_id}")
-            return True
-            
-        except Error as e:
-            logger.error(f"Error updating question {metrics.question_id}: {e}")
-            self.connection.rollback()
-            return False
+    async def get_all_answers_by_exam(self, exam_id: int, question_id: Optional[int] = None) -> List[Dict]:
+        """Lấy tất cả câu trả lời trong đề thi (hoặc của một câu hỏi)"""
+        answers = []
+        async for batch in self.iter_answer_batches(exam_id, question_id):
+            answers.extend(
+                {"exam_result_id": r, "student_id": s, "question_id": q, "is_correct": c}
+                for r, s, q, c in zip(
+                    batch["result_id"].tolist(), batch["student_id"].tolist(),
+                    batch["question_id"].tolist(), batch["is_correct"].tolist()
+                )
+            )
+        return answers
     
     
-    def get_exam_questions(self, exam_id: str) -> List[Dict]:
-        """Lấy danh sách câu hỏi trong đề thi"""
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT q.* FROM questions q
-                INNER JOIN exam_questions eq ON q.id = eq.question_id
-                WHERE eq.exam_id = %s
-                ORDER BY eq.question_order
-            """, (exam_id,))
-            results = cursor.fetchall()
-            cursor.close()
-            return results
-        except Error as e:
-            logger.error(f"Error getting questions for exam {exam_id}: {e}")
-            return []
+    async def get_answers_by_question(self, question_id: int, exam_id: int) -> List[Dict]:
+        """Lấy tất cả câu trả lời cho một câu hỏi"""
+        return await self.get_all_answers_by_exam(exam_id, question_id)
     
     
-    def get_all_answers_by_exam(self, exam_id: str) -> List[Dict]:
-        """Lấy tất cả câu trả lời trong đề thi"""
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT * FROM student_answers WHERE exam_id = %s
-            """, (exam_id,))
-            results = cursor.fetchall()
-            cursor.close()
-            return results
-        except Error as e:
-            logger.error(f"Error getting all answers for exam {exam_id}: {e}")
-            return []
+    async def batch_update_questions(self, exam_id: int, metrics_list: List[QuestionMetrics]) -> int:
+        """Ghi metrics vào question_metrics bằng một lệnh upsert theo lô"""
+        if not metrics_list:
+            return 0
+        rows = [
+            [
+                m.question_id, exam_id, m.question_type, m.total_attempts, m.correct_attempts,
+                m.p_value, m.difficulty_score, m.difficulty_level, m.discrimination_index,
+                m.discrimination_level, m.quality_score, 1 if m.is_qualified else 0,
+                json.dumps(m.recommendations, ensure_ascii=False), m.last_analyzed.isoformat(sep=" "),
+            ]
+            for m in metrics_list
+        ]
+        await self.db.executemany(
+            """
+            INSERT INTO question_metrics (
+                question_id, exam_id, question_type, total_attempts, correct_attempts,
+                p_value, difficulty_score, difficulty_level, discrimination_index,
+                discrimination_level, quality_score, is_qualified, recommendations, last_analyzed
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (question_id, exam_id) DO UPDATE SET
+                question_type = excluded.question_type,
+                total_attempts = excluded.total_attempts,
+                correct_attempts = excluded.correct_attempts,
+                p_value = excluded.p_value,
+                difficulty_score = excluded.difficulty_score,
+                difficulty_level = excluded.difficulty_level,
+                discrimination_index = excluded.discrimination_index,
+                discrimination_level = excluded.discrimination_level,
+                quality_score = excluded.quality_score,
+                is_qualified = excluded.is_qualified,
+                recommendations = excluded.recommendations,
+                last_analyzed = excluded.last_analyzed
+            """,
+            rows
+        )
+        logger.info(f"Batch update completed: {len(rows)} questions upserted for exam {exam_id}")
+        return len(rows)
     
     
-    def batch_update_questions(self, metrics_list: List[QuestionMetrics]) -> int:
-        """Cập nhật hàng loạt câu hỏi"""
-        success_count = 0
-        
-        for metrics in metrics_list:
-            if self.update_question_metrics(metrics):
-                success_count += 1
-        
-        logger.info(f"Batch update completed: {success_count}/{len(metrics_list)} questions updated")
-        return success_count
+    async def update_question_metrics(self, exam_id: int, metrics: QuestionMetrics) -> bool:
+        """Cập nhật metrics cho câu hỏi"""
+        try:
+            return await self.batch_update_questions(exam_id, [metrics]) == 1
+        except Exception as e:
+            logger.error(f"Error updating question {metrics.question_id}: {e}")
+            return False
     
     
-    def get_question_with_stats(self, question_id: str) -> Optional[Dict]:
-        """Lấy câu hỏi với đầy đủ thống kê"""
-        return self.get_question(question_id)
+    async def get_question_with_stats(self, question_id: int) -> Optional[Dict]:
+        """Lấy câu hỏi với thống kê của lần phân tích gần nhất"""
+        return await self.db.fetch_one(
+            """
+            SELECT q.question_id AS id, q.question_text AS content, q.question_type,
+                   m.exam_id, m.total_attempts, m.correct_attempts, m.p_value,
+                   m.difficulty_level, m.discrimination_index, m.discrimination_level,
+                   m.quality_score, m.is_qualified, m.recommendations, m.last_analyzed
+            FROM questions q
+            LEFT JOIN question_metrics m ON m.question_id = q.question_id
+            WHERE q.question_id = ?
+            ORDER BY m.last_analyzed DESC
+            LIMIT 1
+            """,
+            [question_id]
+        )
 
 
 # ==================== QUESTION SERVICE ====================
@@ -526,10 +669,10 @@ class QuestionAnalysisService:
         logger.info("QuestionAnalysisService initialized")
     
     
-    def analyze_single_question(
+    async def analyze_single_question(
         self,
-        question_id: str,
-        exam_id: str,
+        question_id: int,
+        exam_id: int,
         update_db: bool = True
     ) -> Optional[QuestionMetrics]:
         """
@@ -544,13 +687,15 @@ class QuestionAnalysisService:
             QuestionMetrics hoặc None nếu có lỗi
         """
         try:
-            question = self.db.get_question(question_id)
+            question = await self.db.get_question(question_id)
             if not question:
                 logger.error(f"Question {question_id} not found")
                 return None
             
-            student_answers = self.db.get_answers_by_question(question_id, exam_id)
-            exam_results = self.db.get_exam_results(exam_id)
+            student_answers, exam_results = await asyncio.gather(
+                self.db.get_answers_by_question(question_id, exam_id),
+                self.db.get_exam_results(exam_id),
+            )
             
             if not student_answers:
                 logger.warning(f"No answers found for question {question_id}")
@@ -568,7 +713,7 @@ class QuestionAnalysisService:
             )
             
             if update_db:
-                self.db.update_question_metrics(metrics)
+                await self.db.update_question_metrics(exam_id, metrics)
             
             return metrics
             
@@ -577,9 +722,9 @@ class QuestionAnalysisService:
             return None
     
     
-    def analyze_exam_questions(
+    async def analyze_exam_questions(
         self,
-        exam_id: str,
+        exam_id: int,
         update_db: bool = True
     ) -> List[QuestionMetrics]:
         """
@@ -595,49 +740,24 @@ class QuestionAnalysisService:
         try:
             logger.info(f"Starting analysis for exam {exam_id}")
             
-            questions = self.db.get_exam_questions(exam_id)
+            questions = await self.db.get_exam_questions(exam_id)
             if not questions:
                 logger.error(f"No questions found for exam {exam_id}")
                 return []
             
-            exam_results = self.db.get_exam_results(exam_id)
-            if not exam_results:
+            results, answers = await self.db.load_exam_arrays(exam_id)
+            if len(results['result_id']) == 0:
                 logger.error(f"No exam results found for exam {exam_id}")
                 return []
             
-            all_answers = self.db.get_all_answers_by_exam(exam_id)
-            if not all_answers:
+            if len(answers['question_id']) == 0:
                 logger.error(f"No answers found for exam {exam_id}")
                 return []
             
-            metrics_list = []
-            
-            for question in questions:
-                try:
-                    question_answers = [
-                        ans for ans in all_answers
-                        if ans['question_id'] == question['id']
-                    ]
-                    
-                    if not question_answers:
-                        logger.warning(f"No answers for question {question['id']}, skipping")
-                        continue
-                    
-                    metrics = self.analyzer.analyze_question(
-                        question_id=question['id'],
-                        question_type=question['question_type'],
-                        student_answers=question_answers,
-                        exam_results=exam_results
-                    )
-                    
-                    metrics_list.append(metrics)
-                    
-                except Exception as e:
-                    logger.error(f"Error analyzing question {question['id']}: {e}")
-                    continue
+            metrics_list = self.analyzer.analyze_exam_arrays(questions, results, answers)
             
             if update_db and metrics_list:
-                self.db.batch_update_questions(metrics_list)
+                await self.db.batch_update_questions(exam_id, metrics_list)
             
             logger.info(f"Completed analysis for exam {exam_id}: {len(metrics_list)} questions analyzed")
             
@@ -648,7 +768,7 @@ class QuestionAnalysisService:
             return []
     
     
-    def get_question_report(self, question_id: str) -> Optional[Dict]:
+    async def get_question_report(self, question_id: int) -> Optional[Dict]:
         """
         Lấy báo cáo chi tiết câu hỏi
         
@@ -659,7 +779,7 @@ class QuestionAnalysisService:
             Dict chứa thông tin báo cáo hoặc None
         """
         try:
-            question = self.db.get_question_with_stats(question_id)
+            question = await self.db.get_question_with_stats(question_id)
             if not question:
                 logger.error(f"Question {question_id} not found")
                 return None
@@ -676,14 +796,14 @@ class QuestionAnalysisService:
                 'content': question.get('content', ''),
                 'type': question.get('question_type', ''),
                 'metrics': {
-                    'total_attempts': question.get('total_attempts', 0),
-                    'correct_attempts': question.get('correct_attempts', 0),
-                    'p_value': question.get('p_value', 0),
-                    'difficulty_level': question.get('difficulty_level', ''),
-                    'discrimination_index': question.get('discrimination_index', 0),
-                    'discrimination_level': question.get('discrimination_level', ''),
-                    'quality_score': question.get('quality_score', 0),
-                    'is_qualified': question.get('is_qualified', False)
+                    'total_attempts': question.get('total_attempts') or 0,
+                    'correct_attempts': question.get('correct_attempts') or 0,
+                    'p_value': question.get('p_value') or 0,
+                    'difficulty_level': question.get('difficulty_level') or '',
+                    'discrimination_index': question.get('discrimination_index') or 0,
+                    'discrimination_level': question.get('discrimination_level') or '',
+                    'quality_score': question.get('quality_score') or 0,
+                    'is_qualified': bool(question.get('is_qualified'))
                 },
                 'recommendations': recommendations,
                 'last_analyzed': question.get('last_analyzed')
@@ -747,12 +867,62 @@ class QuestionAnalysisService:
         logger.info(f"Statistics calculated for {total} questions")
         
         return stats
+    
+    
+    def merge_statistics(self, summaries: List[Dict]) -> Dict:
+        """
+        Gộp nhiều kết quả get_statistics (mỗi đề thi một kết quả) thành một
+        
+        Số lượng được cộng dồn, tỉ lệ tính lại từ số lượng, các giá trị trung
+        bình lấy trung bình có trọng số theo số câu hỏi.
+        
+        Args:
+            summaries: Danh sách Dict do get_statistics trả về
+            
+        Returns:
+            Dict cùng cấu trúc với get_statistics
+        """
+        summaries = [s for s in summaries if s]
+        total = sum(s['total_questions'] for s in summaries)
+        if total == 0:
+            return {}
+        
+        def count(section: str, key: str) -> int:
+            return sum(s[section][key]['count'] for s in summaries)
+        
+        def weighted(key: str) -> float:
+            return sum(s['quality'][key] * s['total_questions'] for s in summaries) / total
+        
+        def distribution(section: str, keys: Tuple[str, ...]) -> Dict:
+            result = {}
+            for key in keys:
+                n = count(section, key)
+                result[key] = {'count': n, 'percentage': round(n/total*100, 2)}
+            return result
+        
+        qualified_count = sum(s['quality']['qualified_count'] for s in summaries)
+        
+        return {
+            'total_questions': total,
+            'difficulty_distribution': distribution('difficulty_distribution', ('easy', 'moderate', 'hard')),
+            'discrimination_distribution': distribution('discrimination_distribution', ('good', 'fair', 'poor')),
+            'quality': {
+                'qualified_count': qualified_count,
+                'qualified_percentage': round(qualified_count/total*100, 2),
+                'average_quality_score': round(weighted('average_quality_score'), 2),
+                'average_p_value': round(weighted('average_p_value'), 4),
+                'average_discrimination': round(weighted('average_discrimination'), 4)
+            }
+        }
 
 #  PUBLIC API 
-def analyze_question(
-    question_id: str,
-    exam_id: str,
-    db_config: Dict,
+def _service() -> QuestionAnalysisService:
+    return QuestionAnalysisService(QuestionDatabase(), QuestionAnalyzer())
+
+
+async def analyze_question(
+    question_id: int,
+    exam_id: int,
     update_db: bool = True
 ) -> Optional[QuestionMetrics]:
     """
@@ -761,35 +931,20 @@ def analyze_question(
     Args:
         question_id: ID câu hỏi
         exam_id: ID đề thi
-        db_config: Cấu hình database {'host', 'user', 'password', 'database'}
         update_db: Có cập nhật database không
         
     Returns:
         QuestionMetrics hoặc None
     """
-    db = None
     try:
-        db = QuestionDatabase(**db_config)
-        db.connect()
-        
-        analyzer = QuestionAnalyzer()
-        service = QuestionAnalysisService(db, analyzer)
-        
-        result = service.analyze_single_question(question_id, exam_id, update_db)
-        
-        return result
-        
+        return await _service().analyze_single_question(question_id, exam_id, update_db)
     except Exception as e:
         logger.error(f"Error in analyze_question: {e}")
         return None
-    finally:
-        if db:
-            db.close()
 
 
-def analyze_exam(
-    exam_id: str,
-    db_config: Dict,
+async def analyze_exam(
+    exam_id: int,
     update_db: bool = True
 ) -> List[QuestionMetrics]:
     """
@@ -797,106 +952,71 @@ def analyze_exam(
     
     Args:
         exam_id: ID đề thi
-        db_config: Cấu hình database
         update_db: Có cập nhật database không
         
     Returns:
         List[QuestionMetrics]
     """
-    db = None
     try:
-        db = QuestionDatabase(**db_config)
-        db.connect()
-        
-        analyzer = QuestionAnalyzer()
-        service = QuestionAnalysisService(db, analyzer)
-        
-        results = service.analyze_exam_questions(exam_id, update_db)
-        
-        return results
-        
+        return await _service().analyze_exam_questions(exam_id, update_db)
     except Exception as e:
         logger.error(f"Error in analyze_exam: {e}")
         return []
-    finally:
-        if db:
-            db.close()
 
 
-def get_question_statistics(
-    exam_id: str,
-    db_config: Dict
-) -> Dict:
+async def get_question_statistics(exam_id: int) -> Dict:
     """
     API công khai để lấy thống kê câu hỏi
     
     Args:
         exam_id: ID đề thi
-        db_config: Cấu hình database
         
     Returns:
         Dict chứa thống kê
     """
-    db = None
     try:
-        db = QuestionDatabase(**db_config)
-        db.connect()
-        
-        analyzer = QuestionAnalyzer()
-        service = QuestionAnalysisService(db, analyzer)
-        
-        metrics_list = service.analyze_exam_questions(exam_id, update_db=False)
-        stats = service.get_statistics(metrics_list)
-        
-        return stats
-        
+        service = _service()
+        metrics_list = await service.analyze_exam_questions(exam_id, update_db=False)
+        return service.get_statistics(metrics_list)
     except Exception as e:
         logger.error(f"Error in get_question_statistics: {e}")
         return {}
-    finally:
-        if db:
-            db.close()
 
 
 # ==================== MAIN - CHỈ ĐỂ TEST ====================
 
 if __name__ == "__main__":
     """
-    Phần này chỉ dùng để test, không chạy trong production
+    Phần này chỉ dùng để test, không chạy trong production:
+        python -m backend.models.question_analyzer <exam_id>
     """
+    import sys
     
-    # Cấu hình database
-    DB_CONFIG = {
-        'host': 'localhost',
-        'user': 'exam_user',
-        'password': 'exam_password',
-        'database': 'exam_system'
-    }
+    exam_id = int(sys.argv[1]) if len(sys.argv) > 1 else 1
     
-    # Test phân tích đề thi
-    logger.info("Starting exam analysis test")
+    from backend.database import db as app_db
+    
+    async def _main():
+        await app_db.connect()
+        try:
+            # Phân tích toàn bộ đề thi
+            metrics_list = await analyze_exam(exam_id=exam_id, update_db=True)
+            
+            if metrics_list:
+                logger.info(f"Analysis completed: {len(metrics_list)} questions processed")
+            else:
+                logger.warning("No questions analyzed")
+            
+            # Lấy thống kê
+            stats = await get_question_statistics(exam_id=exam_id)
+            
+            if stats:
+                logger.info(f"Statistics: {json.dumps(stats, indent=2)}")
+        finally:
+            await app_db.close()
     
+    logger.info("Starting exam analysis test")
     try:
-        # Phân tích toàn bộ đề thi
-        metrics_list = analyze_exam(
-            exam_id="E001",
-            db_config=DB_CONFIG,
-            update_db=True
-        )
-        
-        if metrics_list:
-            logger.info(f"Analysis completed: {len(metrics_list)} questions processed")
-        else:
-            logger.warning("No questions analyzed")
-        
-        # Lấy thống kê
-        stats = get_question_statistics(
-            exam_id="E001",
-            db_config=DB_CONFIG
-        )
-        
-        if stats:
-            logger.info(f"Statistics: {json.dumps(stats, indent=2)}")
-        
+        asyncio.run(_main())
     except Exception as e:
-        logger.error(f"Test failed: {e}")
\ No newline at end of file
+        logger.error(f"Test failed: {e}")
@@ -3,6 +3,9 @@ from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from backend.database import db
 from backend.middleware.auth import require_admin, get_current_user
+from backend.services.principals import principals
+from backend.services.password_hasher import password_hasher
+from backend.services.revocation import revocations
 
 router = APIRouter(prefix="/api/admin/teachers", tags=["admin-teachers"])
 
@@ -43,8 +46,7 @@ async def create_teacher(payload: TeacherCreate, admin: dict = Depends(require_a
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create user with teacher role
-    from backend.utils import get_password_hash
-    password_hash = get_password_hash(payload.password)
+    password_hash = await password_hasher.hash(payload.password)
     
     result = await db.execute(
         """INSERT INTO users (fullname, email, phone, password_hash, role, is_active) 
@@ -108,6 +110,9 @@ async def update_teacher(teacher_id: int, payload: TeacherUpdate, admin: dict =
         f"UPDATE users SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
         params
     )
+    principals.invalidate(teacher_id)
+    if payload.is_active is False:
+        await revocations.revoke_user(teacher_id)
     
     # Return updated teacher
     teacher = await db.fetch_one(
@@ -120,26 +125,29 @@ async def update_teacher(teacher_id: int, payload: TeacherUpdate, admin: dict =
 @router.delete("/{teacher_id}")
 async def delete_teacher(teacher_id: int, admin: dict = Depends(require_admin)):
     """Delete teacher (soft delete by setting is_active = 0)"""
-    result = await db.execute(
+    changes = await db.update(
         "UPDATE users SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND role = 'teacher'",
         [teacher_id]
     )
     
-    if result.rowcount == 0:
+    if changes == 0:
         raise HTTPException(status_code=404, detail="Teacher not found")
+    principals.invalidate(teacher_id)
+    await revocations.revoke_user(teacher_id)
     
     return {"message": "Teacher deactivated successfully"}
 
 @router.post("/{teacher_id}/activate")
 async def activate_teacher(teacher_id: int, admin: dict = Depends(require_admin)):
     """Activate a teacher account"""
-    result = await db.execute(
+    changes = await db.update(
         "UPDATE users SET is_active = 1, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND role = 'teacher'",
         [teacher_id]
     )
     
-    if result.rowcount == 0:
+    if changes == 0:
         raise HTTPException(status_code=404, detail="Teacher not found")
+    principals.invalidate(teacher_id)
     
     return {"message": "Teacher activated successfully"}
 
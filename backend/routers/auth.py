@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
+from fastapi.security import HTTPAuthorizationCredentials
+from typing import Optional
 import logging
 import time
-from backend.models import UserCreate, UserLogin, UserResponse, Token
+from backend.models import UserCreate, UserLogin, UserResponse, Token, RefreshRequest
 from backend.database import db
-from backend.utils import get_password_hash, verify_password, create_access_token
-from backend.middleware.auth import get_current_user
+from backend.utils import create_token_pair, decode_token
+from backend.services.password_hasher import password_hasher, HasherOverloaded
+from backend.services.revocation import revocations
+from backend.middleware.auth import get_current_user, security
+from backend.config import settings
 
 router = APIRouter()
 logger = logging.getLogger("auth")
@@ -23,7 +28,10 @@ async def register(user: UserCreate):
         )
     
     try:
-        password_hash = get_password_hash(user.password)
+        password_hash = await password_hasher.hash(user.password)
+    except HasherOverloaded:
+        logger.warning(f"register_fail email={user.email} reason=overloaded")
+        raise
     except Exception as e:
         logger.error(f"register_fail email={user.email} reason=unknown_error error={str(e)}")
         raise HTTPException(
@@ -69,7 +77,7 @@ async def login(credentials: UserLogin):
     t0 = time.perf_counter()
     logger.info(f"login_attempt email={credentials.email}")
     user = await db.fetch_one(
-        "SELECT id, email, password_hash, role, is_active FROM users WHERE email = ?",
+        "SELECT id, fullname, email, password_hash, role, is_active FROM users WHERE email = ?",
         [credentials.email]
     )
     if not user or not user.get("is_active"):
@@ -79,17 +87,59 @@ async def login(credentials: UserLogin):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email hoặc mật khẩu không đúng. Vui lòng kiểm tra lại."
         )
-    if not verify_password(credentials.password, user["password_hash"]):
+    try:
+        valid, new_hash = await password_hasher.verify_login(credentials.password, user["password_hash"])
+    except HasherOverloaded:
+        logger.warning(f"login_fail email={credentials.email} reason=overloaded")
+        raise
+    if not valid:
         latency_ms = int((time.perf_counter() - t0) * 1000)
         logger.warning(f"login_fail email={credentials.email} reason=wrong_password latency_ms={latency_ms}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email hoặc mật khẩu không đúng. Vui lòng kiểm tra lại."
         )
-    token = create_access_token({"sub": user["email"], "uid": user["id"]})
+    if new_hash:
+        # Stored cost differs from BCRYPT_ROUNDS: upgrade transparently (unless the password changed meanwhile)
+        await db.update(
+            "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+            [new_hash, user["id"], user["password_hash"]]
+        )
+        logger.info(f"login_rehash user_id={user['id']} rounds={settings.BCRYPT_ROUNDS}")
+    tokens = create_token_pair(user)
     latency_ms = int((time.perf_counter() - t0) * 1000)
     logger.info(f"login_success email={credentials.email} user_id={user['id']} latency_ms={latency_ms}")
-    return {"access_token": token, "token_type": "bearer"}
+    return tokens
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: RefreshRequest):
+    """Exchange a refresh token for a new token pair; the old refresh token is revoked (rotation)"""
+    payload = decode_token(body.refresh_token)
+    if payload is None or payload.get("type") != "refresh" or not payload.get("uid"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    if revocations.is_revoked(payload):
+        # A rotated-away refresh token came back: it leaked, so end every session of the user
+        await revocations.revoke_user(payload["uid"])
+        logger.warning(f"refresh_reuse user_id={payload['uid']}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked"
+        )
+    user = await db.fetch_one(
+        "SELECT id, fullname, email, role, is_active FROM users WHERE id = ? AND email = ?",
+        [payload["uid"], payload.get("sub")]
+    )
+    if not user or not user.get("is_active"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    await revocations.revoke(payload)
+    logger.info(f"refresh_success user_id={user['id']}")
+    return create_token_pair(user)
 
 from pydantic import BaseModel, EmailStr
 
@@ -100,40 +150,53 @@ from backend.utils.email import send_password_reset_email
 import uuid
 import datetime
 
-@router.post("/recover")
-async def recover(payload: PasswordRecoveryRequest):
-    # Check if user exists
-    user = await db.fetch_one("SELECT id, email FROM users WHERE email = ?", [payload.email])
-    if not user:
-        # For security, we don't want to reveal if email exists or not
-        # So we just simulate a success response
-        # Add a small delay to mimic processing time
-        time.sleep(0.5)
-        return {"message": "Nếu email tồn tại, liên kết đặt lại mật khẩu sẽ được gửi."}
+async def start_password_reset(email: str):
+    """Create a reset token and queue the email (runs after the /recover response is sent)"""
+    try:
+        # Check if user exists
+        user = await db.fetch_one("SELECT id, email FROM users WHERE email = ?", [email])
+        if not user:
+            return
         
-    # Generate reset token
-    token = str(uuid.uuid4())
-    expires_at = datetime.datetime.now() + datetime.timedelta(hours=1)
-    
-    # Save token to DB
-    await db.execute(
-        "INSERT INTO password_reset_tokens (user_id, token, expires_at) VALUES (?, ?, ?)",
-        [user["id"], token, expires_at]
-    )
-    
-    # Send email
-    email_sent = await send_password_reset_email(user["email"], token)
-    
-    if not email_sent:
-        # Fallback for development: Log the link
-        reset_link = f"http://localhost:3000/reset-password?token={token}"
-        logger.warning(f"⚠️ Email sending failed (likely not configured). Reset link for {user['email']}: {reset_link}")
-        print(f"\n\n[DEV MODE] Password Reset Link for {user['email']}:\n{reset_link}\n\n")
-    
+        # Generate reset token
+        token = str(uuid.uuid4())
+        expires_at = datetime.datetime.now() + datetime.timedelta(hours=1)
+        
+        # Save token to DB
+        await db.execute(
+            "INSERT INTO password_reset_tokens (user_id, token, expires_at) VALUES (?, ?, ?)",
+            [user["id"], token, expires_at]
+        )
+        
+        # Queue email (sent by the outbox worker)
+        email_queued = await send_password_reset_email(user["email"], token)
+        
+        if not email_queued:
+            # Fallback for development: Log the link
+            reset_link = f"http://localhost:3000/reset-password?token={token}"
+            logger.warning(f"⚠️ Email not configured. Reset link for {user['email']}: {reset_link}")
+            print(f"\n\n[DEV MODE] Password Reset Link for {user['email']}:\n{reset_link}\n\n")
+    except Exception as e:
+        logger.error(f"recover_fail email={email} error={e}", exc_info=True)
+
+@router.post("/recover")
+async def recover(payload: PasswordRecoveryRequest, background_tasks: BackgroundTasks):
+    # The lookup and reset work run after the response, so known and unknown
+    # emails get the same answer in the same time (no account enumeration)
+    background_tasks.add_task(start_password_reset, payload.email)
     return {"message": "Nếu email tồn tại, liên kết đặt lại mật khẩu sẽ được gửi."}
 
 @router.post("/logout")
-async def logout(current_user: dict = Depends(get_current_user)):
-    """Logout endpoint - currently just returns success (token invalidation handled client-side)"""
+async def logout(
+    body: Optional[RefreshRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user),
+):
+    """Logout endpoint - revokes the access token and, if given, the refresh token"""
+    await revocations.revoke(decode_token(credentials.credentials) or {})
+    if body is not None:
+        refresh_payload = decode_token(body.refresh_token)
+        if refresh_payload and refresh_payload.get("uid") == current_user.get("id"):
+            await revocations.revoke(refresh_payload)
     logger.info(f"logout_success user_id={current_user.get('id')} email={current_user.get('email')}")
     return {"message": "Đăng xuất thành công"}
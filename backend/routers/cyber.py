@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import List, Optional
 from backend.database import db
+from backend.services.search import CYBER_BM25, match_query, highlight
+from backend.services.response_cache import response_cache
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -19,6 +21,10 @@ class CyberResource(BaseModel):
     created_at: Optional[str]
     updated_at: Optional[str]
 
+class CyberResourceHit(CyberResource):
+    topic_slug: Optional[str] = None
+    snippet: Optional[str] = None  # highlighted excerpt (escaped HTML with <mark>)
+
 class CyberTopic(BaseModel):
     id: Optional[int]
     slug: str
@@ -31,36 +37,116 @@ class CyberTopic(BaseModel):
     resources: List[CyberResource] = []
 
 @router.get("/topics", response_model=List[CyberTopic])
-async def get_topics():
-    """Get all cyber security topics with their resources"""
-    # Fetch all topics
-    topics = await db.fetch_all("SELECT * FROM cyber_topics ORDER BY id")
-    
+async def get_topics(
+    request: Request,
+    topic_type: Optional[str] = None,
+    domain: Optional[str] = None,
+    level: Optional[str] = None,
+    is_offensive: Optional[bool] = None,
+    is_defensive: Optional[bool] = None,
+    difficulty: Optional[str] = None,
+):
+    """Get cyber security topics with their resources
+
+    Topic filters (``topic_type``, ``domain``, ``level``) select topics;
+    resource filters (``is_offensive``, ``is_defensive``, ``difficulty``)
+    select resources and drop topics left without any. The unfiltered catalog
+    and each filtered view are cached until the cyber data changes.
+    """
+    return await response_cache.respond(
+        request, ("cyber",),
+        lambda: load_topics(topic_type, domain, level, is_offensive, is_defensive, difficulty),
+        List[CyberTopic],
+    )
+
+def _equals(alias: str, filters: dict) -> tuple:
+    clauses, params = [], []
+    for column, value in filters.items():
+        if value is not None:
+            clauses.append(f"{alias}.{column} = ?")
+            params.append(int(value) if isinstance(value, bool) else value)
+    return clauses, params
+
+async def load_topics(
+    topic_type: Optional[str] = None,
+    domain: Optional[str] = None,
+    level: Optional[str] = None,
+    is_offensive: Optional[bool] = None,
+    is_defensive: Optional[bool] = None,
+    difficulty: Optional[str] = None,
+) -> List[dict]:
+    """Topics and their resources in two bulk queries, grouped in memory"""
+    topic_clauses, topic_params = _equals("t", {"topic_type": topic_type, "domain": domain, "level": level})
+    resource_clauses, resource_params = _equals(
+        "r", {"is_offensive": is_offensive, "is_defensive": is_defensive, "difficulty": difficulty}
+    )
+    topic_where = "WHERE " + " AND ".join(topic_clauses) if topic_clauses else ""
+    topics = await db.fetch_all(f"SELECT t.* FROM cyber_topics t {topic_where} ORDER BY t.id", topic_params)
+    if not topics:
+        return []
+
+    resource_where = list(resource_clauses)
+    if topic_clauses:
+        resource_where.append(f"r.topic_id IN (SELECT t.id FROM cyber_topics t {topic_where})")
+    resources = await db.fetch_all(
+        f"""
+        SELECT r.* FROM cyber_resources r
+        {"WHERE " + " AND ".join(resource_where) if resource_where else ""}
+        ORDER BY r.topic_id, r.id
+        """,
+        resource_params + (topic_params if topic_clauses else [])
+    )
+    by_topic: dict = {}
+    for resource in resources:
+        by_topic.setdefault(resource["topic_id"], []).append(resource)
+
     result = []
     for topic in topics:
-        t_dict = dict(topic)
-        # Fetch resources for this topic
-        resources = await db.fetch_all(
-            "SELECT * FROM cyber_resources WHERE topic_id = ?", 
-            [t_dict['id']]
-        )
-        t_dict['resources'] = [dict(r) for r in resources]
-        result.append(t_dict)
-        
+        topic["resources"] = by_topic.get(topic["id"], [])
+        if resource_clauses and not topic["resources"]:
+            continue
+        result.append(topic)
     return result
 
 @router.get("/topics/{slug}", response_model=CyberTopic)
-async def get_topic_by_slug(slug: str):
+async def get_topic_by_slug(slug: str, request: Request):
     """Get a specific topic by slug"""
+    return await response_cache.respond(request, ("cyber",), lambda: load_topic(slug), CyberTopic)
+
+async def load_topic(slug: str) -> dict:
     topic = await db.fetch_one("SELECT * FROM cyber_topics WHERE slug = ?", [slug])
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
-        
-    t_dict = dict(topic)
+    topic["resources"] = await db.fetch_all(
+        "SELECT * FROM cyber_resources WHERE topic_id = ? ORDER BY id",
+        [topic["id"]]
+    )
+    return topic
+
+@router.get("/resources/search", response_model=List[CyberResourceHit])
+async def search_resources(
+    search: str = Query(..., min_length=1),
+    page: int = 1,
+    page_size: int = 20,
+):
+    """Full-text search over resource titles, summaries, tags and sources, best matches first"""
+    match = match_query(search)
+    if not match:
+        return []
     resources = await db.fetch_all(
-        "SELECT * FROM cyber_resources WHERE topic_id = ?", 
-        [t_dict['id']]
+        f"""
+        SELECT r.*, t.slug AS topic_slug
+        FROM (SELECT rowid AS id, {CYBER_BM25} AS rank FROM cyber_resources_fts WHERE cyber_resources_fts MATCH ?) s
+        JOIN cyber_resources r ON r.id = s.id
+        LEFT JOIN cyber_topics t ON t.id = r.topic_id
+        ORDER BY s.rank, r.id
+        LIMIT ? OFFSET ?
+        """,
+        [match, page_size, max(0, (page - 1) * page_size)]
     )
-    t_dict['resources'] = [dict(r) for r in resources]
-    
-    return t_dict
+    result = []
+    for r in resources:
+        r_dict = dict(r)
+        r_dict['snippet'] = highlight(r_dict.get('summary'), search) or highlight(r_dict.get('title'), search)
+        result.append(r_dict)
+    return result
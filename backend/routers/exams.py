@@ -1,28 +1,59 @@
 # routers/exams.py
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Header, Request, Response
+from fastapi.responses import JSONResponse
 from typing import Optional, List
 from datetime import datetime
 from backend.models import (
     ExamCreate, ExamUpdate, ExamResponse, ExamList,
     QuestionCreate, QuestionResponse, AnswerKeyResponse, AnswerKeyItem,
-    ExamSubmission, ExamResultResponse, AnswerSubmission,
+    ExamSubmission, ExamResultResponse, AnswerSubmission, BatchAnalysisRequest,
 )
 from backend.database import db
 from backend.middleware import get_current_user, require_admin
 from backend.utils import r2
+from backend.utils.pagination import keyset_page, split_page, list_counts
+from backend.services.search import EXAMS_BM25, match_query, highlight
+from backend.services.exam_cache import exam_snapshots
+from backend.services.response_cache import response_cache
+from backend.services.grading import fetch_answer_key
+from backend.services.submissions import submission_queue, grade_submission, queue_result
+from backend.services.item_stats import get_item_stats
+from backend.services.batch_analysis import batch_analyzer
+from backend.services.irt import MODELS as IRT_MODELS, calibrate_exam, get_calibration
+from backend.config import settings
 
 router = APIRouter()
 
 @router.get("/", response_model=ExamList)
 async def get_exams(
+    request: Request,
     page: int = 1,
     page_size: int = 20,
     subject: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
-    """Get all exams with filters and pagination"""
-    offset = (page - 1) * page_size
-    
+    """Get all exams with filters and pagination (page/page_size or cursor)
+
+    With ``search`` the results are full-text matches ranked by relevance.
+    Served from the response cache (ETag/304).
+    """
+    return await response_cache.respond(
+        request, ("exams",),
+        lambda: list_exams(page, page_size, subject, search, cursor, include_total),
+        ExamList,
+    )
+
+
+async def list_exams(
+    page: int = 1,
+    page_size: int = 20,
+    subject: Optional[str] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+) -> dict:
     # Build query with table aliases - always use aliases for consistency
     where_clauses = []
     params = []
@@ -31,98 +62,80 @@ async def get_exams(
         where_clauses.append("e.subject = ?")
         params.append(subject)
     
-    if search:
-        where_clauses.append("(e.title LIKE ? OR u.fullname LIKE ?)")
-        params.extend([f"%{search}%", f"%{search}%"])
+    # Title, author, description and the creator's name are in exams_fts
+    match = match_query(search)
+    count_clauses = list(where_clauses)
+    count_params = list(params)
+    if match:
+        count_clauses.append("e.id IN (SELECT rowid FROM exams_fts WHERE exams_fts MATCH ?)")
+        count_params.append(match)
+    count_where_sql = "WHERE " + " AND ".join(count_clauses) if count_clauses else ""
+    
+    async def count() -> int:
+        count_result = await db.fetch_one(
+            f"""
+            SELECT COUNT(*) as total 
+            FROM exams e
+            {count_where_sql}
+            """,
+            count_params
+        )
+        return count_result["total"] if count_result else 0
     
-    where_sql = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+    total = await list_counts.get(("exams", count_where_sql, tuple(count_params)), count) if include_total else None
     
-    # Always join users for consistency (needed for u.fullname in SELECT and search)
-    count_query = f"""
-        SELECT COUNT(*) as total 
-        FROM exams e
-        LEFT JOIN users u ON u.id = e.created_by
-        {where_sql}
-    """
+    if match:
+        join_sql = f"JOIN (SELECT rowid AS id, {EXAMS_BM25} AS rank FROM exams_fts WHERE exams_fts MATCH ?) s ON s.id = e.id"
+        join_params = [match]
+        keys, key_names, descending = ("s.rank", "e.id"), ("rank", "id"), False
+    else:
+        join_sql, join_params = "", []
+        keys, key_names, descending = ("e.created_at", "e.id"), ("created_at", "id"), True
     
-    count_result = await db.fetch_one(count_query, params)
-    total = count_result["total"] if count_result else 0
+    page_where, page_params, order_sql, order_params = keyset_page(keys, page, page_size, cursor, descending)
+    all_where = where_clauses + page_where
+    page_where_sql = "WHERE " + " AND ".join(all_where) if all_where else ""
     
     # Get exams - always join users for consistency
     exams = await db.fetch_all(
         f"""
-        SELECT e.id, u.fullname, e.title, e.author, e.subject, e.file_url,
-               e.answer_file_url, e.created_by, e.created_at, e.updated_at
+        SELECT e.id, u.fullname, e.title, e.author, e.subject, e.description, e.file_url,
+               e.answer_file_url, e.created_by, e.created_at, e.updated_at{', s.rank' if match else ''}
         FROM exams e
+        {join_sql}
         LEFT JOIN users u ON u.id = e.created_by
-        {where_sql}
-        ORDER BY e.created_at DESC
-        LIMIT ? OFFSET ?
+        {page_where_sql}
+        {order_sql}
         """,
-        params + [page_size, offset]
+        join_params + params + page_params + order_params
     )
+    exams, next_cursor = split_page(exams, page_size, key_names)
+    if match:
+        for exam in exams:
+            exam["snippet"] = (
+                highlight(exam.get("description"), search)
+                or highlight(exam.get("title"), search)
+                or highlight(exam.get("fullname"), search)
+            )
     
     return {
         "total": total,
         "page": page,
         "page_size": page_size,
-        "data": exams
+        "data": exams,
+        "next_cursor": next_cursor
     }
 
-
 @router.get("/{exam_id}", response_model=ExamResponse)
 async def get_exam(exam_id: int):
-    """Get single exam by ID"""
-    exam = await db.fetch_one(
-        """
-        SELECT e.id, u.fullname, e.title, e.author, e.subject, e.file_url,
-               e.answer_file_url, e.created_by, e.created_at, e.updated_at
-        FROM exams e
-        LEFT JOIN users u ON u.id = e.created_by
-        WHERE e.id = ?
-        """,
-        [exam_id]
-    )
-    
-    if not exam:
+    """Get single exam by ID (served from the snapshot cache)"""
+    body = await exam_snapshots.get(exam_id)
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Exam not found"
         )
-    
-    # Load questions with ordering
-    questions_rows = await db.fetch_all(
-        """
-        SELECT q.question_id, q.question_text, q.question_type, q.points, eq.order_index
-        FROM exam_questions eq
-        JOIN questions q ON q.question_id = eq.question_id
-        WHERE eq.exam_id = ?
-        ORDER BY eq.order_index ASC
-        """,
-        [exam_id]
-    )
-
-    questions: List[QuestionResponse] = []
-    for row in questions_rows:
-        q = {
-            "question_id": row["question_id"],
-            "question_text": row["question_text"],
-            "question_type": row["question_type"],
-            "points": row["points"],
-            "order_index": row["order_index"],
-        }
-        if row["question_type"] == "multiple_choice":
-            options = await db.fetch_all(
-                "SELECT option_id, option_text FROM question_options WHERE question_id = ?",
-                [row["question_id"]]
-            )
-            q["options"] = options or []
-        else:
-            q["options"] = []
-        questions.append(q)
-
-    exam["questions"] = questions
-    return exam
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/", response_model=ExamResponse, status_code=status.HTTP_201_CREATED)
@@ -141,6 +154,7 @@ async def create_exam(
             exam.file_url, exam.answer_file_url, current_user["id"]
         ]
     )
+    response_cache.invalidate("exams")
     
     new_exam = await db.fetch_one(
         """
@@ -189,6 +203,7 @@ async def create_exam_with_files(
         """,
         [title, author, subject, final_exam_url, final_answer, current_user["id"]]
     )
+    response_cache.invalidate("exams")
     
     new_exam = await db.fetch_one(
         """
@@ -262,9 +277,10 @@ async def update_exam(
     
     params.append(exam_id)
     await db.update(
-        f"UPDATE exams SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        f"UPDATE exams SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ?",
         params
     )
+    exam_snapshots.invalidate(exam_id)
     return await get_exam(exam_id)
 
 @router.put("/{exam_id}/admin", response_model=ExamResponse)
@@ -300,9 +316,10 @@ async def admin_update_exam(
     if update_fields:
         params.append(exam_id)
         await db.update(
-            f"UPDATE exams SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            f"UPDATE exams SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ?",
             params
         )
+        exam_snapshots.invalidate(exam_id)
     return await get_exam(exam_id)
 
 @router.delete("/{exam_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -314,6 +331,7 @@ async def admin_delete_exam(exam_id: int, admin: dict = Depends(require_admin)):
         await db.delete("DELETE FROM question_answers WHERE question_id = ?", [q["question_id"]])
     await db.delete("DELETE FROM questions WHERE exam_id = ?", [exam_id])
     await db.delete("DELETE FROM exams WHERE id = ?", [exam_id])
+    exam_snapshots.invalidate(exam_id)
     return {}
 
 @router.post("/{exam_id}/questions", response_model=QuestionResponse, status_code=status.HTTP_201_CREATED)
@@ -322,32 +340,46 @@ async def admin_add_question(
     payload: QuestionCreate,
     admin: dict = Depends(require_admin)
 ):
-    qid = await db.insert(
-        "INSERT INTO questions (exam_id, question_text, question_type, points) VALUES (?, ?, ?, ?)",
-        [exam_id, payload.question_text, payload.question_type, payload.points]
-    )
-    order_row = await db.fetch_one("SELECT COALESCE(MAX(order_index), 0) AS max_order FROM exam_questions WHERE exam_id = ?", [exam_id])
-    next_order = (order_row or {}).get("max_order", 0) + 1
-    await db.insert("INSERT INTO exam_questions (exam_id, question_id, order_index) VALUES (?, ?, ?)", [exam_id, qid, next_order])
-    if payload.question_type == "multiple_choice" and payload.options:
-        for opt in payload.options:
-            await db.insert(
-                "INSERT INTO question_options (question_id, option_text, is_correct) VALUES (?, ?, ?)",
-                [qid, opt.option_text, 1 if opt.is_correct else 0]
-            )
-    if payload.question_type in ("true_false","short_answer") and payload.correct_answer:
-        await db.insert(
-            "INSERT INTO question_answers (question_id, correct_answer) VALUES (?, ?)",
-            [qid, payload.correct_answer]
+    # The question and everything that depends on its id go out in one batch;
+    # dependent rows find the new question as the latest one of the exam
+    new_qid = "(SELECT MAX(question_id) FROM questions WHERE exam_id = ?)"
+    async with db.transaction() as tx:
+        tx.execute(
+            "INSERT INTO questions (exam_id, question_text, question_type, points) VALUES (?, ?, ?, ?)",
+            [exam_id, payload.question_text, payload.question_type, payload.points]
+        )
+        tx.execute(
+            f"""
+            INSERT INTO exam_questions (exam_id, question_id, order_index)
+            SELECT ?, {new_qid}, COALESCE(MAX(order_index), 0) + 1 FROM exam_questions WHERE exam_id = ?
+            """,
+            [exam_id, exam_id, exam_id]
         )
-    row = await db.fetch_one("SELECT question_id, question_text, question_type, points FROM questions WHERE question_id = ?", [qid])
-    opts = await db.fetch_all("SELECT option_id, option_text, is_correct FROM question_options WHERE question_id = ?", [qid])
+        if payload.question_type == "multiple_choice" and payload.options:
+            for opt in payload.options:
+                tx.execute(
+                    f"INSERT INTO question_options (question_id, option_text, is_correct) VALUES ({new_qid}, ?, ?)",
+                    [exam_id, opt.option_text, 1 if opt.is_correct else 0]
+                )
+        if payload.question_type in ("true_false","short_answer") and payload.correct_answer:
+            tx.execute(
+                f"INSERT INTO question_answers (question_id, correct_answer) VALUES ({new_qid}, ?)",
+                [exam_id, payload.correct_answer]
+            )
+        row_i = tx.execute(f"SELECT question_id, question_text, question_type, points FROM questions WHERE question_id = {new_qid}", [exam_id])
+        ord_i = tx.execute(f"SELECT order_index FROM exam_questions WHERE exam_id = ? AND question_id = {new_qid}", [exam_id, exam_id])
+        opts_i = tx.execute(f"SELECT option_id, option_text, is_correct FROM question_options WHERE question_id = {new_qid}", [exam_id])
+        tx.execute("UPDATE exams SET updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ?", [exam_id])
+    exam_snapshots.invalidate(exam_id)
+    row = tx.rows(row_i)[0]
+    ord_rows = tx.rows(ord_i)
+    opts = tx.rows(opts_i)
     return {
         "question_id": row["question_id"],
         "question_text": row["question_text"],
         "question_type": row["question_type"],
         "points": row["points"],
-        "order_index": next_order,
+        "order_index": ord_rows[0]["order_index"] if ord_rows else None,
         "options": opts or None,
     }
 
@@ -357,184 +389,189 @@ async def admin_update_question(
     payload: QuestionCreate,
     admin: dict = Depends(require_admin)
 ):
-    await db.update(
-        "UPDATE questions SET question_text = ?, question_type = ?, points = ?, updated_at = CURRENT_TIMESTAMP WHERE question_id = ?",
-        [payload.question_text, payload.question_type, payload.points, question_id]
-    )
-    await db.delete("DELETE FROM question_options WHERE question_id = ?", [question_id])
-    await db.delete("DELETE FROM question_answers WHERE question_id = ?", [question_id])
-    if payload.question_type == "multiple_choice" and payload.options:
-        for opt in payload.options:
-            await db.insert(
-                "INSERT INTO question_options (question_id, option_text, is_correct) VALUES (?, ?, ?)",
-                [question_id, opt.option_text, 1 if opt.is_correct else 0]
+    async with db.transaction() as tx:
+        tx.execute(
+            "UPDATE questions SET question_text = ?, question_type = ?, points = ?, updated_at = CURRENT_TIMESTAMP WHERE question_id = ?",
+            [payload.question_text, payload.question_type, payload.points, question_id]
+        )
+        tx.execute("DELETE FROM question_options WHERE question_id = ?", [question_id])
+        tx.execute("DELETE FROM question_answers WHERE question_id = ?", [question_id])
+        if payload.question_type == "multiple_choice" and payload.options:
+            for opt in payload.options:
+                tx.execute(
+                    "INSERT INTO question_options (question_id, option_text, is_correct) VALUES (?, ?, ?)",
+                    [question_id, opt.option_text, 1 if opt.is_correct else 0]
+                )
+        if payload.question_type in ("true_false","short_answer") and payload.correct_answer:
+            tx.execute(
+                "INSERT INTO question_answers (question_id, correct_answer) VALUES (?, ?)",
+                [question_id, payload.correct_answer]
             )
-    if payload.question_type in ("true_false","short_answer") and payload.correct_answer:
-        await db.insert(
-            "INSERT INTO question_answers (question_id, correct_answer) VALUES (?, ?)",
-            [question_id, payload.correct_answer]
+        row_i = tx.execute("SELECT question_id, question_text, question_type, points FROM questions WHERE question_id = ?", [question_id])
+        ord_i = tx.execute("SELECT exam_id, order_index FROM exam_questions WHERE question_id = ?", [question_id])
+        opts_i = tx.execute("SELECT option_id, option_text, is_correct FROM question_options WHERE question_id = ?", [question_id])
+        tx.execute(
+            "UPDATE exams SET updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id IN (SELECT exam_id FROM exam_questions WHERE question_id = ?)",
+            [question_id]
         )
-    row = await db.fetch_one("SELECT question_id, question_text, question_type, points FROM questions WHERE question_id = ?", [question_id])
-    ord_row = await db.fetch_one("SELECT order_index FROM exam_questions WHERE question_id = ?", [question_id])
-    opts = await db.fetch_all("SELECT option_id, option_text, is_correct FROM question_options WHERE question_id = ?", [question_id])
+    row = tx.rows(row_i)[0]
+    ord_rows = tx.rows(ord_i)
+    for r in ord_rows:
+        exam_snapshots.invalidate(r["exam_id"])
+    opts = tx.rows(opts_i)
     return {
         "question_id": row["question_id"],
         "question_text": row["question_text"],
         "question_type": row["question_type"],
         "points": row["points"],
-        "order_index": (ord_row or {}).get("order_index"),
+        "order_index": ord_rows[0]["order_index"] if ord_rows else None,
         "options": opts or None,
     }
 
 @router.delete("/questions/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def admin_delete_question(question_id: int, admin: dict = Depends(require_admin)):
-    await db.delete("DELETE FROM exam_questions WHERE question_id = ?", [question_id])
-    await db.delete("DELETE FROM question_options WHERE question_id = ?", [question_id])
-    await db.delete("DELETE FROM question_answers WHERE question_id = ?", [question_id])
-    await db.delete("DELETE FROM questions WHERE question_id = ?", [question_id])
+    exam_rows = await db.fetch_all("SELECT exam_id FROM exam_questions WHERE question_id = ?", [question_id])
+    exam_ids = [r["exam_id"] for r in exam_rows]
+    # One batch, version bump last: a snapshot rebuilt under the new version never includes the question
+    async with db.transaction() as tx:
+        tx.execute("DELETE FROM exam_questions WHERE question_id = ?", [question_id])
+        tx.execute("DELETE FROM question_options WHERE question_id = ?", [question_id])
+        tx.execute("DELETE FROM question_answers WHERE question_id = ?", [question_id])
+        tx.execute("DELETE FROM questions WHERE question_id = ?", [question_id])
+        for exam_id in exam_ids:
+            tx.execute("UPDATE exams SET updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ?", [exam_id])
+    for exam_id in exam_ids:
+        exam_snapshots.invalidate(exam_id)
     return {}
 
 @router.get("/{exam_id}/answer-key", response_model=AnswerKeyResponse)
 async def get_answer_key(exam_id: int):
     """Return correct answers for an exam"""
-    # Get MCQ correct options
-    mcq_answers = await db.fetch_all(
-        """
-        SELECT qo.question_id, qo.option_id AS correct_option_id
-        FROM question_options qo
-        JOIN questions q ON q.question_id = qo.question_id
-        WHERE q.exam_id = ? AND q.question_type = 'multiple_choice' AND qo.is_correct = 1
-        """,
-        [exam_id]
-    )
+    answers: List[AnswerKeyItem] = await fetch_answer_key(exam_id)
+    return {"exam_id": exam_id, "answers": answers}
 
-    # Get TF/Short answers
-    tf_sa_answers = await db.fetch_all(
-        """
-        SELECT qa.question_id, qa.correct_answer
-        FROM question_answers qa
-        JOIN questions q ON q.question_id = qa.question_id
-        WHERE q.exam_id = ? AND q.question_type IN ('true_false','short_answer')
-        """,
-        [exam_id]
-    )
+@router.get("/{exam_id}/item-stats")
+async def admin_get_item_stats(exam_id: int, admin: dict = Depends(require_admin)):
+    """Running p-values and approximate discrimination for each question of an exam"""
+    return await get_item_stats(exam_id)
 
-    answers: List[AnswerKeyItem] = []
-    for row in mcq_answers:
-        answers.append({
-            "question_id": row["question_id"],
-            "correct_option_id": row["correct_option_id"]
-        })
-    for row in tf_sa_answers:
-        answers.append({
-            "question_id": row["question_id"],
-            "correct_answer": row["correct_answer"]
-        })
+@router.post("/{exam_id}/irt/calibrate")
+async def admin_calibrate_irt(exam_id: int, model: str = "rasch", admin: dict = Depends(require_admin)):
+    """Calibrate Rasch or 2PL item parameters and student abilities for an exam"""
+    if model not in IRT_MODELS:
+        raise HTTPException(status_code=400, detail=f"model must be one of: {', '.join(IRT_MODELS)}")
+    calibration = await calibrate_exam(exam_id, model)
+    if calibration is None:
+        raise HTTPException(status_code=404, detail="No answers to calibrate for this exam")
+    return calibration
 
-    return {"exam_id": exam_id, "answers": answers}
+@router.get("/{exam_id}/irt")
+async def admin_get_irt(exam_id: int, model: str = "rasch", admin: dict = Depends(require_admin)):
+    """Stored item parameters and abilities from the last calibration"""
+    if model not in IRT_MODELS:
+        raise HTTPException(status_code=400, detail=f"model must be one of: {', '.join(IRT_MODELS)}")
+    return await get_calibration(exam_id, model)
+
+@router.post("/analysis/batch", status_code=status.HTTP_202_ACCEPTED)
+async def admin_start_batch_analysis(
+    request: BatchAnalysisRequest,
+    admin: dict = Depends(require_admin)
+):
+    """Start item analysis of many exams in the background; returns the job id"""
+    job = await batch_analyzer.start(request.exam_ids, request.update_db)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total_exams": len(job.exam_ids),
+        "status_url": f"/api/exams/analysis/batch/{job.id}",
+    }
+
+@router.get("/analysis/batch/{job_id}")
+async def admin_get_batch_analysis(job_id: str, admin: dict = Depends(require_admin)):
+    """Progress, throughput and merged statistics of a batch analysis job"""
+    job = batch_analyzer.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job.to_dict()
 
 @router.post("/{exam_id}/submit", response_model=ExamResultResponse, status_code=status.HTTP_201_CREATED)
 async def submit_exam(
     exam_id: int,
     submission: ExamSubmission,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
-    """Submit exam answers and calculate score"""
+    """Submit exam answers and calculate score
+    
+    With EXAM_SUBMIT_MODE=queue the submission is only stored durably and a
+    202 with the submission id is returned; poll /submissions/{id}.
+    """
     # Verify exam exists
     exam = await db.fetch_one(
-        "SELECT id, title FROM exams WHERE id = ?",
+        "SELECT id, title, version FROM exams WHERE id = ?",
         [exam_id]
     )
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     
-    # Get answer key
-    answer_key_data = await get_answer_key(exam_id)
-    answer_key = {a["question_id"]: a for a in answer_key_data["answers"]}
+    if settings.EXAM_SUBMIT_MODE == "queue":
+        entry = await submission_queue.enqueue(exam_id, current_user["id"], submission, idempotency_key)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "submission_id": entry["id"],
+                "exam_id": exam_id,
+                "status": entry["status"],
+                "exam_result_id": entry["exam_result_id"],
+                "duplicate": entry["duplicate"],
+                "status_url": f"/api/exams/submissions/{entry['id']}",
+            }
+        )
     
-    # Get questions with points
-    questions = await db.fetch_all(
-        """
-        SELECT q.question_id, q.points, q.question_type
-        FROM exam_questions eq
-        JOIN questions q ON q.question_id = eq.question_id
-        WHERE eq.exam_id = ?
-        """,
-        [exam_id]
-    )
-    question_points = {q["question_id"]: q["points"] for q in questions}
-    question_types = {q["question_id"]: q["question_type"] for q in questions}
-    
-    # Calculate score
-    total_points = sum(question_points.values())
-    score = 0.0
-    answer_details = []
-    
-    for answer in submission.answers:
-        q_id = answer.question_id
-        q_type = question_types.get(q_id)
-        q_points = question_points.get(q_id, 0)
-        is_correct = False
-        points_earned = 0.0
-        
-        if q_id in answer_key:
-            key = answer_key[q_id]
-            if q_type == "multiple_choice":
-                # Check if selected option is correct
-                if answer.option_id and key.get("correct_option_id") == answer.option_id:
-                    is_correct = True
-                    points_earned = q_points
-            elif q_type in ("true_false", "short_answer"):
-                # For now, just check if answer exists (can be improved with fuzzy matching)
-                if answer.answer_text and key.get("correct_answer"):
-                    # Simple exact match (can be improved)
-                    is_correct = answer.answer_text.strip().lower() == key["correct_answer"].strip().lower()
-                    if is_correct:
-                        points_earned = q_points
-        
-        score += points_earned
-        answer_details.append({
-            "question_id": q_id,
-            "answer_text": answer.answer_text,
-            "option_id": answer.option_id,
-            "is_correct": is_correct,
-            "points_earned": points_earned,
-            "total_points": q_points
-        })
-    
-    percentage = (score / total_points * 100) if total_points > 0 else 0
-    
-    # Save exam result
-    result_id = await db.insert(
-        """
-        INSERT INTO exam_results (exam_id, student_id, score, total_points, percentage, time_spent_seconds)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        [exam_id, current_user["id"], score, total_points, percentage, submission.time_spent_seconds]
-    )
+    # Compiled answer key, graded without further queries
+    graded = await grade_submission(exam_id, exam["version"], submission)
     
-    # Save individual answers
-    for detail in answer_details:
-        await db.insert(
-            """
-            INSERT INTO student_answers (exam_result_id, question_id, answer_text, option_id, is_correct, points_earned)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            [result_id, detail["question_id"], detail.get("answer_text"), detail.get("option_id"), 
-             detail["is_correct"], detail["points_earned"]]
-        )
+    # Persist the result and every answer in one transaction
+    async with db.transaction() as tx:
+        result_i = queue_result(tx, exam_id, current_user["id"], graded, submission.time_spent_seconds)
+    result_id = tx.last_row_id(result_i)
     
     return {
         "exam_result_id": result_id,
         "exam_id": exam_id,
         "exam_title": exam["title"],
-        "score": score,
-        "total_points": total_points,
-        "percentage": percentage,
+        "score": graded["score"],
+        "total_points": graded["total_points"],
+        "percentage": graded["percentage"],
         "time_spent_seconds": submission.time_spent_seconds,
         "submitted_at": datetime.now(),
-        "answers": answer_details
+        "answers": graded["answers"]
+    }
+
+@router.get("/submissions/{submission_id}")
+async def get_submission(
+    submission_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """Status of a queued submission, with the graded result once it is done"""
+    entry = await submission_queue.get(submission_id)
+    if not entry or entry["student_id"] != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    
+    response = {
+        "submission_id": entry["id"],
+        "exam_id": entry["exam_id"],
+        "status": entry["status"],
+        "attempts": entry["attempts"],
+        "exam_result_id": entry["exam_result_id"],
+        "error": entry["error"],
+        "created_at": entry["created_at"],
+        "completed_at": entry["completed_at"],
+        "result": None,
     }
+    if entry["status"] == "done" and entry["exam_result_id"]:
+        response["result"] = await get_exam_result(entry["exam_result_id"], current_user)
+    return response
 
 @router.get("/results/{result_id}", response_model=ExamResultResponse)
 async def get_exam_result(
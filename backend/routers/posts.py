@@ -1,41 +1,57 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from typing import Optional
 from backend.models.post import PostList, PostCreate, PostUpdate, PostResponse
 from backend.services.posts import fetch_posts
+from backend.services.counters import post_counters
+from backend.services.response_cache import response_cache
 from backend.database import db
-from backend.middleware.auth import require_admin, require_teacher_or_admin, get_current_user
+from backend.middleware.auth import require_admin, require_teacher_or_admin, get_current_user, current_fullname
 
 router = APIRouter()
 
 @router.get("/", response_model=PostList)
 async def get_posts(
+    request: Request,
     page: int = 1,
     page_size: int = 20,
     subject: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
-    try:
-        return await fetch_posts(page=page, page_size=page_size, subject=subject, search=search)
-    except HTTPException as e:
-        raise e
+    return await response_cache.respond(
+        request, ("posts",),
+        lambda: fetch_posts(
+            page=page, page_size=page_size, subject=subject, search=search,
+            cursor=cursor, include_total=include_total,
+        ),
+        PostList,
+    )
 
 @router.get("", response_model=PostList)
 async def get_posts_no_slash(
+    request: Request,
     page: int = 1,
     page_size: int = 20,
     subject: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
-    try:
-        return await fetch_posts(page=page, page_size=page_size, subject=subject, search=search)
-    except HTTPException as e:
-        raise e
+    return await response_cache.respond(
+        request, ("posts",),
+        lambda: fetch_posts(
+            page=page, page_size=page_size, subject=subject, search=search,
+            cursor=cursor, include_total=include_total,
+        ),
+        PostList,
+    )
 
 @router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 async def create_post(payload: PostCreate, current_user: dict = Depends(require_teacher_or_admin)):
     # For teachers, set teacher_id and use their name as author if not provided
     if current_user.get("role") == "teacher":
-        author = payload.author or current_user["fullname"]
+        author = payload.author or await current_fullname(current_user)
         teacher_id = current_user["id"]
         user_id = current_user["id"]
     else:  # Admin
@@ -54,6 +70,7 @@ async def create_post(payload: PostCreate, current_user: dict = Depends(require_
             payload.description, 0, 0, payload.class_field, payload.specialized, payload.file_url, user_id, teacher_id,
         ]
     )
+    response_cache.invalidate("posts")
     row = await db.fetch_one(
         "SELECT id, title, author, date, subject, category, description, views, downloads, class, specialized, file_url, user_id, teacher_id, created_at, updated_at FROM posts WHERE id = ?",
         [post_id]
@@ -128,6 +145,7 @@ async def update_post(post_id: int, payload: PostUpdate, current_user: dict = De
         f"UPDATE posts SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
         params
     )
+    response_cache.invalidate("posts")
     row = await db.fetch_one(
         "SELECT id, title, author, date, subject, category, description, views, downloads, class, specialized, file_url, user_id, teacher_id, created_at, updated_at FROM posts WHERE id = ?",
         [post_id]
@@ -152,6 +170,18 @@ async def update_post(post_id: int, payload: PostUpdate, current_user: dict = De
         "updated_at": row.get("updated_at"),
     })
 
+@router.post("/{post_id}/view", status_code=status.HTTP_202_ACCEPTED)
+async def record_view(post_id: int):
+    """Count a view; written to the database in the next batched counter flush"""
+    post_counters.incr(post_id, "views")
+    return {"post_id": post_id, "queued": True}
+
+@router.post("/{post_id}/download", status_code=status.HTTP_202_ACCEPTED)
+async def record_download(post_id: int):
+    """Count a download; written to the database in the next batched counter flush"""
+    post_counters.incr(post_id, "downloads")
+    return {"post_id": post_id, "queued": True}
+
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(post_id: int, current_user: dict = Depends(require_teacher_or_admin)):
     # Check if user has permission to delete this post
@@ -164,4 +194,5 @@ async def delete_post(post_id: int, current_user: dict = Depends(require_teacher
         raise HTTPException(status_code=403, detail="You can only delete your own posts")
     
     await db.delete("DELETE FROM posts WHERE id = ?", [post_id])
+    response_cache.invalidate("posts")
     return {}
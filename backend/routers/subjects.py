@@ -1,9 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from backend.database import db
+from backend.services.response_cache import response_cache
 
 router = APIRouter(prefix="/api/subjects", tags=["subjects"])
 
 @router.get("/")
-async def list_subjects():
-    rows = await db.fetch_all("SELECT id, name, description, parent_id FROM subjects ORDER BY name ASC")
-    return rows
+async def list_subjects(request: Request):
+    async def load():
+        return await db.fetch_all("SELECT id, name, description, parent_id FROM subjects ORDER BY name ASC")
+    return await response_cache.respond(request, ("subjects",), load)
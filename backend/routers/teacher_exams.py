@@ -4,6 +4,10 @@ from backend.models import ExamCreate, ExamUpdate, ExamResponse, ExamList
 from backend.database import db
 from backend.middleware.auth import require_teacher, get_current_user
 from backend.utils import r2
+from backend.services.exams import load_exam
+from backend.services.exam_cache import exam_snapshots
+from backend.services.response_cache import response_cache
+from backend.services.search import EXAMS_BM25, match_query, highlight
 
 router = APIRouter(prefix="/api/teacher/exams", tags=["teacher-exams"])
 
@@ -25,36 +29,52 @@ async def get_my_exams(
         where_clauses.append("e.subject = ?")
         params.append(subject)
     
-    if search:
-        where_clauses.append("(e.title LIKE ? OR e.author LIKE ?)")
-        params.extend([f"%{search}%", f"%{search}%"])
-    
     where_sql = "WHERE " + " AND ".join(where_clauses)
     
+    # Full-text search (exams_fts), ranked by relevance
+    match = match_query(search)
+    count_where_sql = where_sql
+    count_params = list(params)
+    if match:
+        count_where_sql += " AND e.id IN (SELECT rowid FROM exams_fts WHERE exams_fts MATCH ?)"
+        count_params.append(match)
+    
     # Count total
     count_result = await db.fetch_one(
         f"""
         SELECT COUNT(*) as total 
         FROM exams e
-        {where_sql}
+        {count_where_sql}
         """,
-        params
+        count_params
     )
     total = count_result["total"] if count_result else 0
     
+    if match:
+        join_sql = f"JOIN (SELECT rowid AS id, {EXAMS_BM25} AS rank FROM exams_fts WHERE exams_fts MATCH ?) s ON s.id = e.id"
+        join_params = [match]
+        order_sql = "ORDER BY s.rank, e.id"
+    else:
+        join_sql, join_params = "", []
+        order_sql = "ORDER BY e.created_at DESC"
+    
     # Get exams
     exams = await db.fetch_all(
         f"""
-        SELECT e.id, u.fullname, e.title, e.author, e.subject, e.file_url,
+        SELECT e.id, u.fullname, e.title, e.author, e.subject, e.description, e.file_url,
                e.answer_file_url, e.created_by, e.created_at, e.updated_at
         FROM exams e
+        {join_sql}
         LEFT JOIN users u ON u.id = e.created_by
         {where_sql}
-        ORDER BY e.created_at DESC
+        {order_sql}
         LIMIT ? OFFSET ?
         """,
-        params + [page_size, offset]
+        join_params + params + [page_size, offset]
     )
+    if match:
+        for exam in exams:
+            exam["snippet"] = highlight(exam.get("description"), search) or highlight(exam.get("title"), search)
     
     return {
         "total": total,
@@ -66,56 +86,12 @@ async def get_my_exams(
 @router.get("/{exam_id}", response_model=ExamResponse)
 async def get_my_exam(exam_id: int, current_user: dict = Depends(require_teacher)):
     """Get a specific exam created by the current teacher"""
-    exam = await db.fetch_one(
-        """
-        SELECT e.id, u.fullname, e.title, e.author, e.subject, e.file_url,
-               e.answer_file_url, e.created_by, e.created_at, e.updated_at
-        FROM exams e
-        LEFT JOIN users u ON u.id = e.created_by
-        WHERE e.id = ? AND e.created_by = ?
-        """,
-        [exam_id, current_user["id"]]
-    )
-    
+    exam = await load_exam(exam_id, created_by=current_user["id"])
     if not exam:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Exam not found or access denied"
         )
-    
-    # Load questions with ordering
-    questions_rows = await db.fetch_all(
-        """
-        SELECT q.question_id, q.question_text, q.question_type, q.points, eq.order_index
-        FROM exam_questions eq
-        JOIN questions q ON q.question_id = eq.question_id
-        WHERE eq.exam_id = ?
-        ORDER BY eq.order_index ASC
-        """,
-        [exam_id]
-    )
-    
-    from backend.models import QuestionResponse
-    questions: List[QuestionResponse] = []
-    for row in questions_rows:
-        q = {
-            "question_id": row["question_id"],
-            "question_text": row["question_text"],
-            "question_type": row["question_type"],
-            "points": row["points"],
-            "order_index": row["order_index"],
-        }
-        if row["question_type"] == "multiple_choice":
-            options = await db.fetch_all(
-                "SELECT option_id, option_text FROM question_options WHERE question_id = ?",
-                [row["question_id"]]
-            )
-            q["options"] = options or []
-        else:
-            q["options"] = []
-        questions.append(q)
-    
-    exam["questions"] = questions
     return exam
 
 @router.post("/", response_model=ExamResponse, status_code=status.HTTP_201_CREATED)
@@ -134,6 +110,7 @@ async def create_exam(
             exam.file_url, exam.answer_file_url, current_user["id"], current_user["id"]
         ]
     )
+    response_cache.invalidate("exams")
     
     new_exam = await db.fetch_one(
         """
@@ -181,6 +158,7 @@ async def create_exam_with_files(
         """,
         [title, author, subject, final_exam_url, final_answer, current_user["id"], current_user["id"]]
     )
+    response_cache.invalidate("exams")
     
     new_exam = await db.fetch_one(
         """
@@ -247,9 +225,10 @@ async def update_my_exam(
     
     params.append(exam_id)
     await db.update(
-        f"UPDATE exams SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        f"UPDATE exams SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ?",
         params
     )
+    exam_snapshots.invalidate(exam_id)
     return await get_my_exam(exam_id, current_user)
 
 @router.delete("/{exam_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -266,6 +245,7 @@ async def delete_my_exam(exam_id: int, current_user: dict = Depends(require_teac
             detail="Exam not found or access denied"
         )
     
+    exam_snapshots.invalidate(exam_id)
     return {}
 
 
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Optional, List
 from backend.models.post import PostList, PostCreate, PostUpdate, PostResponse
 from backend.services.posts import fetch_posts
+from backend.services.response_cache import response_cache
 from backend.database import db
-from backend.middleware.auth import require_teacher, get_current_user
+from backend.middleware.auth import require_teacher, get_current_user, current_fullname
 
 router = APIRouter(prefix="/api/teacher/posts", tags=["teacher-posts"])
 
@@ -13,11 +14,16 @@ async def get_my_posts(
     page_size: int = 20,
     subject: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user: dict = Depends(require_teacher)
 ):
     """Get posts created by the current teacher"""
     try:
-        return await fetch_posts(page=page, page_size=page_size, subject=subject, search=search, teacher_id=current_user["id"])
+        return await fetch_posts(
+            page=page, page_size=page_size, subject=subject, search=search, teacher_id=current_user["id"],
+            cursor=cursor, include_total=include_total,
+        )
     except HTTPException as e:
         raise e
 
@@ -25,7 +31,7 @@ async def get_my_posts(
 async def create_teacher_post(payload: PostCreate, current_user: dict = Depends(require_teacher)):
     """Create a new post as a teacher"""
     # Use teacher's name as author if not provided
-    author = payload.author or current_user["fullname"]
+    author = payload.author or await current_fullname(current_user)
     
     post_id = await db.insert(
         (
@@ -39,6 +45,7 @@ async def create_teacher_post(payload: PostCreate, current_user: dict = Depends(
             current_user["id"], current_user["id"]
         ]
     )
+    response_cache.invalidate("posts")
     
     if not post_id:
         raise HTTPException(status_code=500, detail="Failed to create post")
@@ -114,6 +121,7 @@ async def update_my_post(post_id: int, payload: PostUpdate, current_user: dict =
         f"UPDATE posts SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
         params
     )
+    response_cache.invalidate("posts")
     
     row = await db.fetch_one(
         "SELECT id, title, author, date, subject, category, description, views, downloads, class, specialized, file_url, user_id, teacher_id, created_at, updated_at FROM posts WHERE id = ?",
@@ -145,6 +153,7 @@ async def delete_my_post(post_id: int, current_user: dict = Depends(require_teac
     
     if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Post not found or access denied")
+    response_cache.invalidate("posts")
     
     return {}
 
@@ -201,6 +210,8 @@ async def get_classroom_posts(
     page_size: int = 20,
     subject: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user: dict = Depends(require_teacher)
 ):
     """Get posts assigned to a specific classroom"""
@@ -210,6 +221,9 @@ async def get_classroom_posts(
         raise HTTPException(status_code=404, detail="Classroom not found or access denied")
     
     try:
-        return await fetch_posts(page=page, page_size=page_size, subject=subject, search=search, classroom_id=classroom_id)
+        return await fetch_posts(
+            page=page, page_size=page_size, subject=subject, search=search, classroom_id=classroom_id,
+            cursor=cursor, include_total=include_total,
+        )
     except HTTPException as e:
         raise e
\ No newline at end of file
@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field
 from backend.database import db
 from backend.middleware import get_current_user
 from backend.models.user import UserResponse
+from backend.services.principals import principals
 
 router = APIRouter()
 
@@ -38,6 +39,7 @@ async def update_me(update: UserUpdate, current_user: dict = Depends(get_current
         f"UPDATE users SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
         params
     )
+    principals.invalidate(current_user["id"])
 
     user = await db.fetch_one(
         "SELECT id, fullname, email, phone, role, is_active, created_at FROM users WHERE id = ?",
@@ -7,6 +7,8 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(BASE_DIR))
 
+from backend.services.response_cache import response_cache
+
 DB_PATH = BASE_DIR / "backend" / "cyber_chat.sqlite"
 
 def add_cyber_books():
@@ -154,6 +156,8 @@ def add_cyber_books():
         
         # Commit transaction
         conn.commit()
+        # Running API workers drop their cached /api/cyber responses
+        response_cache.invalidate("cyber")
         print("\n✓ Successfully added cybersecurity books to the database")
         
         # Display summary
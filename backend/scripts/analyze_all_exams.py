@@ -0,0 +1,66 @@
+"""
+Term-end item analysis of many exams, sharded across worker processes.
+
+Each worker reads the SQLite database over a read-only connection; metrics are
+written to question_metrics by this process and the per-exam statistics are
+merged into one summary:
+    python backend/scripts/analyze_all_exams.py                      # every exam with results
+    python backend/scripts/analyze_all_exams.py --exam 3 --exam 7 --workers 4 --no-update
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+
+def print_progress(job):
+    progress = job.to_dict()
+    print(
+        f"{progress['exams_done']}/{progress['total_exams']} exams  "
+        f"{progress['questions']} questions  "
+        f"{progress['exams_per_second']} exams/s  {progress['questions_per_second']} questions/s",
+        flush=True
+    )
+
+
+async def analyze(exam_ids, workers, shard_size, update_db):
+    from backend.database import db
+    from backend.services.batch_analysis import BatchAnalyzer, BatchAnalysisJob
+
+    analyzer = BatchAnalyzer(workers=workers, shard_size=shard_size)
+    await db.connect()
+    try:
+        if not exam_ids:
+            exam_ids = await analyzer.all_exam_ids()
+        job = BatchAnalysisJob(list(dict.fromkeys(exam_ids)), update_db)
+        print(f"exams={len(job.exam_ids)} workers={analyzer.workers} shard_size={analyzer.shard_size} update_db={update_db}")
+        await analyzer.run(job, on_progress=print_progress)
+    finally:
+        await db.close()
+
+    result = job.to_dict()
+    print(f"status={result['status']} analyzed={result['exams_analyzed']} elapsed={result['elapsed_seconds']}s")
+    if result["error"]:
+        print(f"error: {result['error']}")
+    print(json.dumps(result["summary"], indent=2))
+    return result["status"] == "done"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze the questions of many exams in parallel")
+    parser.add_argument("--exam", type=int, action="append", default=[], help="exam id (repeatable, default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=25, help="exams per worker task")
+    parser.add_argument("--no-update", action="store_true", help="do not write question_metrics")
+    args = parser.parse_args()
+    ok = asyncio.run(analyze(args.exam, args.workers, args.shard_size, not args.no_update))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark D1 queries with a fresh httpx client per query (old behaviour)
+against the pooled client owned by the Database singleton.
+
+Runs fully offline against backend/scripts/d1_standin.py:
+    python backend/scripts/bench_d1_client.py --queries 500 --concurrency 20 --latency-ms 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+
+async def _run(label: str, query, total: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            await query()
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<22} {total / elapsed:>9.1f} q/s   p50={p50:7.2f}ms   p99={p99:7.2f}ms")
+
+
+async def bench(total: int, concurrency: int):
+    import httpx
+    from backend.database.d1 import Database
+
+    db = Database()
+    sql = "SELECT id, name FROM subjects ORDER BY name LIMIT 5"
+
+    async def fresh_client_query():
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{db.base_url}/query", headers=db._get_headers(), json={"sql": sql}, timeout=30.0
+            )
+            response.raise_for_status()
+
+    async def pooled_query():
+        await db.fetch_all(sql)
+
+    await db.connect()
+    try:
+        await _run("fresh client/query", fresh_client_query, total, concurrency)
+        await _run("pooled client", pooled_query, total, concurrency)
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-query D1 HTTP clients")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+
+    from backend.scripts.d1_standin import serve
+
+    db_file = os.path.join(tempfile.mkdtemp(), "d1_bench.sqlite")
+    server = serve(db_file, port=args.port, latency_ms=args.latency_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    api_base = f"http://127.0.0.1:{args.port}/client/v4"
+    os.environ.update({
+        "ENABLE_CLOUDFLARE": "1",
+        "CLOUDFLARE_ACCOUNT_ID": "local",
+        "CLOUDFLARE_DATABASE_ID": "local",
+        "CLOUDFLARE_API_TOKEN": "local",
+        "CLOUDFLARE_API_BASE_URL": api_base,
+        "DATABASE_URL": f"sqlite:///{db_file}",
+    })
+
+    print(f"D1 stand-in at {api_base}  queries={args.queries} concurrency={args.concurrency} latency_ms={args.latency_ms}")
+    try:
+        asyncio.run(bench(args.queries, args.concurrency))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
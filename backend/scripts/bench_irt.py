@@ -0,0 +1,70 @@
+"""
+Benchmark the IRT calibrator on simulated responses: cold start, warm start
+from the previous estimates, and recovery of the generating parameters.
+
+Synthetic data only, no database needed:
+    python backend/scripts/bench_irt.py --students 2000 --questions 50 --model 2pl
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+
+def simulate(students: int, questions: int, model: str, missing: float, seed: int):
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(size=students)
+    difficulty = rng.normal(size=questions)
+    discrimination = rng.uniform(0.5, 2.0, size=questions) if model == "2pl" else np.ones(questions)
+    prob = 1 / (1 + np.exp(-discrimination * (ability[:, None] - difficulty)))
+    X = (rng.random((students, questions)) < prob).astype(np.float64)
+    X[rng.random(X.shape) < missing] = np.nan
+    return X, ability, difficulty, discrimination
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Rasch / 2PL calibration")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--model", choices=["rasch", "2pl"], default="rasch")
+    parser.add_argument("--missing", type=float, default=0.0, help="fraction of unanswered cells")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    from backend.services.irt import IRTCalibrator
+
+    X, ability, difficulty, discrimination = simulate(args.students, args.questions, args.model, args.missing, args.seed)
+    responses = int((~np.isnan(X)).sum())
+    print(f"model={args.model} students={args.students} questions={args.questions} responses={responses}")
+    calibrator = IRTCalibrator(args.model)
+
+    t0 = time.perf_counter()
+    fit = calibrator.fit(X)
+    cold = time.perf_counter() - t0
+    print(f"{'cold start':<11} {cold:7.3f}s  iterations={fit.iterations} converged={fit.converged}")
+
+    # Warm start after 5% new students, as after a day of submissions
+    extra, *_ = simulate(max(1, args.students // 20), args.questions, args.model, args.missing, args.seed + 1)
+    X2 = np.vstack([X, extra])
+    ability0 = np.concatenate([fit.ability, np.full(len(extra), np.nan)])
+    t0 = time.perf_counter()
+    warm_fit = calibrator.fit(X2, fit.difficulty, fit.discrimination, ability0)
+    warm = time.perf_counter() - t0
+    print(f"{'warm start':<11} {warm:7.3f}s  iterations={warm_fit.iterations} converged={warm_fit.converged}")
+
+    corr_b = np.corrcoef(fit.difficulty, difficulty)[0, 1]
+    corr_theta = np.corrcoef(fit.ability, ability)[0, 1]
+    print(f"recovery: corr(difficulty)={corr_b:.3f} corr(ability)={corr_theta:.3f}", end="")
+    if args.model == "2pl":
+        print(f" corr(discrimination)={np.corrcoef(fit.discrimination, discrimination)[0, 1]:.3f}")
+    else:
+        print()
+
+
+if __name__ == "__main__":
+    main()
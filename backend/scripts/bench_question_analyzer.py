@@ -0,0 +1,94 @@
+"""
+Benchmark classical item analysis: per-question QuestionAnalyzer.analyze_question
+against the vectorized QuestionAnalyzer.analyze_exam_arrays, and check that
+both produce identical QuestionMetrics.
+
+Synthetic data only, no database needed:
+    python backend/scripts/bench_question_analyzer.py --students 10000 --questions 100
+"""
+import argparse
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+
+def make_data(students: int, questions: int, seed: int):
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(size=students)
+    difficulty = rng.normal(size=questions)
+    prob = 1 / (1 + np.exp(-(ability[:, None] - difficulty[None, :])))
+    correct = rng.random((students, questions)) < prob
+
+    question_rows = [
+        {"id": q + 1, "question_type": "true_false" if q % 5 == 0 else "multiple_choice"}
+        for q in range(questions)
+    ]
+    student_ids = np.arange(1, students + 1, dtype=np.int64)
+    # Integer scores so the ranking has plenty of ties
+    scores = correct.sum(axis=1).astype(np.float64)
+    results = {"result_id": student_ids.copy(), "student_id": student_ids, "total_score": scores}
+    answers = {
+        "result_id": np.repeat(student_ids, questions),
+        "student_id": np.repeat(student_ids, questions),
+        "question_id": np.tile(np.arange(1, questions + 1, dtype=np.int64), students),
+        "is_correct": correct.ravel(),
+    }
+    return question_rows, results, answers
+
+
+def per_question(analyzer, question_rows, results, answers):
+    exam_results = [
+        {"student_id": s, "total_score": t}
+        for s, t in zip(results["student_id"].tolist(), results["total_score"].tolist())
+    ]
+    by_question = {}
+    for s, q, c in zip(answers["student_id"].tolist(), answers["question_id"].tolist(), answers["is_correct"].tolist()):
+        by_question.setdefault(q, []).append({"student_id": s, "question_id": q, "is_correct": c})
+    return [
+        analyzer.analyze_question(q["id"], q["question_type"], by_question[q["id"]], exam_results)
+        for q in question_rows if by_question.get(q["id"])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-question vs vectorized item analysis")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from backend.models.question_analyzer import QuestionAnalyzer
+
+    analyzer = QuestionAnalyzer()
+    question_rows, results, answers = make_data(args.students, args.questions, args.seed)
+    print(f"students={args.students} questions={args.questions} answers={len(answers['question_id'])}")
+
+    t0 = time.perf_counter()
+    old = per_question(analyzer, question_rows, results, answers)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = analyzer.analyze_exam_arrays(question_rows, results, answers)
+    t_new = time.perf_counter() - t0
+
+    def comparable(m):
+        data = asdict(m)
+        data.pop("last_analyzed")
+        return data
+
+    identical = [comparable(m) for m in old] == [comparable(m) for m in new]
+    print(f"{'per-question':<14} {t_old:8.3f}s")
+    print(f"{'vectorized':<14} {t_new:8.3f}s   speedup x{t_old / t_new:.1f}")
+    print(f"identical metrics: {identical}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark post search: the old LIKE '%x%' scan against the FTS5 index
+(BM25-ranked), on a throw-away SQLite file with generated Vietnamese posts.
+
+    python backend/scripts/bench_search.py --posts 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+DATABASE_DIR = BASE_DIR / "backend" / "database"
+
+WORDS = (
+    "toán học đại số hình học giải tích xác suất thống kê vật lý hóa học sinh học lịch sử địa lý "
+    "ngữ văn tiếng anh tin học lập trình mạng máy tính bảo mật an toàn thông tin mật mã đề thi "
+    "kiểm tra ôn tập bài giảng chương phương trình bất đẳng thức hàm số đạo hàm tích phân ma trận "
+    "véc tơ điện từ quang học cơ học nhiệt động lực học phân tử nguyên tử tế bào di truyền"
+).split()
+
+QUERIES = ["đại số", "dai so", "phương trình", "bảo mật mạng", "tích phân", "điện từ"]
+
+ONSETS = ["b", "c", "ch", "d", "đ", "g", "h", "k", "kh", "l", "m", "n", "ng", "nh", "ph", "qu", "s", "t", "th", "tr", "v", "x"]
+RIMES = ["a", "à", "á", "ai", "am", "an", "ang", "ao", "ắc", "âm", "ân", "ât", "e", "ê", "ết", "i", "iên", "inh", "o", "ô", "ông", "ơ", "u", "ư", "ương", "uyên"]
+
+LIKE_SQL = """
+    SELECT p.id, p.title FROM posts p
+    WHERE (p.title LIKE ? OR p.description LIKE ? OR p.author LIKE ?)
+    ORDER BY p.created_at DESC LIMIT 20
+"""
+LIKE_COUNT_SQL = "SELECT COUNT(*) FROM posts p WHERE (p.title LIKE ? OR p.description LIKE ? OR p.author LIKE ?)"
+
+
+def _seed(db_path: str, posts: int, seed: int):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.executescript((DATABASE_DIR / "cyber_schema.sql").read_text(encoding="utf-8"))
+    conn.executescript((DATABASE_DIR / "migrations" / "20261017_add_fts_search.sql").read_text(encoding="utf-8"))
+
+    # Mostly filler syllables, with the subject words (and so the queries) in ~1 of 8 words
+    filler = [rng.choice(ONSETS) + rng.choice(RIMES) for _ in range(5000)]
+
+    def text(n):
+        return " ".join(rng.choice(WORDS) if rng.random() < 0.125 else rng.choice(filler) for _ in range(n))
+
+    batch = 10000
+    for start in range(0, posts, batch):
+        conn.executemany(
+            "INSERT INTO posts (title, author, date, subject, category, description, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (text(6), f"Giáo viên {i % 500}", "2026-01-01", "math", "doc", text(40),
+                 f"2026-{1 + i % 12:02d}-{1 + i % 28:02d} 08:00:00")
+                for i in range(start, min(posts, start + batch))
+            ]
+        )
+        conn.commit()
+    conn.close()
+
+
+def _time(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LIKE vs FTS5 post search")
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    from backend.services.search import POSTS_BM25, match_query
+
+    db_file = os.path.join(tempfile.mkdtemp(), "bench_search.sqlite")
+    t0 = time.perf_counter()
+    _seed(db_file, args.posts, args.seed)
+    print(f"sqlite={db_file} posts={args.posts} seeded in {time.perf_counter() - t0:.1f}s")
+
+    conn = sqlite3.connect(db_file)
+    fts_sql = f"""
+        SELECT p.id, p.title FROM posts p
+        JOIN (SELECT rowid AS id, {POSTS_BM25} AS rank FROM posts_fts WHERE posts_fts MATCH ?) s ON s.id = p.id
+        ORDER BY s.rank, p.id LIMIT 20
+    """
+    fts_count_sql = "SELECT COUNT(*) FROM posts p WHERE p.id IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)"
+
+    print(f"{'query':<20} {'LIKE page':>10} {'LIKE count':>11} {'FTS page':>10} {'FTS count':>10}   matches LIKE/FTS")
+    for query in QUERIES:
+        like = f"%{query}%"
+        like_page, _ = _time(lambda: conn.execute(LIKE_SQL, [like] * 3).fetchall(), args.repeat)
+        like_count, (like_n,) = _time(lambda: conn.execute(LIKE_COUNT_SQL, [like] * 3).fetchone(), args.repeat)
+        match = match_query(query)
+        fts_page, _ = _time(lambda: conn.execute(fts_sql, [match]).fetchall(), args.repeat)
+        fts_count, (fts_n,) = _time(lambda: conn.execute(fts_count_sql, [match]).fetchone(), args.repeat)
+        print(
+            f"{query:<20} {like_page * 1000:>8.1f}ms {like_count * 1000:>9.1f}ms "
+            f"{fts_page * 1000:>8.1f}ms {fts_count * 1000:>8.1f}ms   {like_n}/{fts_n}"
+        )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
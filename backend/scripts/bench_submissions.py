@@ -0,0 +1,107 @@
+"""
+Benchmark persisting exam submissions: one write per answer (old behaviour)
+against one transaction with a bulk insert of all answers.
+
+Runs against a throw-away SQLite file:
+    python backend/scripts/bench_submissions.py --submissions 500 --questions 40 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+DATABASE_DIR = BASE_DIR / "backend" / "database"
+
+INSERT_RESULT = """
+    INSERT INTO exam_results (exam_id, student_id, score, total_points, percentage, time_spent_seconds)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def _seed(db_path: str, questions: int):
+    conn = sqlite3.connect(db_path)
+    conn.executescript((DATABASE_DIR / "cyber_schema.sql").read_text(encoding="utf-8"))
+    for migration in sorted((DATABASE_DIR / "migrations").glob("*exam_results*.sql")):
+        conn.executescript(migration.read_text(encoding="utf-8"))
+    conn.execute("INSERT INTO exams (id, title, author, subject) VALUES (1, 'Bench', 'bench', 'bench')")
+    for i in range(1, questions + 1):
+        conn.execute(
+            "INSERT INTO questions (question_id, exam_id, question_text, question_type, points) VALUES (?, 1, ?, 'short_answer', 1)",
+            [i, f"q{i}"]
+        )
+    conn.commit()
+    conn.close()
+
+
+async def _run(label: str, submit, total: int, concurrency: int, questions: int):
+    sem = asyncio.Semaphore(concurrency)
+    answers = [[q, "answer", None, 1, 1.0] for q in range(1, questions + 1)]
+
+    async def one(student_id: int):
+        async with sem:
+            await submit(student_id, answers)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(1, total + 1)])
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<26} {total / elapsed:>9.1f} submissions/s   ({elapsed:.2f}s)")
+
+
+async def bench(total: int, concurrency: int, questions: int):
+    from backend.database import db
+
+    async def per_row(student_id, answers):
+        result_id = await db.insert(INSERT_RESULT, [1, student_id, 0, questions, 0, 60])
+        for q, text, option, correct, points in answers:
+            await db.insert(
+                """
+                INSERT INTO student_answers (exam_result_id, question_id, answer_text, option_id, is_correct, points_earned)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [result_id, q, text, option, correct, points]
+            )
+
+    async def one_transaction(student_id, answers):
+        async with db.transaction() as tx:
+            tx.execute(INSERT_RESULT, [1, student_id, 0, questions, 0, 60])
+            tx.executemany(
+                """
+                INSERT INTO student_answers (exam_result_id, question_id, answer_text, option_id, is_correct, points_earned)
+                VALUES ((SELECT MAX(id) FROM exam_results WHERE exam_id = ? AND student_id = ?), ?, ?, ?, ?, ?)
+                """,
+                [[1, student_id, *row] for row in answers]
+            )
+
+    await db.connect()
+    try:
+        await _run("one write per answer", per_row, total, concurrency, questions)
+        await _run("one transaction/submission", one_transaction, total, concurrency, questions)
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-row vs bulk submission inserts")
+    parser.add_argument("--submissions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(), "bench_submissions.sqlite")
+    _seed(db_file, args.questions)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    os.environ["ENABLE_CLOUDFLARE"] = "0"
+
+    print(f"sqlite={db_file} submissions={args.submissions} questions={args.questions} concurrency={args.concurrency}")
+    asyncio.run(bench(args.submissions, args.concurrency, args.questions))
+
+
+if __name__ == "__main__":
+    main()
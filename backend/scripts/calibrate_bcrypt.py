@@ -0,0 +1,93 @@
+"""
+Pick BCRYPT_ROUNDS for this machine: measure bcrypt hashes/sec per core at
+each cost, then the login latency with the bcrypt pool saturated, and
+recommend the highest cost whose p99 stays under the target (and, with
+--logins-per-second, whose pool capacity covers that rate).
+
+Run it on the deployment box, with the app's BCRYPT_WORKERS:
+    python backend/scripts/calibrate_bcrypt.py --target-p99-ms 500 --workers 4 --logins-per-second 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import bcrypt
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+PASSWORD = b"calibration-password"
+
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def time_check(hashed: bytes) -> float:
+    t0 = time.perf_counter()
+    bcrypt.checkpw(PASSWORD, hashed)
+    return time.perf_counter() - t0
+
+
+def measure(cost: int, samples: int, workers: int):
+    """Single-core check times, then login latencies (queue wait included) for a burst on the pool"""
+    hashed = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(rounds=cost))
+    single = [time_check(hashed) for _ in range(samples)]
+
+    # A burst of 2 logins per worker, all submitted at once, as at the start of a class
+    burst = max(samples, 2 * workers)
+    with ThreadPoolExecutor(workers) as pool:
+        t0 = time.perf_counter()
+        futures = [pool.submit(lambda: (time_check(hashed), time.perf_counter())) for _ in range(burst)]
+        finished = [f.result()[1] for f in futures]
+        wall = time.perf_counter() - t0
+    latencies = [end - t0 for end in finished]
+    return {
+        "cost": cost,
+        "mean_ms": statistics.mean(single) * 1000,
+        "per_core": 1 / statistics.mean(single),
+        "pool_per_sec": burst / wall,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the bcrypt cost (BCRYPT_ROUNDS)")
+    parser.add_argument("--min-cost", type=int, default=10)
+    parser.add_argument("--max-cost", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=8, help="single-core checks per cost")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="BCRYPT_WORKERS of the app")
+    parser.add_argument("--target-p99-ms", type=float, default=500.0, help="p99 login latency budget under a burst")
+    parser.add_argument("--logins-per-second", type=float, default=0.0, help="peak login rate the pool must sustain")
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} workers={args.workers} target_p99={args.target_p99_ms:.0f}ms "
+          f"logins_per_second={args.logins_per_second:g}")
+    print(f"{'cost':>4} {'mean':>9} {'hash/s/core':>12} {'pool/s':>8} {'p50':>9} {'p99':>9}")
+    recommended = None
+    for cost in range(args.min_cost, args.max_cost + 1):
+        r = measure(cost, args.samples, args.workers)
+        ok = r["p99_ms"] <= args.target_p99_ms and r["pool_per_sec"] >= args.logins_per_second
+        print(f"{cost:>4} {r['mean_ms']:7.1f}ms {r['per_core']:12.1f} {r['pool_per_sec']:8.1f} "
+              f"{r['p50_ms']:7.1f}ms {r['p99_ms']:7.1f}ms {'ok' if ok else ''}")
+        if ok:
+            recommended = cost
+        elif r["p99_ms"] > 2 * args.target_p99_ms:
+            break  # every further step doubles the cost
+
+    if recommended is None:
+        print(f"No cost >= {args.min_cost} meets the target; add workers/CPUs or relax the budget.")
+        sys.exit(1)
+    if recommended < 10:
+        print("Warning: a cost below 10 is weak against offline attacks.")
+    print(f"Recommended: BCRYPT_ROUNDS={recommended} (existing hashes are upgraded at their next login)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Local stand-in for the Cloudflare D1 REST API.
+
+Serves POST .../accounts/<account>/d1/database/<database>/query (single
+``{"sql", "params"}`` bodies and ``{"batch": [...]}`` bodies) backed by a
+local SQLite file so the D1 code path of backend.database.Database can be
+exercised and benchmarked offline.
+
+Usage:
+    python backend/scripts/d1_standin.py --db /tmp/d1.sqlite --port 8787 [--latency-ms 20]
+
+Then point the app at it:
+    ENABLE_CLOUDFLARE=1 CLOUDFLARE_ACCOUNT_ID=local CLOUDFLARE_DATABASE_ID=local \\
+    CLOUDFLARE_API_TOKEN=local CLOUDFLARE_API_BASE_URL=http://127.0.0.1:8787/client/v4 ...
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+SCHEMA_PATH = BASE_DIR / "backend" / "database" / "cyber_schema.sql"
+
+
+def _run_statement(conn: sqlite3.Connection, sql: str, params) -> dict:
+    t0 = time.perf_counter()
+    cursor = conn.execute(sql, params or [])
+    rows = [dict(r) for r in cursor.fetchall()] if cursor.description else []
+    return {
+        "results": rows,
+        "success": True,
+        "meta": {
+            "changes": cursor.rowcount if cursor.rowcount > 0 else 0,
+            "last_row_id": cursor.lastrowid,
+            "rows_read": len(rows),
+            "duration": (time.perf_counter() - t0) * 1000,
+        },
+    }
+
+
+def make_handler(db_path: str, latency_ms: float):
+    local = threading.local()
+
+    def get_conn() -> sqlite3.Connection:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(db_path, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            local.conn = conn
+        return conn
+
+    class D1Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            if not self.path.endswith("/query"):
+                self._reply(404, {"success": False, "errors": [{"message": "not found"}]})
+                return
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                self._reply(401, {"success": False, "errors": [{"message": "missing token"}]})
+                return
+            conn = get_conn()
+            try:
+                if "batch" in payload:
+                    # Batches run sequentially inside one transaction, like D1
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        result = [_run_statement(conn, s.get("sql", ""), s.get("params")) for s in payload["batch"]]
+                    except sqlite3.Error:
+                        conn.execute("ROLLBACK")
+                        raise
+                    conn.execute("COMMIT")
+                else:
+                    result = [_run_statement(conn, payload.get("sql", ""), payload.get("params"))]
+            except sqlite3.Error as e:
+                self._reply(400, {"success": False, "errors": [{"code": 7500, "message": str(e)}], "result": []})
+                return
+            self._reply(200, {"success": True, "errors": [], "messages": [], "result": result})
+
+    return D1Handler
+
+
+def serve(db_path: str, host: str = "127.0.0.1", port: int = 8787, latency_ms: float = 0.0) -> ThreadingHTTPServer:
+    """Create (but do not start) a stand-in server; schema is applied to new files"""
+    if not Path(db_path).exists():
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+        conn.close()
+    server = ThreadingHTTPServer((host, port), make_handler(db_path, latency_ms))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Cloudflare D1 /query stand-in")
+    parser.add_argument("--db", default=str(BASE_DIR / "backend" / "d1_standin.sqlite"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial per-request latency")
+    args = parser.parse_args()
+
+    server = serve(args.db, args.host, args.port, args.latency_ms)
+    print(f"D1 stand-in listening on http://{args.host}:{args.port}/client/v4 (db={args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(BASE_DIR))
 
+from backend.services.response_cache import response_cache
+
 DB_PATH = BASE_DIR / "backend" / "cyber_chat.sqlite"
 IMPORT_PATH = BASE_DIR / "backend" / "cyber_topics_export.json"
 
@@ -89,6 +91,8 @@ def import_topics():
                     )
         
         conn.commit()
+        # Running API workers drop their cached /api/cyber responses
+        response_cache.invalidate("cyber")
         print("Import completed successfully.")
         
     except Exception as e:
@@ -7,6 +7,8 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(BASE_DIR))
 
+from backend.services.response_cache import response_cache
+
 OLD_DB_PATH = BASE_DIR / "backend" / "db.sqlite"
 NEW_DB_PATH = BASE_DIR / "backend" / "cyber_chat.sqlite"
 SCHEMA_PATH = BASE_DIR / "backend" / "database" / "cyber_schema.sql"
@@ -100,6 +102,7 @@ def migrate():
     # 4. Cleanup
     conn_old.close()
     conn_new.close()
+    response_cache.invalidate("posts", "exams", "subjects", "cyber")
     print("Migration completed successfully.")
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+"""
+Nightly reconciliation of the incremental item statistics.
+
+Runs the exact QuestionAnalyzer recompute for each exam (updating
+question_metrics), rebuilds the running counters from stored answers and
+prints how far the incremental values had drifted:
+    python backend/scripts/reconcile_item_stats.py            # every exam with results
+    python backend/scripts/reconcile_item_stats.py --exam 3 --exam 7
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+
+async def reconcile(exam_ids):
+    from backend.database import db
+    from backend.services.item_stats import reconcile_exam
+
+    await db.connect()
+    try:
+        if not exam_ids:
+            rows = await db.fetch_all("SELECT DISTINCT exam_id FROM exam_results ORDER BY exam_id")
+            exam_ids = [r["exam_id"] for r in rows]
+        for exam_id in exam_ids:
+            report = await reconcile_exam(exam_id)
+            print(
+                f"exam={exam_id} questions={report['questions']} "
+                f"max_p_value_drift={report['max_p_value_drift']} "
+                f"max_discrimination_error={report['max_discrimination_error']} "
+                f"missing_counters={report['missing_counters']}"
+            )
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile incremental item statistics with an exact recompute")
+    parser.add_argument("--exam", type=int, action="append", default=[], help="exam id (repeatable, default: all)")
+    args = parser.parse_args()
+    asyncio.run(reconcile(args.exam))
+
+
+if __name__ == "__main__":
+    main()
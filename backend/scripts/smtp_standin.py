@@ -0,0 +1,155 @@
+"""
+Local SMTP stand-in for the email outbox.
+
+Speaks enough SMTP (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+for smtplib, keeps one session per connection so connection reuse is
+visible, and prints every accepted message. Recipients given with --reject
+are refused permanently (550), those given with --defer temporarily (451),
+to exercise the outbox's failure and retry paths.
+
+Usage:
+    python backend/scripts/smtp_standin.py --port 1025 [--reject bad@x.com] [--defer slow@x.com]
+
+Then point the app at it:
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=false EMAIL_POLL_INTERVAL=1 ...
+"""
+import argparse
+import socketserver
+import sys
+import threading
+import time
+from email import message_from_bytes, policy
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+
+def make_handler(server_state: dict):
+    class SMTPHandler(socketserver.StreamRequestHandler):
+        def _reply(self, line: str):
+            self.wfile.write(line.encode("ascii") + b"\r\n")
+
+        def _read_data(self) -> bytes:
+            lines = []
+            while True:
+                line = self.rfile.readline()
+                if not line or line in (b".\r\n", b".\n"):
+                    break
+                lines.append(line[1:] if line.startswith(b"..") else line)
+            return b"".join(lines)
+
+        def handle(self):
+            with server_state["lock"]:
+                server_state["connections"] += 1
+            self._reply("220 smtp-standin ESMTP ready")
+            mail_from, rcpt_to = None, []
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                arg = command[len(verb):].strip()
+                if verb == "EHLO":
+                    self._reply("250-smtp-standin")
+                    self._reply("250-8BITMIME")
+                    self._reply("250 AUTH PLAIN LOGIN")
+                elif verb == "HELO":
+                    self._reply("250 smtp-standin")
+                elif verb == "AUTH":
+                    self._reply("235 2.7.0 Authentication successful")
+                elif verb == "MAIL":
+                    mail_from, rcpt_to = arg.split(":", 1)[-1].strip(" <>"), []
+                    self._reply("250 OK")
+                elif verb == "RCPT":
+                    address = arg.split(":", 1)[-1].split()[0].strip("<>")
+                    if address in server_state["reject"]:
+                        self._reply("550 5.1.1 Mailbox unavailable")
+                    elif address in server_state["defer"]:
+                        self._reply("451 4.3.0 Try again later")
+                    else:
+                        rcpt_to.append(address)
+                        self._reply("250 OK")
+                elif verb == "DATA":
+                    if not rcpt_to:
+                        self._reply("503 5.5.1 No valid recipients")
+                        continue
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = self._read_data()
+                    if server_state["latency_ms"]:
+                        time.sleep(server_state["latency_ms"] / 1000.0)
+                    message = message_from_bytes(data, policy=policy.default)
+                    with server_state["lock"]:
+                        server_state["messages"].append({"from": mail_from, "to": rcpt_to, "message": message})
+                    if server_state["verbose"]:
+                        print(f"mail from={mail_from} to={','.join(rcpt_to)} subject={message['Subject']}")
+                    mail_from, rcpt_to = None, []
+                    self._reply("250 OK queued")
+                elif verb == "RSET":
+                    mail_from, rcpt_to = None, []
+                    self._reply("250 OK")
+                elif verb == "NOOP":
+                    self._reply("250 OK")
+                elif verb == "QUIT":
+                    self._reply("221 Bye")
+                    return
+                elif verb == "STARTTLS":
+                    self._reply("454 4.7.0 TLS not available")
+                else:
+                    self._reply("502 5.5.2 Command not recognized")
+
+    return SMTPHandler
+
+
+class SMTPStandin(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    @property
+    def messages(self):
+        return self.state["messages"]
+
+    @property
+    def connections(self) -> int:
+        return self.state["connections"]
+
+
+def serve(host: str = "127.0.0.1", port: int = 1025, reject=(), defer=(), latency_ms: float = 0.0,
+          verbose: bool = False) -> SMTPStandin:
+    """Create (but do not start) a stand-in server; port 0 picks a free port"""
+    state = {
+        "lock": threading.Lock(),
+        "messages": [],
+        "connections": 0,
+        "reject": set(reject),
+        "defer": set(defer),
+        "latency_ms": latency_ms,
+        "verbose": verbose,
+    }
+    server = SMTPStandin((host, port), make_handler(state))
+    server.state = state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--reject", action="append", default=[], help="Recipient refused with 550 (repeatable)")
+    parser.add_argument("--defer", action="append", default=[], help="Recipient refused with 451 (repeatable)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial per-message latency")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.reject, args.defer, args.latency_ms, verbose=True)
+    print(f"SMTP stand-in listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Tuple
+from backend.config import settings
+from backend.models.question_analyzer import (
+    QuestionAnalyzer, QuestionAnalysisService, QuestionDatabase, QuestionMetrics,
+)
+
+logger = logging.getLogger("batch_analysis")
+
+
+class ReadOnlySQLite:
+    """Minimal fetch_one/fetch_all over a read-only sqlite3 connection (one per worker process)"""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA query_only = ON")
+
+    async def fetch_all(self, sql: str, params: Optional[List] = None) -> List[Dict]:
+        return [dict(row) for row in self.conn.execute(sql, params or [])]
+
+    async def fetch_one(self, sql: str, params: Optional[List] = None) -> Optional[Dict]:
+        row = self.conn.execute(sql, params or []).fetchone()
+        return dict(row) if row else None
+
+    def close(self):
+        self.conn.close()
+
+
+def analyze_shard(
+    db_path: str, exam_ids: List[int], top_percent: float, bottom_percent: float
+) -> List[Tuple[int, List[QuestionMetrics]]]:
+    """Analyze a shard of exams in a worker process; metrics are written back by the parent"""
+    database = ReadOnlySQLite(db_path)
+    service = QuestionAnalysisService(QuestionDatabase(database), QuestionAnalyzer(top_percent, bottom_percent))
+
+    async def run():
+        return [(exam_id, await service.analyze_exam_questions(exam_id, update_db=False)) for exam_id in exam_ids]
+
+    try:
+        return asyncio.run(run())
+    finally:
+        database.close()
+
+
+class BatchAnalysisJob:
+    """Progress and merged statistics of one batch run"""
+
+    def __init__(self, exam_ids: List[int], update_db: bool):
+        self.id = uuid.uuid4().hex
+        self.exam_ids = exam_ids
+        self.update_db = update_db
+        self.status = "pending"
+        self.exams_done = 0
+        self.exams_analyzed = 0
+        self.questions = 0
+        self.summaries: List[Dict] = []
+        self.summary: Dict = {}
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self._started: Optional[float] = None
+        self._elapsed = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        if self._started is None:
+            return self._elapsed
+        return time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "update_db": self.update_db,
+            "total_exams": len(self.exam_ids),
+            "exams_done": self.exams_done,
+            "exams_analyzed": self.exams_analyzed,
+            "questions": self.questions,
+            "elapsed_seconds": round(elapsed, 3),
+            "exams_per_second": round(self.exams_done / elapsed, 2) if elapsed > 0 else 0.0,
+            "questions_per_second": round(self.questions / elapsed, 2) if elapsed > 0 else 0.0,
+            "created_at": self.created_at.isoformat(),
+            "summary": self.summary,
+            "error": self.error,
+        }
+
+
+class BatchAnalyzer:
+    """Classical item analysis of many exams, sharded across a process pool
+
+    Workers read the SQLite file over read-only connections and return their
+    QuestionMetrics; the parent merges the per-exam get_statistics summaries
+    and, with ``update_db``, writes question_metrics through the app database
+    (so the single-writer rule of the SQLite backend holds). Cloudflare D1 has
+    no file to share, so there the exams are analyzed in-process instead.
+    """
+
+    def __init__(self, workers: Optional[int] = None, shard_size: int = 25, max_jobs: int = 20):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.shard_size = max(1, shard_size)
+        self.max_jobs = max(1, max_jobs)
+        self._jobs: Dict[str, BatchAnalysisJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    async def all_exam_ids() -> List[int]:
+        from backend.database import db
+        rows = await db.fetch_all("SELECT DISTINCT exam_id FROM exam_results ORDER BY exam_id")
+        return [r["exam_id"] for r in rows]
+
+    def shards(self, exam_ids: List[int]) -> List[List[int]]:
+        return [exam_ids[i:i + self.shard_size] for i in range(0, len(exam_ids), self.shard_size)]
+
+    async def run(
+        self,
+        job: BatchAnalysisJob,
+        on_progress: Optional[Callable[[BatchAnalysisJob], None]] = None,
+    ) -> BatchAnalysisJob:
+        """Run a job to completion, updating its progress after every shard"""
+        from backend.database import db
+
+        analyzer = QuestionAnalyzer()
+        service = QuestionAnalysisService(QuestionDatabase(), analyzer)
+        job.status = "running"
+        job._started = time.perf_counter()
+        logger.info(f"batch_analysis_started job={job.id} exams={len(job.exam_ids)} workers={self.workers}")
+
+        async def collect(results: List[Tuple[int, List[QuestionMetrics]]]):
+            for exam_id, metrics_list in results:
+                if metrics_list:
+                    if job.update_db:
+                        await service.db.batch_update_questions(exam_id, metrics_list)
+                    job.summaries.append(service.get_statistics(metrics_list))
+                    job.exams_analyzed += 1
+                    job.questions += len(metrics_list)
+                job.exams_done += 1
+            job.summary = service.merge_statistics(job.summaries)
+            progress = job.to_dict()
+            logger.info(
+                f"batch_analysis_progress job={job.id} done={job.exams_done}/{len(job.exam_ids)} "
+                f"exams_per_second={progress['exams_per_second']}"
+            )
+            if on_progress:
+                on_progress(job)
+
+        try:
+            if db.use_d1:
+                for shard in self.shards(job.exam_ids):
+                    await collect([
+                        (exam_id, await service.analyze_exam_questions(exam_id, update_db=False))
+                        for exam_id in shard
+                    ])
+            else:
+                loop = asyncio.get_running_loop()
+                # spawn: the parent runs an event loop and database threads that must not be forked
+                pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                try:
+                    futures = [
+                        loop.run_in_executor(
+                            pool, analyze_shard, db.db_path, shard, analyzer.TOP_PERCENT, analyzer.BOTTOM_PERCENT
+                        )
+                        for shard in self.shards(job.exam_ids)
+                    ]
+                    for future in asyncio.as_completed(futures):
+                        await collect(await future)
+                finally:
+                    # Never block the event loop on a cancelled job's running shards
+                    pool.shutdown(wait=False, cancel_futures=True)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"batch_analysis_failed job={job.id} error={e}", exc_info=True)
+        finally:
+            job._elapsed = job.elapsed
+            job._started = None
+        logger.info(
+            f"batch_analysis_finished job={job.id} status={job.status} exams={job.exams_done} "
+            f"questions={job.questions} elapsed={job._elapsed:.2f}s"
+        )
+        return job
+
+    async def start(self, exam_ids: Optional[List[int]] = None, update_db: bool = True) -> BatchAnalysisJob:
+        """Start a background job (all exams with results by default)"""
+        if exam_ids is None:
+            exam_ids = await self.all_exam_ids()
+        job = BatchAnalysisJob(list(dict.fromkeys(exam_ids)), update_db)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self.run(job))
+        self._tasks[job.id].add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        # Keep the most recent jobs only
+        for old_id in list(self._jobs)[:-self.max_jobs]:
+            if old_id not in self._tasks:
+                del self._jobs[old_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchAnalysisJob]:
+        return self._jobs.get(job_id)
+
+    async def stop(self):
+        """Cancel running jobs (called from app lifespan)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+batch_analyzer = BatchAnalyzer(workers=settings.ANALYSIS_WORKERS, shard_size=settings.ANALYSIS_SHARD_SIZE)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple
+from backend.config import settings
+from backend.database import db
+
+logger = logging.getLogger("counters")
+
+FIELDS = ("views", "downloads")
+
+FLUSH_SQL = "UPDATE posts SET views = views + ?, downloads = downloads + ? WHERE id = ?"
+
+
+class _Shard:
+    __slots__ = ("lock", "deltas")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas: Dict[int, List[int]] = {}
+
+
+class PostCounters:
+    """Write-behind view/download counters for posts
+
+    ``incr`` only touches memory (one of ``shards`` dicts, chosen by post id,
+    each behind its own lock so threadpool endpoints do not contend). A
+    background task writes the accumulated deltas with one batched UPDATE
+    every ``flush_interval`` seconds, or sooner once ``flush_events``
+    increments are pending. Deltas of a failed flush are merged back and
+    retried; ``stop`` flushes whatever is left.
+    """
+
+    def __init__(self, shards: int = 16, flush_interval: float = 5.0, flush_events: int = 1000):
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self.flush_interval = flush_interval
+        self.flush_events = max(1, flush_events)
+        # Approximate (updated under different shard locks); only used to trigger early flushes
+        self._pending = 0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        # Metrics
+        self.events = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.flush_errors = 0
+        self.last_flush_seconds = 0.0
+
+    def _shard(self, post_id: int) -> _Shard:
+        return self._shards[post_id % len(self._shards)]
+
+    def incr(self, post_id: int, field: str, n: int = 1):
+        """Count ``n`` views or downloads of a post (no I/O; safe from any thread)"""
+        index = FIELDS.index(field)
+        shard = self._shard(post_id)
+        with shard.lock:
+            deltas = shard.deltas.get(post_id)
+            if deltas is None:
+                deltas = shard.deltas[post_id] = [0, 0]
+            deltas[index] += n
+            self._pending += 1
+            self.events += 1
+            pending = self._pending
+        if pending >= self.flush_events and self._wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # loop already closed; stop() flushes the rest
+
+    def pending(self, post_id: int) -> Dict[str, int]:
+        """Increments of a post not yet written to the database"""
+        shard = self._shard(post_id)
+        with shard.lock:
+            deltas = shard.deltas.get(post_id, (0, 0))
+            return {"views": deltas[0], "downloads": deltas[1]}
+
+    def apply_pending(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Add unflushed increments to a post row so readers see fresh counts"""
+        deltas = self.pending(post["id"])
+        for field in FIELDS:
+            post[field] = (post.get(field) or 0) + deltas[field]
+        return post
+
+    def _drain(self) -> List[Tuple[int, List[int]]]:
+        drained = []
+        for shard in self._shards:
+            with shard.lock:
+                deltas, shard.deltas = shard.deltas, {}
+            drained.extend(deltas.items())
+        self._pending = 0
+        return drained
+
+    def _restore(self, drained: List[Tuple[int, List[int]]]):
+        for post_id, (views, downloads) in drained:
+            shard = self._shard(post_id)
+            with shard.lock:
+                deltas = shard.deltas.setdefault(post_id, [0, 0])
+                deltas[0] += views
+                deltas[1] += downloads
+                self._pending += 1
+
+    async def flush(self) -> int:
+        """Write all pending increments in one batched UPDATE; returns the number of posts updated"""
+        async with self._flush_lock:
+            drained = self._drain()
+            if not drained:
+                return 0
+            t0 = time.perf_counter()
+            try:
+                await db.executemany(FLUSH_SQL, [[views, downloads, post_id] for post_id, (views, downloads) in drained])
+            except Exception as e:
+                self._restore(drained)
+                self.flush_errors += 1
+                logger.warning(f"counter_flush_failed posts={len(drained)} error={e}")
+                return 0
+            self.flushes += 1
+            self.rows_flushed += len(drained)
+            self.last_flush_seconds = time.perf_counter() - t0
+            logger.info(f"counter_flush posts={len(drained)} elapsed={self.last_flush_seconds:.3f}s")
+            return len(drained)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"counter_flush_error error={e}", exc_info=True)
+
+    async def start(self):
+        """Start the flush task (called from app lifespan)"""
+        if self._task:
+            return
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write everything still pending"""
+        if self._task:
+            # Not cancelled: a flush in progress must finish or restore its deltas
+            self._stopping = True
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._wake = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_events": self._pending,
+            "events": self.events,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "flush_errors": self.flush_errors,
+            "last_flush_seconds": round(self.last_flush_seconds, 4),
+        }
+
+
+post_counters = PostCounters(
+    shards=settings.COUNTER_SHARDS,
+    flush_interval=settings.COUNTER_FLUSH_INTERVAL,
+    flush_events=settings.COUNTER_FLUSH_EVENTS,
+)
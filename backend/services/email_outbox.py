@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional, List, Dict, Any, Tuple
+from backend.config import settings
+from backend.database import db
+
+logger = logging.getLogger("email_outbox")
+
+
+def build_message(to_email: str, subject: str, body: str, from_email: Optional[str] = None) -> MIMEMultipart:
+    """HTML email as sent by the outbox"""
+    msg = MIMEMultipart('alternative')
+    msg['From'] = from_email or settings.SMTP_FROM
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'html', 'utf-8'))
+    return msg
+
+
+class SMTPConnection:
+    """One SMTP session reused across messages (blocking; only used from the outbox's sender thread)"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        starttls: bool = True,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._server: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+        self.opened = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._server is not None
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.user:
+                server.login(self.user, self.password)
+        except BaseException:
+            server.close()
+            raise
+        self._server = server
+        self.opened += 1
+
+    def send(self, msg: MIMEMultipart):
+        if self._server is None:
+            self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle session: reconnect once
+            self.close()
+            self._connect()
+            self._server.send_message(msg)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+
+class EmailOutbox:
+    """Durable outgoing email queue in the local SQLite file
+
+    ``enqueue`` only writes a row, so request handlers never touch the
+    network. One worker per process claims due messages in batches and sends
+    them from a single sender thread over one reused SMTP connection (closed
+    after ``idle_timeout`` seconds without mail). Transient failures are
+    retried with exponential backoff up to ``max_attempts``; 5xx rejections
+    fail the message at once. Rows claimed by a worker that died are
+    re-queued after ``claim_timeout`` seconds, so delivery is at-least-once.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 20,
+        poll_interval: float = 5.0,
+        max_attempts: int = 6,
+        retry_base: float = 30.0,
+        retry_max: float = 3600.0,
+        idle_timeout: float = 30.0,
+        claim_timeout: float = 300.0,
+        retention_days: int = 7,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.idle_timeout = idle_timeout
+        self.claim_timeout = claim_timeout
+        self.retention_days = retention_days
+        self._connection: Optional[SMTPConnection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        # Metrics
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def configured(self) -> bool:
+        """SMTP credentials are set, or a plain (no STARTTLS) relay is used"""
+        return bool(settings.SMTP_HOST) and (
+            bool(settings.SMTP_USER and settings.SMTP_PASSWORD) or not settings.SMTP_STARTTLS
+        )
+
+    async def enqueue(self, to_email: str, subject: str, body: str, from_email: Optional[str] = None) -> Optional[int]:
+        """Queue a message for delivery; returns its outbox id, or None when email is not configured"""
+        if not self.configured:
+            logger.warning(f"email_not_configured to={to_email}")
+            return None
+        outbox_id = await db.local.insert(
+            "INSERT INTO email_outbox (to_email, from_email, subject, body) VALUES (?, ?, ?, ?)",
+            [to_email, from_email, subject, body]
+        )
+        self.enqueued += 1
+        if self._wake is not None:
+            self._wake.set()
+        return outbox_id
+
+    async def get(self, outbox_id: int) -> Optional[Dict[str, Any]]:
+        return await db.local.fetch_one(
+            """
+            SELECT id, to_email, subject, status, attempts, next_attempt_at, error, created_at, sent_at
+            FROM email_outbox WHERE id = ?
+            """,
+            [outbox_id]
+        )
+
+    async def start(self):
+        """Start the sender (called from app lifespan)"""
+        if self._task:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="smtp")
+        self._connection = SMTPConnection(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            settings.SMTP_USER,
+            settings.SMTP_PASSWORD,
+            starttls=settings.SMTP_STARTTLS,
+            timeout=settings.SMTP_TIMEOUT,
+        )
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"email_outbox_started configured={self.configured} batch_size={self.batch_size}")
+
+    async def stop(self):
+        """Let the in-flight batch finish, then close the SMTP connection"""
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._connection.close)
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _run(self):
+        last_prune = 0.0
+        while not self._stopping:
+            try:
+                rows = await self._claim()
+                if rows:
+                    await self._send(rows)
+                    continue
+                loop = asyncio.get_running_loop()
+                if self._connection.connected and time.monotonic() - self._connection.last_used > self.idle_timeout:
+                    await loop.run_in_executor(self._executor, self._connection.close)
+                if time.monotonic() - last_prune > 3600:
+                    await self.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"email_outbox_error error={e}", exc_info=True)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        # Same rule as the submission queue: a message whose sender died is retried until its attempts run out
+        await db.local.update(
+            """
+            UPDATE email_outbox
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = CASE WHEN attempts >= ? THEN 'sender lost while sending' ELSE error END,
+                claimed_at = NULL
+            WHERE status = 'sending' AND claimed_at < ?
+            """,
+            [self.max_attempts, self.max_attempts, now - self.claim_timeout]
+        )
+        return await db.local.fetch_all(
+            """
+            UPDATE email_outbox
+            SET status = 'sending', claimed_at = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM email_outbox WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?
+            )
+            RETURNING id, to_email, from_email, subject, body, attempts
+            """,
+            [now, now, self.batch_size]
+        )
+
+    def _deliver(self, rows: List[Dict[str, Any]]) -> List[Tuple[int, Optional[str], bool]]:
+        """Send a batch over the shared connection (sender thread); returns (id, error, permanent) per row"""
+        results: List[Tuple[int, Optional[str], bool]] = []
+        for i, row in enumerate(rows):
+            msg = build_message(row["to_email"], row["subject"], row["body"], row["from_email"])
+            try:
+                self._connection.send(msg)
+                results.append((row["id"], None, False))
+            except smtplib.SMTPRecipientsRefused as e:
+                codes = [code for code, _ in e.recipients.values()]
+                results.append((row["id"], f"recipient refused: {e.recipients}", all(c >= 500 for c in codes)))
+            except (smtplib.SMTPAuthenticationError, smtplib.SMTPConnectError) as e:
+                # Connection-level failure: the rest of the batch would fail the same way
+                self._connection.close()
+                results.extend((r["id"], f"smtp connect failed: {e}", False) for r in rows[i:])
+                break
+            except smtplib.SMTPResponseException as e:
+                results.append((row["id"], f"smtp {e.smtp_code}: {e.smtp_error!r}", 500 <= e.smtp_code < 600))
+            except (smtplib.SMTPException, OSError) as e:
+                self._connection.close()
+                results.extend((r["id"], f"smtp unavailable: {e}", False) for r in rows[i:])
+                break
+        return results
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.retry_max, self.retry_base * 2 ** max(0, attempts - 1))
+
+    async def _send(self, rows: List[Dict[str, Any]]):
+        results = await asyncio.get_running_loop().run_in_executor(self._executor, self._deliver, rows)
+        attempts = {row["id"]: row["attempts"] for row in rows}
+        now = time.time()
+        sent = [[row_id] for row_id, error, _ in results if error is None]
+        failures = [(row_id, error, permanent) for row_id, error, permanent in results if error is not None]
+        if sent:
+            await db.local.executemany(
+                """
+                UPDATE email_outbox SET status = 'sent', error = NULL, claimed_at = NULL, sent_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                sent
+            )
+        if failures:
+            await db.local.executemany(
+                """
+                UPDATE email_outbox
+                SET status = CASE WHEN ? OR attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    next_attempt_at = ?, error = ?, claimed_at = NULL
+                WHERE id = ?
+                """,
+                [
+                    [1 if permanent else 0, self.max_attempts, now + self._backoff(attempts[row_id]), error, row_id]
+                    for row_id, error, permanent in failures
+                ]
+            )
+        given_up = sum(1 for row_id, _, permanent in failures if permanent or attempts[row_id] >= self.max_attempts)
+        self.batches += 1
+        self.sent += len(sent)
+        self.failed += given_up
+        self.retried += len(failures) - given_up
+        if failures:
+            logger.warning(f"email_batch claimed={len(rows)} sent={len(sent)} retry={len(failures) - given_up} "
+                           f"failed={given_up} error={failures[0][1]}")
+        else:
+            logger.info(f"email_batch claimed={len(rows)} sent={len(sent)}")
+
+    async def prune(self):
+        """Drop delivered messages older than the retention period"""
+        await db.local.delete(
+            "DELETE FROM email_outbox WHERE status = 'sent' AND sent_at < datetime('now', ?)",
+            [f"-{int(self.retention_days)} days"]
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "batches": self.batches,
+            "smtp_connections": self._connection.opened if self._connection else 0,
+        }
+
+
+email_outbox = EmailOutbox(
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    poll_interval=settings.EMAIL_POLL_INTERVAL,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base=settings.EMAIL_RETRY_BASE,
+    retry_max=settings.EMAIL_RETRY_MAX,
+    idle_timeout=settings.EMAIL_SMTP_IDLE_TIMEOUT,
+    retention_days=settings.EMAIL_OUTBOX_RETENTION_DAYS,
+)
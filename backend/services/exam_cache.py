@@ -0,0 +1,164 @@
+import asyncio
+import glob
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Any, List, Callable
+from backend.config import settings
+from backend.database import db
+from backend.models import ExamResponse
+from backend.services.exams import load_exam
+from backend.services.response_cache import response_cache
+
+logger = logging.getLogger("exam_cache")
+
+SnapshotKey = Tuple[int, int]
+
+
+class ExamSnapshotCache:
+    """Pre-serialized exam bodies keyed by (exam id, exams.version)
+
+    Each lookup costs one primary-key read of ``version``; a miss runs the
+    full exam assembly once even when many students open the exam at the
+    same moment (concurrent misses wait on the same build). Snapshots can
+    optionally be shared between worker processes through ``disk_dir``.
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[SnapshotKey, bytes]" = OrderedDict()
+        self._inflight: Dict[SnapshotKey, asyncio.Future] = {}
+        # Bumped on invalidate so builds that raced an edit are not stored
+        self._generations: Dict[int, int] = {}
+        self._listeners: List[Callable[[int], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: SnapshotKey) -> str:
+        return os.path.join(self.disk_dir, f"exam-{key[0]}-v{key[1]}.json")
+
+    def _remember(self, key: SnapshotKey, body: bytes):
+        # Drop snapshots of older versions of the same exam
+        for old in [k for k in self._entries if k[0] == key[0] and k != key]:
+            del self._entries[old]
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: SnapshotKey) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"exam_snapshot_disk_read_error exam_id={key[0]} error={e}")
+            return None
+
+    def _write_disk(self, key: SnapshotKey, body: bytes):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"exam_snapshot_disk_write_error exam_id={key[0]} error={e}")
+
+    async def _build(self, key: SnapshotKey) -> Optional[bytes]:
+        generation = self._generations.get(key[0], 0)
+        body = self._read_disk(key)
+        if body is None:
+            exam = await load_exam(key[0])
+            if exam is None:
+                return None
+            body = ExamResponse.model_validate(exam).model_dump_json().encode("utf-8")
+            self.builds += 1
+            if self._generations.get(key[0], 0) != generation:
+                return body
+            self._write_disk(key, body)
+        if self._generations.get(key[0], 0) == generation:
+            self._remember(key, body)
+        return body
+
+    async def get(self, exam_id: int) -> Optional[bytes]:
+        """JSON body of the exam (ExamResponse), or None if it does not exist"""
+        row = await db.fetch_one("SELECT version FROM exams WHERE id = ?", [exam_id])
+        if not row:
+            return None
+        key = (exam_id, row["version"])
+        body = self._entries.get(key)
+        if body is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return body
+        self.misses += 1
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The request running the build was cancelled, not this one: build again
+                if pending.done():
+                    return await self.get(exam_id)
+                raise
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body = await self._build(key)
+            future.set_result(body)
+            return body
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a build nobody else waited on does not log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def subscribe(self, callback: Callable[[int], None]):
+        """Call ``callback(exam_id)`` whenever an exam is invalidated"""
+        self._listeners.append(callback)
+
+    def invalidate(self, exam_id: int):
+        """Forget every snapshot of an exam (memory and disk)"""
+        self._generations[exam_id] = self._generations.get(exam_id, 0) + 1
+        for key in [k for k in self._inflight if k[0] == exam_id]:
+            del self._inflight[key]
+        for key in [k for k in self._entries if k[0] == exam_id]:
+            del self._entries[key]
+        if self.disk_dir:
+            for path in glob.glob(os.path.join(self.disk_dir, f"exam-{exam_id}-*.json")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        for callback in self._listeners:
+            callback(exam_id)
+        logger.info(f"exam_snapshot_invalidated exam_id={exam_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "builds": self.builds,
+        }
+
+
+exam_snapshots = ExamSnapshotCache(
+    max_entries=settings.EXAM_SNAPSHOT_CACHE_SIZE,
+    disk_dir=settings.EXAM_SNAPSHOT_DIR,
+)
+# Exam edits and deletes also change the cached public exam listings
+exam_snapshots.subscribe(lambda exam_id: response_cache.invalidate("exams"))
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Optional, List, Dict, Any
+from backend.database import db
+
+EXAM_SELECT = (
+    "SELECT e.id, u.fullname, e.title, e.author, e.subject, e.file_url, "
+    "e.answer_file_url, e.created_by, e.created_at, e.updated_at "
+    "FROM exams e LEFT JOIN users u ON u.id = e.created_by"
+)
+
+async def load_exam(exam_id: int, created_by: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Load an exam with its ordered questions and their options.
+
+    Always three queries (exam, questions, options) regardless of the number
+    of questions; options are grouped per question in memory.
+    """
+    if created_by is None:
+        exam = await db.fetch_one(f"{EXAM_SELECT} WHERE e.id = ?", [exam_id])
+    else:
+        exam = await db.fetch_one(f"{EXAM_SELECT} WHERE e.id = ? AND e.created_by = ?", [exam_id, created_by])
+    if not exam:
+        return None
+
+    questions_rows, option_rows = await asyncio.gather(
+        db.fetch_all(
+            """
+            SELECT q.question_id, q.question_text, q.question_type, q.points, eq.order_index
+            FROM exam_questions eq
+            JOIN questions q ON q.question_id = eq.question_id
+            WHERE eq.exam_id = ?
+            ORDER BY eq.order_index ASC
+            """,
+            [exam_id]
+        ),
+        db.fetch_all(
+            """
+            SELECT qo.question_id, qo.option_id, qo.option_text
+            FROM exam_questions eq
+            JOIN questions q ON q.question_id = eq.question_id
+            JOIN question_options qo ON qo.question_id = eq.question_id
+            WHERE eq.exam_id = ? AND q.question_type = 'multiple_choice'
+            ORDER BY qo.question_id, qo.option_id
+            """,
+            [exam_id]
+        ),
+    )
+
+    options_by_question: Dict[int, List[Dict[str, Any]]] = {}
+    for opt in option_rows:
+        options_by_question.setdefault(opt["question_id"], []).append(
+            {"option_id": opt["option_id"], "option_text": opt["option_text"]}
+        )
+
+    questions: List[Dict[str, Any]] = []
+    for row in questions_rows:
+        questions.append({
+            "question_id": row["question_id"],
+            "question_text": row["question_text"],
+            "question_type": row["question_type"],
+            "points": row["points"],
+            "order_index": row["order_index"],
+            "options": options_by_question.get(row["question_id"], []) if row["question_type"] == "multiple_choice" else [],
+        })
+
+    exam["questions"] = questions
+    return exam
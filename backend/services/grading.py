@@ -0,0 +1,215 @@
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from backend.database import db
+from backend.services.exam_cache import exam_snapshots
+
+TYPE_OTHER = 0
+TYPE_MULTIPLE_CHOICE = 1
+TYPE_TEXT = 2  # true_false and short_answer
+
+
+async def fetch_answer_key(exam_id: int) -> List[Dict[str, Any]]:
+    """Correct option per MCQ and expected text per true/false or short-answer question"""
+    mcq_answers, tf_sa_answers = await asyncio.gather(
+        db.fetch_all(
+            """
+            SELECT qo.question_id, qo.option_id AS correct_option_id
+            FROM question_options qo
+            JOIN questions q ON q.question_id = qo.question_id
+            WHERE q.exam_id = ? AND q.question_type = 'multiple_choice' AND qo.is_correct = 1
+            """,
+            [exam_id]
+        ),
+        db.fetch_all(
+            """
+            SELECT qa.question_id, qa.correct_answer
+            FROM question_answers qa
+            JOIN questions q ON q.question_id = qa.question_id
+            WHERE q.exam_id = ? AND q.question_type IN ('true_false','short_answer')
+            """,
+            [exam_id]
+        ),
+    )
+    answers: List[Dict[str, Any]] = []
+    for row in mcq_answers:
+        answers.append({
+            "question_id": row["question_id"],
+            "correct_option_id": row["correct_option_id"]
+        })
+    for row in tf_sa_answers:
+        answers.append({
+            "question_id": row["question_id"],
+            "correct_answer": row["correct_answer"]
+        })
+    return answers
+
+
+def _normalize(text: str) -> str:
+    return text.strip().lower()
+
+
+class CompiledAnswerKey:
+    """An exam's answer key laid out as arrays indexed by question position
+
+    Questions are sorted by id so a submission's question ids map to
+    positions with one ``searchsorted``. Expected texts are interned to
+    integer codes, so grading compares integers only.
+    """
+
+    def __init__(self, exam_id: int, questions: List[Dict[str, Any]], answers: List[Dict[str, Any]]):
+        self.exam_id = exam_id
+        # Later key rows win, as they did with the old dict-based key
+        key = {a["question_id"]: a for a in answers}
+        by_id = {q["question_id"]: q for q in questions}
+        # Summed in query order so float totals match the old loop bit for bit
+        self.total_points = sum(q["points"] for q in by_id.values())
+        questions = sorted(by_id.values(), key=lambda q: q["question_id"])
+        n = len(questions)
+
+        self.question_ids = np.fromiter((q["question_id"] for q in questions), dtype=np.int64, count=n)
+        self.types = np.zeros(n, dtype=np.int8)
+        self.correct_option = np.full(n, -1, dtype=np.int64)
+        self.correct_text = np.full(n, -1, dtype=np.int64)
+        # Questions without a usable key are never graded correct, whatever was submitted
+        self.has_key = np.zeros(n, dtype=bool)
+        self.points = np.zeros(n, dtype=np.float64)
+        # Raw values are kept for the response so int points stay ints
+        self.points_raw: List[Any] = [q["points"] for q in questions]
+        self.text_codes: Dict[str, int] = {}
+
+        for i, q in enumerate(questions):
+            self.points[i] = q["points"]
+            entry = key.get(q["question_id"])
+            if q["question_type"] == "multiple_choice":
+                self.types[i] = TYPE_MULTIPLE_CHOICE
+                if entry and entry.get("correct_option_id"):
+                    self.correct_option[i] = entry["correct_option_id"]
+                    self.has_key[i] = True
+            elif q["question_type"] in ("true_false", "short_answer"):
+                self.types[i] = TYPE_TEXT
+                if entry and entry.get("correct_answer"):
+                    norm = _normalize(entry["correct_answer"])
+                    self.correct_text[i] = self.text_codes.setdefault(norm, len(self.text_codes))
+                    self.has_key[i] = True
+
+    def grade(self, answers: List[Any]) -> Tuple[float, List[Dict[str, Any]]]:
+        """Score a list of AnswerSubmission-like objects in one vectorized pass"""
+        n = len(answers)
+        if n == 0:
+            return 0.0, []
+        qids = np.fromiter((a.question_id for a in answers), dtype=np.int64, count=n)
+        # 0 and None both mean "no option selected"
+        options = np.fromiter((a.option_id or 0 for a in answers), dtype=np.int64, count=n)
+        texts = np.fromiter(
+            (self.text_codes.get(_normalize(a.answer_text), -2) if a.answer_text else -3 for a in answers),
+            dtype=np.int64, count=n
+        )
+
+        if len(self.question_ids):
+            pos = np.minimum(np.searchsorted(self.question_ids, qids), len(self.question_ids) - 1)
+            known = self.question_ids[pos] == qids
+            types = self.types[pos]
+            mc_ok = (types == TYPE_MULTIPLE_CHOICE) & (options != 0) & (self.correct_option[pos] == options)
+            text_ok = (types == TYPE_TEXT) & (self.correct_text[pos] == texts)
+            correct = known & self.has_key[pos] & (mc_ok | text_ok)
+            earned = np.where(correct, self.points[pos], 0.0)
+        else:
+            pos = np.zeros(n, dtype=np.int64)
+            known = correct = np.zeros(n, dtype=bool)
+            earned = np.zeros(n, dtype=np.float64)
+
+        # cumsum adds left to right, matching the old running total exactly
+        score = float(np.cumsum(earned)[-1])
+
+        details = []
+        for i, a in enumerate(answers):
+            q_points = self.points_raw[pos[i]] if known[i] else 0
+            is_correct = bool(correct[i])
+            details.append({
+                "question_id": a.question_id,
+                "answer_text": a.answer_text,
+                "option_id": a.option_id,
+                "is_correct": is_correct,
+                "points_earned": q_points if is_correct else 0.0,
+                "total_points": q_points
+            })
+        return score, details
+
+
+class AnswerKeyCache:
+    """Compiled answer keys keyed by (exam id, exams.version)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[int, int], CompiledAnswerKey]" = OrderedDict()
+        self._inflight: Dict[Tuple[int, int], asyncio.Future] = {}
+        self.hits = 0
+        self.compiles = 0
+
+    async def _compile(self, exam_id: int) -> CompiledAnswerKey:
+        questions, answers = await asyncio.gather(
+            db.fetch_all(
+                """
+                SELECT q.question_id, q.points, q.question_type
+                FROM exam_questions eq
+                JOIN questions q ON q.question_id = eq.question_id
+                WHERE eq.exam_id = ?
+                """,
+                [exam_id]
+            ),
+            fetch_answer_key(exam_id),
+        )
+        self.compiles += 1
+        return CompiledAnswerKey(exam_id, questions, answers)
+
+    async def get(self, exam_id: int, version: int) -> CompiledAnswerKey:
+        """Compiled key for the given version of an exam (compiled at most once per version)"""
+        key = (exam_id, version)
+        compiled = self._entries.get(key)
+        if compiled is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return compiled
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The request running the build was cancelled, not this one: build again
+                if pending.done():
+                    return await self.get(exam_id, version)
+                raise
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            compiled = await self._compile(exam_id)
+            if self._inflight.get(key) is future:
+                for old in [k for k in self._entries if k[0] == exam_id]:
+                    del self._entries[old]
+                self._entries[key] = compiled
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            future.set_result(compiled)
+            return compiled
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate(self, exam_id: int):
+        for key in [k for k in self._entries if k[0] == exam_id]:
+            del self._entries[key]
+        for key in [k for k in self._inflight if k[0] == exam_id]:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "compiles": self.compiles}
+
+
+answer_keys = AnswerKeyCache()
+exam_snapshots.subscribe(answer_keys.invalidate)
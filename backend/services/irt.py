@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+import numpy as np
+from backend.database import db
+from backend.models.question_analyzer import QuestionDatabase
+
+logger = logging.getLogger("irt")
+
+MODELS = ("rasch", "2pl")
+
+
+def _expit(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    p = np.clip(p, 0.02, 0.98)
+    return np.log(p / (1 - p))
+
+
+def response_matrix(answers: Dict[str, np.ndarray], question_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Students × questions correctness matrix (NaN = not answered) from answer columns
+
+    A student who retook the exam is represented by their latest response to
+    each question (highest exam_result_id).
+    """
+    order = np.argsort(question_ids, kind="stable")
+    sorted_ids = question_ids[order]
+    n_questions = len(question_ids)
+    if n_questions == 0 or len(answers["question_id"]) == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, n_questions))
+    pos = np.minimum(np.searchsorted(sorted_ids, answers["question_id"]), n_questions - 1)
+    known = sorted_ids[pos] == answers["question_id"]
+    col = order[pos[known]]
+    student_ids, row = np.unique(answers["student_id"][known], return_inverse=True)
+    correct = answers["is_correct"][known].astype(np.float64)
+
+    # Keep the last occurrence of each cell in exam_result_id order
+    by_result = np.argsort(answers["result_id"][known], kind="stable")[::-1]
+    cell = row[by_result] * n_questions + col[by_result]
+    _, first = np.unique(cell, return_index=True)
+    keep = by_result[first]
+
+    X = np.full((len(student_ids), n_questions), np.nan)
+    X[row[keep], col[keep]] = correct[keep]
+    return student_ids, X
+
+
+@dataclass
+class IRTFit:
+    """Estimates of one calibration, aligned with the matrix rows/columns"""
+    model: str
+    difficulty: np.ndarray
+    discrimination: np.ndarray
+    difficulty_se: np.ndarray
+    ability: np.ndarray
+    ability_se: np.ndarray
+    iterations: int
+    converged: bool
+    log_likelihood: float
+
+
+class IRTCalibrator:
+    """Joint maximum likelihood for the Rasch and 2PL models, vectorized over the response matrix
+
+    Abilities and item parameters are updated by alternating Newton steps over
+    every student / item at once. Weak normal priors on ability and difficulty
+    keep perfect and zero scores finite (plain JML would diverge for them).
+    Rasch is identified by mean difficulty 0, 2PL by abilities with mean 0 and
+    standard deviation 1.
+    """
+
+    def __init__(
+        self,
+        model: str = "rasch",
+        max_iter: int = 200,
+        tol: float = 1e-4,
+        ability_prior_sd: float = 3.0,
+        difficulty_prior_sd: float = 5.0,
+        discrimination_bounds: Tuple[float, float] = (0.1, 4.0),
+    ):
+        if model not in MODELS:
+            raise ValueError(f"Unknown IRT model: {model}")
+        self.model = model
+        self.max_iter = max_iter
+        self.tol = tol
+        self.ability_prior = 1.0 / ability_prior_sd ** 2
+        self.difficulty_prior = 1.0 / difficulty_prior_sd ** 2
+        self.discrimination_bounds = discrimination_bounds
+
+    def fit(
+        self,
+        X: np.ndarray,
+        difficulty: Optional[np.ndarray] = None,
+        discrimination: Optional[np.ndarray] = None,
+        ability: Optional[np.ndarray] = None,
+    ) -> IRTFit:
+        """Calibrate a students × items matrix of 0/1 (NaN = missing); NaN starting values are initialised from the data"""
+        mask = ~np.isnan(X)
+        m = mask.astype(np.float64)
+        x = np.where(mask, X, 0.0)
+        n_persons, n_items = X.shape
+
+        # Starting values: logits of the observed proportions, overridden by a previous calibration
+        item_p = x.sum(axis=0) / np.maximum(m.sum(axis=0), 1)
+        person_p = x.sum(axis=1) / np.maximum(m.sum(axis=1), 1)
+        b = -_logit(item_p)
+        theta = _logit(person_p)
+        a = np.ones(n_items)
+        if difficulty is not None:
+            b = np.where(np.isnan(difficulty), b, difficulty)
+        if ability is not None:
+            theta = np.where(np.isnan(ability), theta, ability)
+        if self.model == "2pl" and discrimination is not None:
+            a = np.where(np.isnan(discrimination), a, discrimination)
+        a_min, a_max = self.discrimination_bounds
+
+        converged = False
+        iterations = 0
+        for iterations in range(1, self.max_iter + 1):
+            previous = (theta.copy(), b.copy(), a.copy())
+
+            # Abilities
+            p = _expit(a * (theta[:, None] - b))
+            residual = m * (x - p)
+            info = m * p * (1 - p)
+            step_theta = np.clip(
+                (residual @ a - theta * self.ability_prior) / (info @ (a * a) + self.ability_prior), -1, 1
+            )
+            theta = theta + step_theta
+
+            # Difficulties
+            p = _expit(a * (theta[:, None] - b))
+            residual = m * (x - p)
+            info = m * p * (1 - p)
+            step_b = np.clip(
+                (-a * residual.sum(axis=0) - b * self.difficulty_prior)
+                / (a * a * info.sum(axis=0) + self.difficulty_prior), -1, 1
+            )
+            b = b + step_b
+
+            if self.model == "2pl":
+                p = _expit(a * (theta[:, None] - b))
+                dev = theta[:, None] - b
+                residual = m * (x - p)
+                info = m * p * (1 - p)
+                step_a = np.clip(
+                    (residual * dev).sum(axis=0) / ((info * dev * dev).sum(axis=0) + 1e-9), -0.5, 0.5
+                )
+                a = np.clip(a + step_a, a_min, a_max)
+                # Scale: abilities with mean 0 and sd 1
+                mu, sigma = theta.mean(), theta.std()
+                if sigma > 0:
+                    theta = (theta - mu) / sigma
+                    b = (b - mu) / sigma
+                    a = np.clip(a * sigma, a_min, a_max)
+            else:
+                shift = b.mean()
+                b = b - shift
+                theta = theta - shift
+
+            # Compare after rescaling: the ability prior and the identification
+            # constraint can pull in opposite directions by a constant shift
+            change = max(np.abs(new - old).max(initial=0) for new, old in zip((theta, b, a), previous))
+            if change < self.tol:
+                converged = True
+                break
+
+        p = _expit(a * (theta[:, None] - b))
+        info = m * p * (1 - p)
+        with np.errstate(divide="ignore"):
+            log_likelihood = float(np.sum(m * (x * np.log(p) + (1 - x) * np.log1p(-p))))
+        return IRTFit(
+            model=self.model,
+            difficulty=b,
+            discrimination=a,
+            difficulty_se=1 / np.sqrt(a * a * info.sum(axis=0) + self.difficulty_prior),
+            ability=theta,
+            ability_se=1 / np.sqrt(info @ (a * a) + self.ability_prior),
+            iterations=iterations,
+            converged=converged,
+            log_likelihood=log_likelihood,
+        )
+
+
+async def _previous_calibration(exam_id: int, model: str) -> Tuple[Dict[int, Tuple[float, float]], Dict[int, float]]:
+    items, abilities = await asyncio.gather(
+        db.fetch_all(
+            "SELECT question_id, difficulty, discrimination FROM irt_item_params WHERE exam_id = ? AND model = ?",
+            [exam_id, model]
+        ),
+        db.fetch_all(
+            "SELECT student_id, ability FROM irt_abilities WHERE exam_id = ? AND model = ?",
+            [exam_id, model]
+        ),
+    )
+    return (
+        {r["question_id"]: (r["difficulty"], r["discrimination"]) for r in items},
+        {r["student_id"]: r["ability"] for r in abilities},
+    )
+
+
+async def _save_calibration(
+    exam_id: int, fit: IRTFit, question_ids: np.ndarray, student_ids: np.ndarray, X: np.ndarray
+):
+    calibrated_at = datetime.now().isoformat(sep=" ")
+    answered = ~np.isnan(X)
+    async with db.transaction() as tx:
+        tx.executemany(
+            """
+            INSERT INTO irt_item_params (exam_id, question_id, model, difficulty, discrimination, difficulty_se, responses, calibrated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (exam_id, question_id, model) DO UPDATE SET
+                difficulty = excluded.difficulty,
+                discrimination = excluded.discrimination,
+                difficulty_se = excluded.difficulty_se,
+                responses = excluded.responses,
+                calibrated_at = excluded.calibrated_at
+            """,
+            [
+                [exam_id, qid, fit.model, b, a, se, n, calibrated_at]
+                for qid, b, a, se, n in zip(
+                    question_ids.tolist(), fit.difficulty.tolist(), fit.discrimination.tolist(),
+                    fit.difficulty_se.tolist(), answered.sum(axis=0).tolist()
+                )
+            ]
+        )
+        tx.executemany(
+            """
+            INSERT INTO irt_abilities (exam_id, student_id, model, ability, ability_se, responses, calibrated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (exam_id, student_id, model) DO UPDATE SET
+                ability = excluded.ability,
+                ability_se = excluded.ability_se,
+                responses = excluded.responses,
+                calibrated_at = excluded.calibrated_at
+            """,
+            [
+                [exam_id, sid, fit.model, theta, se, n, calibrated_at]
+                for sid, theta, se, n in zip(
+                    student_ids.tolist(), fit.ability.tolist(), fit.ability_se.tolist(), answered.sum(axis=1).tolist()
+                )
+            ]
+        )
+
+
+async def calibrate_exam(
+    exam_id: int, model: str = "rasch", update_db: bool = True, warm_start: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Calibrate the questions of an exam and the abilities of its students
+
+    Starts from the previous calibration of the same model when one exists,
+    so a recalibration after new submissions converges in a few iterations.
+    Returns None when the exam has no answers.
+    """
+    calibrator = IRTCalibrator(model)
+    question_db = QuestionDatabase()
+    questions = await question_db.get_exam_questions(exam_id)
+    _, answers = await question_db.load_exam_arrays(exam_id)
+    question_ids = np.array([q["id"] for q in questions], dtype=np.int64)
+    student_ids, X = response_matrix(answers, question_ids)
+    if X.size == 0:
+        return None
+    # Questions nobody answered carry no information
+    answered = ~np.isnan(X).all(axis=0)
+    question_ids, X = question_ids[answered], X[:, answered]
+
+    difficulty = discrimination = ability = None
+    if warm_start:
+        items, abilities = await _previous_calibration(exam_id, model)
+        if items or abilities:
+            nan = (float("nan"), float("nan"))
+            difficulty = np.array([items.get(q, nan)[0] for q in question_ids.tolist()], dtype=np.float64)
+            discrimination = np.array([items.get(q, nan)[1] for q in question_ids.tolist()], dtype=np.float64)
+            ability = np.array([abilities.get(s, float("nan")) for s in student_ids.tolist()], dtype=np.float64)
+
+    t0 = time.perf_counter()
+    # CPU-bound: keep the event loop responsive while the solver runs
+    fit = await asyncio.to_thread(calibrator.fit, X, difficulty, discrimination, ability)
+    elapsed = time.perf_counter() - t0
+    if update_db:
+        await _save_calibration(exam_id, fit, question_ids, student_ids, X)
+
+    responses = int((~np.isnan(X)).sum())
+    logger.info(
+        f"irt_calibrated exam_id={exam_id} model={model} students={len(student_ids)} questions={len(question_ids)} "
+        f"responses={responses} iterations={fit.iterations} converged={fit.converged} "
+        f"warm_start={difficulty is not None} elapsed={elapsed:.3f}s"
+    )
+    return {
+        "exam_id": exam_id,
+        "model": model,
+        "students": len(student_ids),
+        "responses": responses,
+        "iterations": fit.iterations,
+        "converged": fit.converged,
+        "warm_start": difficulty is not None,
+        "log_likelihood": round(fit.log_likelihood, 4),
+        "elapsed_seconds": round(elapsed, 4),
+        "items": [
+            {
+                "question_id": qid,
+                "difficulty": round(b, 4),
+                "discrimination": round(a, 4),
+                "difficulty_se": round(se, 4),
+            }
+            for qid, b, a, se in zip(
+                question_ids.tolist(), fit.difficulty.tolist(), fit.discrimination.tolist(), fit.difficulty_se.tolist()
+            )
+        ],
+    }
+
+
+async def get_calibration(exam_id: int, model: str = "rasch") -> Dict[str, Any]:
+    """Stored item parameters and abilities of the last calibration"""
+    items, abilities = await asyncio.gather(
+        db.fetch_all(
+            """
+            SELECT question_id, difficulty, discrimination, difficulty_se, responses, calibrated_at
+            FROM irt_item_params WHERE exam_id = ? AND model = ?
+            ORDER BY question_id
+            """,
+            [exam_id, model]
+        ),
+        db.fetch_all(
+            """
+            SELECT student_id, ability, ability_se, responses, calibrated_at
+            FROM irt_abilities WHERE exam_id = ? AND model = ?
+            ORDER BY student_id
+            """,
+            [exam_id, model]
+        ),
+    )
+    return {"exam_id": exam_id, "model": model, "items": items, "abilities": abilities}
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
+import numpy as np
+from backend.database import db
+from backend.models.question_analyzer import QuestionAnalyzer, QuestionAnalysisService, QuestionDatabase
+
+logger = logging.getLogger("item_stats")
+
+BUCKETS = 10
+
+# Same bucketing in SQL (reconcile) and Python (submit): truncate percentage / 10
+BUCKET_SQL = f"MAX(0, MIN({BUCKETS - 1}, CAST(COALESCE(er.percentage, 0) / 10 AS INTEGER)))"
+
+
+def score_bucket(percentage: float) -> int:
+    return max(0, min(BUCKETS - 1, int((percentage or 0) / 10)))
+
+
+def queue_item_stats(tx, exam_id: int, percentage: float, answer_details: List[Dict[str, Any]]):
+    """Queue the running-statistics upserts for one graded submission on a transaction"""
+    bucket = score_bucket(percentage)
+    tx.execute(
+        """
+        INSERT INTO exam_score_histogram (exam_id, bucket, results) VALUES (?, ?, 1)
+        ON CONFLICT (exam_id, bucket) DO UPDATE SET results = results + 1
+        """,
+        [exam_id, bucket]
+    )
+    if not answer_details:
+        return
+    rows = [[exam_id, d["question_id"], 1 if d["is_correct"] else 0] for d in answer_details]
+    tx.executemany(
+        """
+        INSERT INTO question_item_stats (exam_id, question_id, attempts, correct) VALUES (?, ?, 1, ?)
+        ON CONFLICT (exam_id, question_id) DO UPDATE SET
+            attempts = attempts + 1, correct = correct + excluded.correct
+        """,
+        rows
+    )
+    tx.executemany(
+        """
+        INSERT INTO question_item_buckets (exam_id, question_id, bucket, attempts, correct) VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (exam_id, question_id, bucket) DO UPDATE SET
+            attempts = attempts + 1, correct = correct + excluded.correct
+        """,
+        [[exam_id, question_id, bucket, correct] for _, question_id, correct in rows]
+    )
+
+
+def _group_weights(histogram: np.ndarray, n: int, from_top: bool) -> np.ndarray:
+    """Fraction of each bucket that falls in the first ``n`` results counted from one end"""
+    weights = np.zeros(BUCKETS)
+    remaining = n
+    order = range(BUCKETS - 1, -1, -1) if from_top else range(BUCKETS)
+    for b in order:
+        if remaining <= 0:
+            break
+        if histogram[b] == 0:
+            continue
+        take = min(histogram[b], remaining)
+        weights[b] = take / histogram[b]
+        remaining -= take
+    return weights
+
+
+async def get_item_stats(exam_id: int, analyzer: Optional[QuestionAnalyzer] = None) -> Dict[str, Any]:
+    """p-values and bucket-approximated discrimination for every question of an exam
+
+    Reads only the running counters (three small queries); the last exact
+    values from question_metrics are returned alongside for comparison.
+    """
+    analyzer = analyzer or QuestionAnalyzer()
+    stats_rows, bucket_rows, hist_rows, exact_rows = await asyncio.gather(
+        db.fetch_all(
+            """
+            SELECT s.question_id, s.attempts, s.correct, q.question_type
+            FROM question_item_stats s
+            LEFT JOIN questions q ON q.question_id = s.question_id
+            WHERE s.exam_id = ?
+            ORDER BY s.question_id
+            """,
+            [exam_id]
+        ),
+        db.fetch_all("SELECT question_id, bucket, correct FROM question_item_buckets WHERE exam_id = ?", [exam_id]),
+        db.fetch_all("SELECT bucket, results FROM exam_score_histogram WHERE exam_id = ?", [exam_id]),
+        db.fetch_all(
+            "SELECT question_id, p_value, discrimination_index, last_analyzed FROM question_metrics WHERE exam_id = ?",
+            [exam_id]
+        ),
+    )
+
+    histogram = np.zeros(BUCKETS, dtype=np.int64)
+    for row in hist_rows:
+        histogram[row["bucket"]] = row["results"]
+    n_results = int(histogram.sum())
+
+    question_ids = [r["question_id"] for r in stats_rows]
+    index = {qid: i for i, qid in enumerate(question_ids)}
+    correct_by_bucket = np.zeros((len(question_ids), BUCKETS))
+    for row in bucket_rows:
+        i = index.get(row["question_id"])
+        if i is not None:
+            correct_by_bucket[i, row["bucket"]] = row["correct"]
+
+    if n_results < 10 or not question_ids:
+        discrimination = np.zeros(len(question_ids))
+    else:
+        top_n = max(1, int(n_results * analyzer.TOP_PERCENT))
+        bottom_n = max(1, int(n_results * analyzer.BOTTOM_PERCENT))
+        top = correct_by_bucket @ _group_weights(histogram, top_n, from_top=True)
+        bottom = correct_by_bucket @ _group_weights(histogram, bottom_n, from_top=False)
+        discrimination = top / top_n - bottom / bottom_n
+
+    exact = {r["question_id"]: r for r in exact_rows}
+    questions = []
+    for i, row in enumerate(stats_rows):
+        p_value = analyzer.calculate_p_value(row["attempts"], row["correct"])
+        D = round(float(discrimination[i]), 4)
+        last = exact.get(row["question_id"])
+        questions.append({
+            "question_id": row["question_id"],
+            "question_type": row["question_type"],
+            "total_attempts": row["attempts"],
+            "correct_attempts": row["correct"],
+            "p_value": round(p_value, 4),
+            "difficulty_level": analyzer.classify_difficulty(p_value),
+            "discrimination_index_approx": D,
+            "discrimination_level": analyzer.classify_discrimination(D),
+            "exact": {
+                "p_value": last["p_value"],
+                "discrimination_index": last["discrimination_index"],
+                "last_analyzed": last["last_analyzed"],
+            } if last else None,
+        })
+    return {
+        "exam_id": exam_id,
+        "total_results": n_results,
+        "score_histogram": histogram.tolist(),
+        "questions": questions,
+    }
+
+
+async def rebuild_item_stats(exam_id: int):
+    """Recompute the running counters of an exam exactly from stored answers"""
+    async with db.transaction() as tx:
+        for table in ("question_item_stats", "question_item_buckets", "exam_score_histogram"):
+            tx.execute(f"DELETE FROM {table} WHERE exam_id = ?", [exam_id])
+        tx.execute(
+            """
+            INSERT INTO question_item_stats (exam_id, question_id, attempts, correct)
+            SELECT er.exam_id, sa.question_id, COUNT(*), SUM(CASE WHEN sa.is_correct THEN 1 ELSE 0 END)
+            FROM student_answers sa
+            JOIN exam_results er ON er.id = sa.exam_result_id
+            WHERE er.exam_id = ?
+            GROUP BY sa.question_id
+            """,
+            [exam_id]
+        )
+        tx.execute(
+            f"""
+            INSERT INTO question_item_buckets (exam_id, question_id, bucket, attempts, correct)
+            SELECT er.exam_id, sa.question_id, {BUCKET_SQL} AS bucket,
+                   COUNT(*), SUM(CASE WHEN sa.is_correct THEN 1 ELSE 0 END)
+            FROM student_answers sa
+            JOIN exam_results er ON er.id = sa.exam_result_id
+            WHERE er.exam_id = ?
+            GROUP BY sa.question_id, bucket
+            """,
+            [exam_id]
+        )
+        tx.execute(
+            f"""
+            INSERT INTO exam_score_histogram (exam_id, bucket, results)
+            SELECT er.exam_id, {BUCKET_SQL} AS bucket, COUNT(*)
+            FROM exam_results er
+            WHERE er.exam_id = ?
+            GROUP BY bucket
+            """,
+            [exam_id]
+        )
+
+
+async def reconcile_exam(exam_id: int) -> Dict[str, Any]:
+    """Exact QuestionAnalyzer recompute, then rebuild the counters and report the drift"""
+    analyzer = QuestionAnalyzer()
+    before = await get_item_stats(exam_id, analyzer)
+    metrics = await QuestionAnalysisService(QuestionDatabase(), analyzer).analyze_exam_questions(exam_id, update_db=True)
+    await rebuild_item_stats(exam_id)
+
+    exact = {m.question_id: m for m in metrics}
+    approx = {q["question_id"]: q for q in before["questions"]}
+    p_drift = [abs(approx[qid]["p_value"] - m.p_value) for qid, m in exact.items() if qid in approx]
+    d_error = [
+        abs(approx[qid]["discrimination_index_approx"] - m.discrimination_index)
+        for qid, m in exact.items() if qid in approx
+    ]
+    report = {
+        "exam_id": exam_id,
+        "questions": len(metrics),
+        "max_p_value_drift": round(max(p_drift), 4) if p_drift else 0.0,
+        "max_discrimination_error": round(max(d_error), 4) if d_error else 0.0,
+        "missing_counters": len([qid for qid in exact if qid not in approx]),
+    }
+    logger.info(
+        f"item_stats_reconciled exam_id={exam_id} questions={report['questions']} "
+        f"max_p_drift={report['max_p_value_drift']} max_d_error={report['max_discrimination_error']}"
+    )
+    return report
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, Tuple
+from backend.config import settings
+from backend.utils.security import verify_password, get_password_hash, verify_and_rehash
+
+logger = logging.getLogger("password_hasher")
+
+
+class HasherOverloaded(Exception):
+    """Too many password hashes are queued; the caller should retry later"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _timed(func: Callable, *args):
+    t0 = time.perf_counter()
+    return func(*args), time.perf_counter() - t0
+
+
+class PasswordHasher:
+    """bcrypt off the event loop, in a dedicated bounded thread pool
+
+    bcrypt releases the GIL, so ``workers`` threads hash in parallel while
+    the loop keeps serving other requests. Once ``workers + max_queue``
+    operations are in flight new ones are refused with HasherOverloaded
+    (503 + Retry-After) instead of piling up behind a login storm.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 64):
+        self.workers = max(1, workers or min(4, os.cpu_count() or 1))
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
+        # Metrics
+        self.completed: Dict[str, int] = {"verify": 0, "hash": 0}
+        self.rehashed = 0
+        self.rejected = 0
+        self.avg_seconds = 0.0
+        self._recent_verifies: "deque[float]" = deque()
+
+    @property
+    def limit(self) -> int:
+        return self.workers + self.max_queue
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def retry_after(self) -> float:
+        """Seconds until the current backlog should have drained"""
+        per_op = self.avg_seconds or 0.25
+        return max(1.0, math.ceil(self.in_flight / self.workers * per_op))
+
+    async def _run(self, op: str, func: Callable, *args):
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            logger.warning(f"password_hasher_rejected op={op} in_flight={self.in_flight} limit={self.limit}")
+            raise HasherOverloaded("password hashing queue is full", self.retry_after())
+        self.in_flight += 1
+        try:
+            result, elapsed = await asyncio.get_running_loop().run_in_executor(self._pool(), _timed, func, *args)
+        finally:
+            self.in_flight -= 1
+        # Service time only (queue wait excluded), used for Retry-After estimates
+        self.avg_seconds = elapsed if not self.avg_seconds else 0.9 * self.avg_seconds + 0.1 * elapsed
+        self.completed[op] += 1
+        if op == "verify":
+            now = time.monotonic()
+            self._recent_verifies.append(now)
+            while self._recent_verifies and self._recent_verifies[0] < now - self.WINDOW_SECONDS:
+                self._recent_verifies.popleft()
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    async def verify_login(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a login; also returns a replacement hash when the stored cost differs from BCRYPT_ROUNDS"""
+        valid, new_hash = await self._run("verify", verify_and_rehash, plain_password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    def shutdown(self):
+        """Stop the pool (called from app lifespan); queued hashes are dropped"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(1 for t in self._recent_verifies if t >= now - self.WINDOW_SECONDS)
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "limit": self.limit,
+            "verified": self.completed["verify"],
+            "hashed": self.completed["hash"],
+            "rehashed": self.rehashed,
+            "rejected": self.rejected,
+            "avg_hash_ms": round(self.avg_seconds * 1000, 1),
+            "logins_per_second_1m": round(recent / self.WINDOW_SECONDS, 2),
+        }
+
+
+password_hasher = PasswordHasher(workers=settings.BCRYPT_WORKERS, max_queue=settings.BCRYPT_MAX_QUEUE)
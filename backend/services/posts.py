@@ -3,6 +3,9 @@ from backend.models.post import PostResponse, PostList
 from backend.config import settings
 from fastapi import HTTPException, status
 from backend.database import db
+from backend.utils.pagination import keyset_page, split_page, list_counts
+from backend.services.search import POSTS_BM25, match_query, highlight
+from backend.services.counters import post_counters
 
 def _map_item(item: Dict[str, Any]) -> Dict[str, Any]:
     return {
@@ -21,6 +24,7 @@ def _map_item(item: Dict[str, Any]) -> Dict[str, Any]:
         "user_id": item.get("user_id"),
         "created_at": item.get("created_at"),
         "updated_at": item.get("updated_at"),
+        "snippet": item.get("snippet"),
     }
 
 async def fetch_posts(
@@ -30,39 +34,61 @@ async def fetch_posts(
     search: Optional[str] = None,
     teacher_id: Optional[int] = None,
     classroom_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ) -> PostList:
-    offset = max(0, (page - 1) * page_size)
-
     where_clauses: List[str] = []
     params: List[Any] = []
 
     if subject:
-        where_clauses.append("subject = ?")
+        where_clauses.append("p.subject = ?")
         params.append(subject)
-    if search:
-        where_clauses.append("(title LIKE ? OR description LIKE ? OR author LIKE ?)")
-        like = f"%{search}%"
-        params.extend([like, like, like])
     if teacher_id:
-        where_clauses.append("teacher_id = ?")
+        where_clauses.append("p.teacher_id = ?")
         params.append(teacher_id)
     if classroom_id:
         # For classroom-specific posts, we need to join with classroom_posts
         where_clauses.append("p.id IN (SELECT post_id FROM classroom_posts WHERE classroom_id = ?)")
         params.append(classroom_id)
 
-    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    # Full-text search: FTS5 match, ranked by BM25 instead of newest first
+    match = match_query(search)
+    count_clauses = list(where_clauses)
+    count_params = list(params)
+    if match:
+        count_clauses.append("p.id IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)")
+        count_params.append(match)
+    count_where_sql = f"WHERE {' AND '.join(count_clauses)}" if count_clauses else ""
+
+    async def count() -> int:
+        count_row = await db.fetch_one(f"SELECT COUNT(*) AS total FROM posts p {count_where_sql}", count_params)
+        return (count_row or {}).get("total", 0)
+
+    total = await list_counts.get(("posts", count_where_sql, tuple(count_params)), count) if include_total else None
 
-    count_row = await db.fetch_one(f"SELECT COUNT(*) AS total FROM posts p {where_sql}", params)
-    total = (count_row or {}).get("total", 0)
+    if match:
+        join_sql = f"JOIN (SELECT rowid AS id, {POSTS_BM25} AS rank FROM posts_fts WHERE posts_fts MATCH ?) s ON s.id = p.id"
+        join_params: List[Any] = [match]
+        keys, key_names, descending = ("s.rank", "p.id"), ("rank", "id"), False
+    else:
+        join_sql, join_params = "", []
+        keys, key_names, descending = ("p.created_at", "p.id"), ("created_at", "id"), True
 
+    page_where, page_params, order_sql, order_params = keyset_page(keys, page, page_size, cursor, descending)
+    all_where = where_clauses + page_where
+    page_where_sql = f"WHERE {' AND '.join(all_where)}" if all_where else ""
     query_sql = (
         "SELECT p.id, p.title, p.author, p.date, p.subject, p.category, p.description, "
-        "p.views, p.downloads, p.class, p.specialized, p.file_url, p.user_id, p.teacher_id, p.created_at, p.updated_at "
-        f"FROM posts p {where_sql} ORDER BY p.created_at DESC LIMIT ? OFFSET ?"
+        "p.views, p.downloads, p.class, p.specialized, p.file_url, p.user_id, p.teacher_id, p.created_at, p.updated_at"
+        f"{', s.rank' if match else ''} "
+        f"FROM posts p {join_sql} {page_where_sql} {order_sql}"
     )
 
-    items = await db.fetch_all(query_sql, params + [page_size, offset])
-    mapped = [_map_item(x) for x in items]
+    rows = await db.fetch_all(query_sql, join_params + params + page_params + order_params)
+    items, next_cursor = split_page(rows, page_size, key_names)
+    if match:
+        for item in items:
+            item["snippet"] = highlight(item.get("description"), search) or highlight(item.get("title"), search)
+    mapped = [_map_item(post_counters.apply_pending(x)) for x in items]
     posts: List[PostResponse] = [PostResponse(**item) for item in mapped]
-    return PostList(total=total, page=page, page_size=page_size, data=posts)
+    return PostList(total=total, page=page, page_size=page_size, data=posts, next_cursor=next_cursor)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Any
+from backend.config import settings
+from backend.database import db
+
+logger = logging.getLogger("principals")
+
+
+class PrincipalCache:
+    """TTL + LRU cache of active users by token subject (email)
+
+    Only active users are cached, so an unknown or deactivated account is
+    re-checked on every request. Handlers that change a user (profile edits,
+    (de)activation) call ``invalidate(user_id)``; other worker processes see
+    the change after at most ``ttl`` seconds. Concurrent misses for the same
+    subject share one query.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._by_id: Dict[int, str] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on invalidate so loads that raced an update are not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def _load(self, email: str) -> Optional[Dict[str, Any]]:
+        generation = self._generation
+        user = await db.fetch_one("SELECT * FROM users WHERE email = ? AND is_active = 1", [email])
+        if user is not None and self.ttl > 0 and generation == self._generation:
+            self._entries[email] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(email)
+            self._by_id[user["id"]] = email
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._by_id.pop(evicted["id"], None)
+        return user
+
+    async def get(self, email: str, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Active user for a token subject (a copy; callers may modify it), or None"""
+        entry = self._entries.get(email)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            self._entries.move_to_end(email)
+            user = entry[1]
+        else:
+            self.misses += 1
+            pending = self._inflight.get(email)
+            if pending is not None:
+                user = await asyncio.shield(pending)
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[email] = future
+                try:
+                    user = await self._load(email)
+                    future.set_result(user)
+                except BaseException as e:
+                    future.set_exception(e)
+                    # Mark retrieved so a load nobody else waited on does not log "never retrieved"
+                    future.exception()
+                    raise
+                finally:
+                    if self._inflight.get(email) is future:
+                        del self._inflight[email]
+        if user is None or (user_id is not None and user["id"] != user_id):
+            return None
+        return dict(user)
+
+    def invalidate(self, user_id: int):
+        """Forget a user after its row changed"""
+        self._generation += 1
+        email = self._by_id.pop(user_id, None)
+        if email is not None:
+            self._entries.pop(email, None)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._by_id.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+principals = PrincipalCache(ttl=settings.PRINCIPAL_CACHE_TTL, max_entries=settings.PRINCIPAL_CACHE_SIZE)
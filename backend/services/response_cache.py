@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Dict, Tuple, Any, Callable, Awaitable, Iterable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from backend.config import settings
+
+logger = logging.getLogger("response_cache")
+
+# Cache-Control for cached public reads: clients may store them but must revalidate (cheap 304s)
+CACHE_CONTROL = "public, no-cache"
+
+
+class _Entry:
+    __slots__ = ("body", "etag", "last_modified", "expires", "tags", "stamps")
+
+    def __init__(self, body: bytes, last_modified: float, expires: float, tags: Tuple[str, ...], stamps: Tuple):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.last_modified = last_modified
+        self.expires = expires
+        self.tags = tags
+        self.stamps = stamps
+
+
+class ResponseCache:
+    """TTL + LRU cache of serialized JSON responses for public read endpoints
+
+    Entries are keyed by path and query string and carry tags ("posts",
+    "exams", ...). Write handlers call ``invalidate(tag)``, which drops the
+    tagged entries here and touches a stamp file in ``stamp_dir`` so other
+    worker processes and the import scripts' changes are seen as well
+    (stamps are re-read at most every ``stamp_interval`` seconds). Responses
+    carry a strong ETag and Last-Modified; a matching ``If-None-Match`` is
+    answered with 304 straight from memory.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        max_entries: int = 512,
+        stamp_dir: Optional[str] = None,
+        stamp_interval: float = 1.0,
+    ):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.stamp_dir = stamp_dir
+        self.stamp_interval = stamp_interval
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on invalidate so loads that raced a write are not stored
+        self._generations: Dict[str, int] = {}
+        self._stamps: Dict[str, int] = {}
+        self._stamps_read = 0.0
+        self._adapters: Dict[Any, TypeAdapter] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        if stamp_dir:
+            os.makedirs(stamp_dir, exist_ok=True)
+
+    # Cross-process invalidation stamps
+
+    def _stamp_path(self, tag: str) -> str:
+        return os.path.join(self.stamp_dir, f"{tag}.stamp")
+
+    def _current_stamps(self, tags: Iterable[str]) -> Tuple:
+        if not self.stamp_dir:
+            return ()
+        now = time.monotonic()
+        if now - self._stamps_read >= self.stamp_interval:
+            self._stamps = {}
+            self._stamps_read = now
+        stamps = []
+        for tag in tags:
+            if tag not in self._stamps:
+                try:
+                    self._stamps[tag] = os.stat(self._stamp_path(tag)).st_mtime_ns
+                except OSError:
+                    self._stamps[tag] = 0
+            stamps.append(self._stamps[tag])
+        return tuple(stamps)
+
+    def _touch(self, tag: str):
+        if not self.stamp_dir:
+            return
+        path = self._stamp_path(tag)
+        try:
+            with open(path, "a"):
+                pass
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        except OSError as e:
+            logger.warning(f"response_cache_stamp_error tag={tag} error={e}")
+        self._stamps.pop(tag, None)
+
+    # Lookup
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        query = sorted(request.query_params.multi_items())
+        return request.url.path + ("?" + "&".join(f"{k}={v}" for k, v in query) if query else "")
+
+    def _fresh(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic() or entry.stamps != self._current_stamps(entry.tags):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _serialize(self, data: Any, response_model: Any) -> bytes:
+        if response_model is not None:
+            adapter = self._adapters.get(response_model)
+            if adapter is None:
+                adapter = self._adapters[response_model] = TypeAdapter(response_model)
+            return adapter.dump_json(adapter.validate_python(data))
+        return json.dumps(
+            jsonable_encoder(data), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    async def _load(
+        self, key: str, tags: Tuple[str, ...], loader: Callable[[], Awaitable[Any]], response_model: Any
+    ) -> _Entry:
+        generations = [self._generations.get(tag, 0) for tag in tags]
+        stamps = self._current_stamps(tags)
+        body = self._serialize(await loader(), response_model)
+        entry = _Entry(body, time.time(), time.monotonic() + self.ttl, tags, stamps)
+        if generations == [self._generations.get(tag, 0) for tag in tags]:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    async def get(
+        self, key: str, tags: Tuple[str, ...], loader: Callable[[], Awaitable[Any]], response_model: Any = None
+    ) -> _Entry:
+        """Cached entry for ``key``; a miss runs ``loader`` once for all concurrent callers"""
+        entry = self._fresh(key) if self.ttl > 0 else None
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await self._load(key, tags, loader, response_model)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a load nobody else waited on does not log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    @staticmethod
+    def _not_modified(request: Request, entry: _Entry) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return any(tag.strip() in (entry.etag, "*") for tag in if_none_match.split(","))
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(entry.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def respond(
+        self,
+        request: Request,
+        tags: Tuple[str, ...],
+        loader: Callable[[], Awaitable[Any]],
+        response_model: Any = None,
+    ) -> Response:
+        """Serve a public GET from the cache: 304 on a matching validator, else the cached JSON body"""
+        entry = await self.get(self.key_for(request), tags, loader, response_model)
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+            "Cache-Control": CACHE_CONTROL,
+        }
+        if self._not_modified(request, entry):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, *tags: str):
+        """Drop every entry carrying one of ``tags`` (in all processes sharing the stamp directory)"""
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._touch(tag)
+        for key in [k for k, e in self._entries.items() if any(t in tags for t in e.tags)]:
+            del self._entries[key]
+        logger.info(f"response_cache_invalidated tags={','.join(tags)}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+response_cache = ResponseCache(
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    stamp_dir=settings.RESPONSE_CACHE_STAMP_DIR or os.path.join(tempfile.gettempdir(), "education-api-response-cache"),
+)
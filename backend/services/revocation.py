@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Optional, Dict, Any
+from backend.config import settings
+from backend.database import db
+
+logger = logging.getLogger("revocation")
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (k bit positions from one blake2b digest)"""
+
+    def __init__(self, bits: int = 1 << 20, hashes: int = 7):
+        self.bits = max(8, bits)
+        self.hashes = max(1, min(hashes, 8))
+        self._array = bytearray(self.bits // 8 + 1)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=32).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 4:i * 4 + 4], "little") % self.bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationList:
+    """Revoked token ids and per-user token cutoffs, checked without a database read
+
+    Lookups hit a bloom filter first; only possible matches consult the exact
+    ``jti -> expires_at`` map. Revocations are appended to the node-local
+    ``token_revocations`` table, which every worker tails every
+    ``sync_interval`` seconds (and loads in full at start), so a logout or a
+    deactivation reaches all workers of the node. Rows are pruned once the
+    tokens they cover have expired.
+    """
+
+    def __init__(self, bloom_bits: int = 1 << 20, sync_interval: float = 2.0):
+        self.bloom_bits = bloom_bits
+        self.sync_interval = sync_interval
+        self._bloom = BloomFilter(bloom_bits)
+        self._jtis: Dict[str, float] = {}
+        self._cutoffs: Dict[int, float] = {}
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+        # Metrics
+        self.checks = 0
+        self.bloom_hits = 0
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """True if the token's jti was revoked or it was issued before its user's cutoff"""
+        self.checks += 1
+        jti = payload.get("jti")
+        if jti and jti in self._bloom:
+            self.bloom_hits += 1
+            if jti in self._jtis:
+                return True
+        cutoff = self._cutoffs.get(payload.get("uid"))
+        if cutoff is None:
+            return False
+        if payload.get("iat_ms") is not None:
+            return payload["iat_ms"] < cutoff * 1000
+        # Tokens issued before iat_ms existed only have whole-second iat: reject the cutoff's whole second
+        return payload.get("iat", 0) <= cutoff
+
+    def _apply(self, row: Dict[str, Any]):
+        self._last_id = max(self._last_id, row["id"])
+        if row["jti"]:
+            self._jtis[row["jti"]] = row["expires_at"]
+            self._bloom.add(row["jti"])
+        if row["user_id"] is not None:
+            self._cutoffs[row["user_id"]] = max(self._cutoffs.get(row["user_id"], 0.0), row["not_before"])
+
+    async def _record(self, jti: Optional[str], user_id: Optional[int], not_before: Optional[float], expires_at: float):
+        await db.local.insert(
+            """
+            INSERT INTO token_revocations (jti, user_id, not_before, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (jti) DO NOTHING
+            """,
+            [jti, user_id, not_before, expires_at]
+        )
+        # id 0: the sync cursor only advances in sync(), so rows other workers wrote meanwhile are not skipped
+        self._apply({"id": 0, "jti": jti, "user_id": user_id, "not_before": not_before, "expires_at": expires_at})
+
+    async def revoke(self, payload: Dict[str, Any]):
+        """Revoke one token (by its jti) until it expires"""
+        if payload.get("jti"):
+            await self._record(payload["jti"], None, None, float(payload.get("exp") or time.time()))
+
+    async def revoke_user(self, user_id: int):
+        """Reject every token of a user issued before now"""
+        now = time.time()
+        await self._record(None, user_id, now, now + settings.JWT_REFRESH_EXPIRE_DAYS * 86400)
+        logger.info(f"revocation_user user_id={user_id}")
+
+    async def sync(self):
+        """Pick up revocations written by other workers since the last sync"""
+        rows = await db.local.fetch_all(
+            "SELECT id, jti, user_id, not_before, expires_at FROM token_revocations WHERE id > ? ORDER BY id",
+            [self._last_id]
+        )
+        for row in rows:
+            self._apply(row)
+
+    async def prune(self):
+        """Drop revocations whose tokens have expired and rebuild the bloom filter"""
+        now = time.time()
+        await db.local.delete("DELETE FROM token_revocations WHERE expires_at < ?", [now])
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp >= now}
+        self._bloom = BloomFilter(self.bloom_bits)
+        for jti in self._jtis:
+            self._bloom.add(jti)
+        # A cutoff only matters while tokens issued before it can still be valid
+        horizon = now - settings.JWT_REFRESH_EXPIRE_DAYS * 86400
+        self._cutoffs = {uid: t for uid, t in self._cutoffs.items() if t >= horizon}
+
+    async def _run(self):
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+                if time.monotonic() - last_prune > 3600:
+                    await self.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"revocation_sync_error error={e}", exc_info=True)
+
+    async def start(self):
+        """Load the list and start syncing (called from app lifespan)"""
+        if self._task:
+            return
+        await self.prune()
+        await self.sync()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"revocation_loaded tokens={len(self._jtis)} users={len(self._cutoffs)}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked_tokens": len(self._jtis),
+            "user_cutoffs": len(self._cutoffs),
+            "checks": self.checks,
+            "bloom_hits": self.bloom_hits,
+        }
+
+
+revocations = RevocationList(bloom_bits=settings.REVOCATION_BLOOM_BITS, sync_interval=settings.REVOCATION_SYNC_INTERVAL)
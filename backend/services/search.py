@@ -0,0 +1,79 @@
+import html
+import re
+import unicodedata
+from typing import Optional, List, Tuple
+
+# FTS5 tables (see migrations/20261017_add_fts_search.sql) index text with
+# 'đ' -> 'd' and the unicode61 tokenizer strips every other diacritic, so
+# "Đại số", "dai so" and "ĐẠI SỐ" all match each other.
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Column weights for bm25(): matches in titles count most
+POSTS_BM25 = "bm25(posts_fts, 10.0, 2.0, 1.0)"        # title, description, author
+EXAMS_BM25 = "bm25(exams_fts, 10.0, 2.0, 1.0, 2.0)"   # title, author, description, creator
+CYBER_BM25 = "bm25(cyber_resources_fts, 10.0, 1.0, 3.0, 1.0)"  # title, summary, tags, source
+
+
+def fold(text: str) -> str:
+    """Lowercase, diacritic-free copy of ``text`` with the same length (one char per char)"""
+    out = []
+    for ch in text:
+        base = unicodedata.normalize("NFD", ch)[0]
+        if base in ("đ", "Đ"):
+            base = "d"
+        lower = base.lower()
+        out.append(lower if len(lower) == 1 else base)
+    return "".join(out)
+
+
+def search_terms(search: Optional[str]) -> List[str]:
+    return WORD_RE.findall(fold(search or ""))
+
+
+def match_query(search: Optional[str]) -> Optional[str]:
+    """FTS5 MATCH expression: every word must appear, the last one as a prefix
+
+    Words are quoted, so user input can never inject FTS5 syntax. Returns
+    None when the search contains no words.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight(
+    text: Optional[str], search: Optional[str], max_words: int = 24, open_tag: str = "<mark>", close_tag: str = "</mark>"
+) -> Optional[str]:
+    """Excerpt of ``text`` around the first match with matched words wrapped in tags
+
+    Matching is diacritic-insensitive like the FTS index (the last search word
+    matches as a prefix). The result is safe HTML: the text is escaped and only
+    the tags are markup. Returns None when nothing in ``text`` matches.
+    """
+    terms = search_terms(search)
+    if not text or not terms:
+        return None
+    folded = fold(text)
+    words: List[Tuple[int, int, bool]] = []
+    for m in WORD_RE.finditer(folded):
+        word = m.group()
+        hit = word in terms or word.startswith(terms[-1])
+        words.append((m.start(), m.end(), hit))
+    first = next((i for i, w in enumerate(words) if w[2]), None)
+    if first is None:
+        return None
+
+    start = max(0, first - max_words // 4)
+    end = min(len(words), start + max_words)
+    start = max(0, end - max_words)
+    pieces = ["…" if start > 0 else ""]
+    cursor = words[start][0] if start > 0 else 0
+    for s, e, hit in words[start:end]:
+        pieces.append(html.escape(text[cursor:s]))
+        pieces.append(f"{open_tag}{html.escape(text[s:e])}{close_tag}" if hit else html.escape(text[s:e]))
+        cursor = e
+    pieces.append("…" if end < len(words) else html.escape(text[cursor:]))
+    return "".join(pieces)
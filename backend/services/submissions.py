@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Optional, List, Dict, Any
+from backend.config import settings
+from backend.database import db, DatabaseUnavailableError
+from backend.models import ExamSubmission
+from backend.services.grading import answer_keys
+from backend.services.item_stats import queue_item_stats
+
+logger = logging.getLogger("submissions")
+
+INSERT_RESULT_SQL = """
+    INSERT INTO exam_results (exam_id, student_id, score, total_points, percentage, time_spent_seconds)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# The result id is not known while the statements are queued; answers find
+# their result row as the latest one for (exam, student) in the same transaction
+INSERT_ANSWER_SQL = """
+    INSERT INTO student_answers (exam_result_id, question_id, answer_text, option_id, is_correct, points_earned)
+    VALUES ((SELECT MAX(id) FROM exam_results WHERE exam_id = ? AND student_id = ?), ?, ?, ?, ?, ?)
+"""
+
+
+async def grade_submission(exam_id: int, exam_version: int, submission: ExamSubmission) -> Dict[str, Any]:
+    """Score a submission against the compiled answer key of the exam"""
+    answer_key = await answer_keys.get(exam_id, exam_version)
+    total_points = answer_key.total_points
+    score, answer_details = answer_key.grade(submission.answers)
+    percentage = (score / total_points * 100) if total_points > 0 else 0
+    return {
+        "score": score,
+        "total_points": total_points,
+        "percentage": percentage,
+        "answers": answer_details,
+    }
+
+
+def queue_result(tx, exam_id: int, student_id: int, graded: Dict[str, Any], time_spent_seconds: int) -> int:
+    """Queue the exam_results row, its answers and the item-statistics updates; returns the result statement index"""
+    result_i = tx.execute(
+        INSERT_RESULT_SQL,
+        [exam_id, student_id, graded["score"], graded["total_points"], graded["percentage"], time_spent_seconds]
+    )
+    tx.executemany(
+        INSERT_ANSWER_SQL,
+        [
+            [exam_id, student_id, detail["question_id"], detail.get("answer_text"),
+             detail.get("option_id"), detail["is_correct"], detail["points_earned"]]
+            for detail in graded["answers"]
+        ]
+    )
+    queue_item_stats(tx, exam_id, graded["percentage"], graded["answers"])
+    return result_i
+
+
+class SubmissionQueue:
+    """Durable submission queue in the local SQLite file, drained by a worker pool
+
+    ``enqueue`` only writes the raw payload (deduplicated per student by
+    idempotency key). Workers claim pending rows in batches, grade them and
+    write all results of a batch to the primary database in one transaction.
+    Rows claimed by a worker that died are re-queued after ``claim_timeout``
+    seconds, so delivery is at-least-once. Failed rows are retried with
+    exponential backoff; while the primary database is unavailable rows are
+    deferred without using up an attempt.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        claim_timeout: float = 300.0,
+        max_attempts: int = 5,
+        retry_base: float = 2.0,
+        retry_max: float = 300.0,
+    ):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        # Consecutive batches deferred because the database was unavailable
+        self._outage_streak = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        # Metrics
+        self.enqueued = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.failed = 0
+        self.deferred = 0
+        self.batches = 0
+
+    async def enqueue(
+        self, exam_id: int, student_id: int, submission: ExamSubmission, idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Store a submission for grading; a repeated key returns the existing entry"""
+        key = idempotency_key or uuid.uuid4().hex
+        async with db.local.transaction() as tx:
+            insert_i = tx.execute(
+                """
+                INSERT INTO submission_queue (idempotency_key, exam_id, student_id, payload)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (student_id, idempotency_key) DO NOTHING
+                """,
+                [key, exam_id, student_id, submission.model_dump_json()]
+            )
+            row_i = tx.execute(
+                """
+                SELECT id, idempotency_key, exam_id, student_id, status, exam_result_id, error, created_at
+                FROM submission_queue WHERE student_id = ? AND idempotency_key = ?
+                """,
+                [student_id, key]
+            )
+        row = tx.rows(row_i)[0]
+        row["duplicate"] = tx.changes(insert_i) == 0
+        if row["duplicate"]:
+            self.duplicates += 1
+        else:
+            self.enqueued += 1
+            if self._wake is not None:
+                self._wake.set()
+        return row
+
+    async def get(self, submission_id: int) -> Optional[Dict[str, Any]]:
+        return await db.local.fetch_one(
+            """
+            SELECT id, idempotency_key, exam_id, student_id, status, attempts, exam_result_id, error,
+                   created_at, completed_at
+            FROM submission_queue WHERE id = ?
+            """,
+            [submission_id]
+        )
+
+    async def start(self):
+        """Start the worker tasks (called from app lifespan)"""
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"submission_queue_started workers={self.workers} batch_size={self.batch_size}")
+
+    async def stop(self):
+        """Let in-flight batches finish, then stop the workers"""
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, n: int):
+        while not self._stopping:
+            try:
+                rows = await self._claim()
+                if rows:
+                    await self._process(rows)
+                    continue
+            except Exception as e:
+                logger.error(f"submission_worker_error worker={n} error={e}", exc_info=True)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> List[Dict[str, Any]]:
+        # Rows of a worker that died are re-queued, unless they used up their
+        # attempts (a payload that kills the worker must not be retried forever)
+        await db.local.update(
+            """
+            UPDATE submission_queue
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = CASE WHEN attempts >= ? THEN 'worker lost while processing' ELSE error END,
+                claimed_at = NULL
+            WHERE status = 'processing' AND claimed_at < datetime('now', ?)
+            """,
+            [self.max_attempts, self.max_attempts, f"-{int(self.claim_timeout)} seconds"]
+        )
+        return await db.local.fetch_all(
+            """
+            UPDATE submission_queue
+            SET status = 'processing', claimed_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM submission_queue WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?
+            )
+            RETURNING id, exam_id, student_id, payload, attempts
+            """,
+            [time.time(), self.batch_size]
+        )
+
+    def _backoff(self, n: int) -> float:
+        return min(self.retry_max, self.retry_base * 2 ** max(0, n - 1))
+
+    async def _process(self, rows: List[Dict[str, Any]]):
+        # No SQLite fallback here: during a D1 outage the batch waits rather than
+        # grading against (or writing to) the local copy
+        with db.without_fallback():
+            try:
+                exam_ids = sorted({r["exam_id"] for r in rows})
+                placeholders = ", ".join("?" for _ in exam_ids)
+                exams = await db.fetch_all(f"SELECT id, version FROM exams WHERE id IN ({placeholders})", exam_ids)
+            except DatabaseUnavailableError as e:
+                await self._defer(rows, e)
+                return
+            versions = {e["id"]: e["version"] for e in exams}
+
+            graded: List[tuple] = []
+            failures: List[tuple] = []
+            unavailable: List[Dict[str, Any]] = []
+            outage: Optional[DatabaseUnavailableError] = None
+            for row in rows:
+                if row["exam_id"] not in versions:
+                    failures.append((row, "Exam not found", True))
+                    continue
+                try:
+                    submission = ExamSubmission.model_validate_json(row["payload"])
+                    result = await grade_submission(row["exam_id"], versions[row["exam_id"]], submission)
+                except DatabaseUnavailableError as e:
+                    unavailable.append(row)
+                    outage = e
+                    continue
+                except Exception as e:
+                    failures.append((row, f"grading failed: {e}", True))
+                    continue
+                graded.append((row, result, submission.time_spent_seconds))
+
+            done: List[tuple] = []
+            if graded:
+                try:
+                    done = await self._persist(graded)
+                except DatabaseUnavailableError as e:
+                    unavailable.extend(item[0] for item in graded)
+                    outage = e
+                except Exception as e:
+                    # Isolate the offending submission(s) by retrying one at a time
+                    logger.warning(f"submission_batch_failed size={len(graded)} error={e}")
+                    for item in graded:
+                        try:
+                            done.extend(await self._persist([item]))
+                        except DatabaseUnavailableError as item_error:
+                            unavailable.append(item[0])
+                            outage = item_error
+                        except Exception as item_error:
+                            failures.append((item[0], str(item_error), False))
+
+        if done:
+            await db.local.executemany(
+                """
+                UPDATE submission_queue
+                SET status = 'done', exam_result_id = ?, error = NULL, completed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                [[result_id, row_id] for row_id, result_id in done]
+            )
+        if failures:
+            now = time.time()
+            await db.local.executemany(
+                """
+                UPDATE submission_queue
+                SET status = CASE WHEN ? OR attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    next_attempt_at = ?, error = ?, claimed_at = NULL
+                WHERE id = ?
+                """,
+                [
+                    [1 if permanent else 0, self.max_attempts, now + self._backoff(row["attempts"]), error, row["id"]]
+                    for row, error, permanent in failures
+                ]
+            )
+        if unavailable:
+            await self._defer(unavailable, outage)
+        elif done:
+            self._outage_streak = 0
+        self.batches += 1
+        self.processed += len(done)
+        self.failed += len(failures)
+        logger.info(
+            f"submission_batch claimed={len(rows)} done={len(done)} failed={len(failures)} deferred={len(unavailable)}"
+        )
+
+    async def _defer(self, rows: List[Dict[str, Any]], error: DatabaseUnavailableError):
+        """Put rows back while the database is unavailable, without using up an attempt"""
+        self._outage_streak += 1
+        delay = max(error.retry_after, self._backoff(self._outage_streak))
+        await db.local.executemany(
+            """
+            UPDATE submission_queue
+            SET status = 'pending', attempts = attempts - 1, next_attempt_at = ?, error = ?, claimed_at = NULL
+            WHERE id = ?
+            """,
+            [[time.time() + delay, str(error), row["id"]] for row in rows]
+        )
+        self.deferred += len(rows)
+        logger.warning(f"submission_deferred rows={len(rows)} retry_in={delay:.1f}s error={error}")
+
+    async def _persist(self, graded: List[tuple]) -> List[tuple]:
+        async with db.transaction() as tx:
+            indexes = [
+                queue_result(tx, row["exam_id"], row["student_id"], result, time_spent)
+                for row, result, time_spent in graded
+            ]
+        return [(row["id"], tx.last_row_id(i)) for (row, _, _), i in zip(graded, indexes)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "enqueued": self.enqueued,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "failed": self.failed,
+            "deferred": self.deferred,
+            "batches": self.batches,
+        }
+
+
+submission_queue = SubmissionQueue(
+    workers=settings.SUBMISSION_WORKERS,
+    batch_size=settings.SUBMISSION_BATCH_SIZE,
+    poll_interval=settings.SUBMISSION_POLL_INTERVAL,
+    claim_timeout=settings.SUBMISSION_CLAIM_TIMEOUT,
+    max_attempts=settings.SUBMISSION_MAX_ATTEMPTS,
+    retry_base=settings.SUBMISSION_RETRY_BASE,
+    retry_max=settings.SUBMISSION_RETRY_MAX,
+)
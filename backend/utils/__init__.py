@@ -1,12 +1,12 @@
 from .security import (
-    verify_password, get_password_hash, 
-    create_access_token, decode_token, generate_reset_token
+    verify_password, get_password_hash, hash_cost, needs_rehash,
+    create_access_token, create_refresh_token, create_token_pair, decode_token, generate_reset_token
 )
 from .r2 import r2
 from .email import send_email, send_password_reset_email
 
 __all__ = [
-    "verify_password", "get_password_hash",
-    "create_access_token", "decode_token", "generate_reset_token",
+    "verify_password", "get_password_hash", "hash_cost", "needs_rehash",
+    "create_access_token", "create_refresh_token", "create_token_pair", "decode_token", "generate_reset_token",
     "r2", "send_email", "send_password_reset_email"
 ]
\ No newline at end of file
@@ -1,6 +1,3 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from backend.config import settings
 from typing import Optional
 
@@ -11,7 +8,7 @@ async def send_email(
     from_email: Optional[str] = None
 ) -> bool:
     """
-    Send email via SMTP
+    Queue email for SMTP delivery by the outbox worker (no network I/O here)
     
     Args:
         to_email: Recipient email
@@ -20,34 +17,12 @@ async def send_email(
         from_email: Sender email (uses SMTP_FROM if None)
     
     Returns:
-        True if sent successfully
+        True if queued (False if email is not configured)
     """
-    if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
-        print("⚠️ Email not configured - skipping send")
-        return False
-    
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['From'] = from_email or settings.SMTP_FROM
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        # Attach HTML body
-        html_part = MIMEText(body, 'html', 'utf-8')
-        msg.attach(html_part)
-        
-        # Send email
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-        
-        print(f"✅ Email sent to: {to_email}")
-        return True
-    
-    except Exception as e:
-        print(f"❌ Email error: {e}")
-        return False
+    # Imported here: backend.utils is imported before main.py applies --cloudflare,
+    # and the outbox module would build the db singleton too early
+    from backend.services.email_outbox import email_outbox
+    return await email_outbox.enqueue(to_email, subject, body, from_email) is not None
 
 async def send_password_reset_email(email: str, reset_token: str) -> bool:
     """Send password reset email with token"""
@@ -0,0 +1,105 @@
+import asyncio
+import base64
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, List, Tuple, Any, Awaitable, Callable
+from fastapi import HTTPException, status
+from backend.config import settings
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor for the sort-key position of the last row of a page"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != 2:
+            raise ValueError("bad cursor")
+        return values[0], int(values[1])
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_page(
+    keys: Tuple[str, str], page: int, page_size: int, cursor: Optional[str], descending: bool = True
+) -> Tuple[List[str], List[Any], str, List[Any]]:
+    """WHERE clauses, their params, ORDER/LIMIT sql and its params for one page
+
+    ``keys`` are the two sort expressions, the last one a unique id (e.g.
+    ``("p.created_at", "p.id")``). With a cursor the page starts right after
+    that position and is served from the matching index; without one the
+    classic page/page_size OFFSET is used. One extra row is fetched to detect
+    whether a next page exists.
+    """
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+    where: List[str] = []
+    params: List[Any] = []
+    order_sql = f"ORDER BY {keys[0]} {direction}, {keys[1]} {direction} LIMIT ?"
+    if cursor:
+        where.append(f"({keys[0]}, {keys[1]}) {comparison} (?, ?)")
+        params.extend(decode_cursor(cursor))
+        return where, params, order_sql, [page_size + 1]
+    return where, params, order_sql + " OFFSET ?", [page_size + 1, max(0, (page - 1) * page_size)]
+
+
+def split_page(
+    rows: List[dict], page_size: int, key_names: Tuple[str, str] = ("created_at", "id")
+) -> Tuple[List[dict], Optional[str]]:
+    """Drop the look-ahead row and build the cursor of the next page"""
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*(rows[-1][name] for name in key_names))
+
+
+class CountCache:
+    """Short-lived cache of COUNT(*) results for listing filters
+
+    Totals only drive the page count shown to users, so a few seconds of
+    staleness is acceptable; concurrent misses for the same filter share
+    one query.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple, Tuple[float, int]]" = OrderedDict()
+        self._inflight: dict = {}
+
+    async def get(self, key: Tuple, loader: Callable[[], Awaitable[int]]) -> int:
+        if self.ttl <= 0:
+            return await loader()
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[1]
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            total = await loader()
+            future.set_result(total)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a miss nobody else waited on does not log
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        self._entries[key] = (time.monotonic() + self.ttl, total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return total
+
+    def clear(self):
+        self._entries.clear()
+
+
+list_counts = CountCache(ttl=settings.LIST_COUNT_CACHE_TTL)
@@ -1,12 +1,18 @@
 import bcrypt
+import re
+import time
+import uuid
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from backend.config import settings
 import logging
 
 logger = logging.getLogger("security")
 
+# Modular crypt format: $2b$<cost>$<22-char salt><31-char hash>
+BCRYPT_COST_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash using bcrypt directly"""
     try:
@@ -23,8 +29,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         logger.error(f"Password verification error: {e}")
         return False
 
-def get_password_hash(password: str) -> str:
-    """Generate password hash using bcrypt directly"""
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Generate password hash using bcrypt directly (cost: ``rounds`` or BCRYPT_ROUNDS)"""
     try:
         # Convert to bytes
         password_bytes = password.encode('utf-8')
@@ -34,7 +40,7 @@ def get_password_hash(password: str) -> str:
             password_bytes = password_bytes[:72]
         
         # Generate salt and hash
-        salt = bcrypt.gensalt(rounds=12)
+        salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password_bytes, salt)
         
         # Return as string
@@ -43,6 +49,24 @@ def get_password_hash(password: str) -> str:
         logger.error(f"Password hashing error: {e}")
         raise ValueError(f"Could not hash password: {e}")
 
+def hash_cost(hashed_password: str) -> Optional[int]:
+    """bcrypt cost factor of a stored hash, or None if it is not a bcrypt hash"""
+    match = BCRYPT_COST_RE.match(hashed_password or "")
+    return int(match.group(1)) if match else None
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash was made with a different cost than BCRYPT_ROUNDS"""
+    cost = hash_cost(hashed_password)
+    return cost is not None and cost != settings.BCRYPT_ROUNDS
+
+def verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the stored cost is outdated"""
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, get_password_hash(plain_password)
+    return True, None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -55,6 +79,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({
         "exp": expire,
         "iat": datetime.utcnow(),
+        "iat_ms": int(time.time() * 1000),  # Sub-second issue time for revocation cutoffs
+        "jti": uuid.uuid4().hex,
         "type": "access"
     })
     
@@ -65,6 +91,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
+def create_refresh_token(data: dict) -> str:
+    """Create long-lived JWT refresh token (only accepted by /auth/refresh)"""
+    to_encode = data.copy()
+    to_encode.update({
+        "exp": datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_EXPIRE_DAYS),
+        "iat": datetime.utcnow(),
+        "iat_ms": int(time.time() * 1000),
+        "jti": uuid.uuid4().hex,
+        "type": "refresh"
+    })
+    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+def create_token_pair(user: dict) -> dict:
+    """Access + refresh tokens for a user row; the access token carries what get_current_user needs"""
+    claims = {"sub": user["email"], "uid": user["id"], "role": user.get("role")}
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token({"sub": user["email"], "uid": user["id"]}),
+        "token_type": "bearer",
+        "expires_in": settings.JWT_EXPIRE_MINUTES * 60,
+    }
+
 def decode_token(token: str) -> Optional[dict]:
     """Decode and validate JWT token"""
     try:
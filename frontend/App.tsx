@@ -214,7 +214,8 @@ const App: React.FC = () => {
           headers: {
             'Authorization': `Bearer ${token}`,
             'Content-Type': 'application/json'
-          }
+          },
+          body: JSON.stringify({ refresh_token: localStorage.getItem('refresh_token') || '' })
         });
         console.log('App.tsx - /api/logout call successful');
       }
@@ -224,6 +225,7 @@ const App: React.FC = () => {
       console.log('App.tsx - Clearing local state...');
       // Always clear local state regardless of API success
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
       setCurrentUser(null);
       resetToHome();
       try {
@@ -126,6 +126,7 @@ const AuthModal: React.FC<AuthModalProps> = ({ mode, onSwitchMode, onAuthSuccess
         const data = await res.json();
         const token = data.access_token as string;
         localStorage.setItem('token', token);
+        if (data.refresh_token) localStorage.setItem('refresh_token', data.refresh_token);
         const meRes = await fetch('/api/users/me', {
           headers: { 'Authorization': `Bearer ${token}` }
         });
@@ -0,0 +1,50 @@
+// Access tokens are short-lived: when an /api call comes back 401, trade the
+// stored refresh token for a new pair once and replay the request.
+
+let pendingRefresh: Promise<string | null> | null = null;
+
+async function refreshTokens(originalFetch: typeof fetch): Promise<string | null> {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) return null;
+  try {
+    const res = await originalFetch('/api/refresh', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: refreshToken })
+    });
+    if (!res.ok) {
+      localStorage.removeItem('refresh_token');
+      return null;
+    }
+    const data = await res.json();
+    localStorage.setItem('token', data.access_token);
+    localStorage.setItem('refresh_token', data.refresh_token);
+    return data.access_token as string;
+  } catch {
+    return null;
+  }
+}
+
+export function installTokenRefresh() {
+  const originalFetch = window.fetch.bind(window);
+  window.fetch = async (input: RequestInfo | URL, init?: RequestInit) => {
+    const response = await originalFetch(input, init);
+    const url = typeof input === 'string' ? input : input instanceof URL ? input.href : input.url;
+    const headers = new Headers(init?.headers || (input instanceof Request ? input.headers : undefined));
+    if (
+      response.status !== 401 ||
+      !url.includes('/api/') ||
+      url.includes('/api/refresh') ||
+      url.includes('/api/login') ||
+      !headers.has('Authorization')
+    ) {
+      return response;
+    }
+    // Concurrent 401s share one refresh (a refresh token is only valid once)
+    pendingRefresh = pendingRefresh || refreshTokens(originalFetch).finally(() => { pendingRefresh = null; });
+    const token = await pendingRefresh;
+    if (!token) return response;
+    headers.set('Authorization', `Bearer ${token}`);
+    return originalFetch(input, { ...init, headers });
+  };
+}